@@ -35,14 +35,41 @@ class QuestionInline(admin.TabularInline):
 
 @admin.register(Quiz)
 class QuizAdmin(admin.ModelAdmin):
-	list_display = ("title", "category", "subcategory", "difficulty", "status", "is_published", "time_limit", "passing_score", "max_attempts", "created_at")
+	list_display = ("title", "category_name", "subcategory_name", "difficulty", "status", "is_published", "question_count", "completion_count", "avg_percent", "time_limit", "passing_score", "max_attempts", "created_at")
 	list_filter = ("is_published", "category", "subcategory", "difficulty", "status")
 	search_fields = ("title", "description")
+	# Counters and names come from the QuizCard read model, joined in the changelist query
+	list_select_related = ("card",)
+
+	@staticmethod
+	def _card_value(obj, field):
+		card = getattr(obj, 'card', None)
+		return getattr(card, field) if card else "—"
+
+	@admin.display(description="Category", ordering="card__category_name")
+	def category_name(self, obj):
+		return self._card_value(obj, 'category_name')
+
+	@admin.display(description="Subcategory", ordering="card__subcategory_name")
+	def subcategory_name(self, obj):
+		return self._card_value(obj, 'subcategory_name')
+
+	@admin.display(description="Questions", ordering="card__question_count")
+	def question_count(self, obj):
+		return self._card_value(obj, 'question_count')
+
+	@admin.display(description="Completions", ordering="card__completion_count")
+	def completion_count(self, obj):
+		return self._card_value(obj, 'completion_count')
+
+	@admin.display(description="Avg %")
+	def avg_percent(self, obj):
+		return self._card_value(obj, 'avg_percent')
 
 
 @admin.register(Attempt)
 class AttemptAdmin(admin.ModelAdmin):
-	list_display = ("user", "quiz", "score", "total", "time_taken", "started_at", "completed_at")
+	list_display = ("user", "quiz", "percent", "weighted_score", "max_score", "correct_count", "total", "time_taken", "started_at", "completed_at")
 	list_filter = ("quiz",)
 	search_fields = ("user__username", "quiz__title")
 
@@ -0,0 +1,35 @@
+"""Opaque keyset-pagination cursors.
+
+A cursor is the sort key of the last row on a page (for example ``(created_at, id)``),
+encoded as URL-safe base64 JSON. Used by the quiz catalog, the quiz history and the
+leaderboard.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+
+def encode_cursor(*values) -> str:
+	"""Encode a sort key; datetimes are stored as ISO 8601."""
+	values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+	return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(token: str, *types):
+	"""Return the sort key in ``token`` as a tuple, or None if it is missing or malformed.
+
+	Each value is parsed with the matching entry of ``types`` (``datetime``, ``int``,
+	``float``), so a tampered value is rejected here instead of failing in the query.
+	"""
+	if not token:
+		return None
+	try:
+		values = json.loads(urlsafe_b64decode(token.encode()))
+		if not isinstance(values, list) or len(values) != len(types):
+			return None
+		return tuple(
+			datetime.fromisoformat(value) if kind is datetime else kind(value)
+			for kind, value in zip(types, values)
+		)
+	except (ValueError, TypeError):
+		return None
@@ -0,0 +1,37 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from Quizez.models import Attempt
+
+# Read models that aggregate the score columns
+READ_MODEL_COMMANDS = ("rebuild_leaderboard", "backfill_leaderboard_periods", "rebuild_user_stats", "rebuild_quiz_cards")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute correct_count, weighted_score, max_score and percent (and the legacy score) "
+        "of completed attempts in pk-ordered chunks, then rebuild the read models that sum them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--skip-read-models", action="store_true", help="Only backfill the attempt columns")
+
+    def handle(self, *args, **options):
+        completed = Attempt.objects.filter(is_completed=True).order_by("pk")
+        count = 0
+        last_pk = 0
+        while True:
+            ids = list(completed.filter(pk__gt=last_pk).values_list("pk", flat=True)[:options["batch_size"]])
+            if not ids:
+                break
+            with transaction.atomic():
+                Attempt.rescore(ids)
+            count += len(ids)
+            last_pk = ids[-1]
+        self.stdout.write(self.style.SUCCESS(f"Rescored {count} completed attempts."))
+
+        if not options["skip_read_models"]:
+            for name in READ_MODEL_COMMANDS:
+                call_command(name, batch_size=options["batch_size"], stdout=self.stdout, stderr=self.stderr)
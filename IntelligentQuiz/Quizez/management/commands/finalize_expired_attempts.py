@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Quizez.models import Attempt
+
+
+class Command(BaseCommand):
+    help = "Complete in-progress attempts whose session deadline has passed (once, or as a worker with --loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--loop", action="store_true", help="Keep running, sweeping every --interval seconds")
+        parser.add_argument("--interval", type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        if not options["loop"]:
+            count = Attempt.finalize_expired(batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Finalized {count} expired attempts."))
+            return
+
+        self.stdout.write(f"Sweeping expired attempts every {options['interval']}s (Ctrl+C to stop).")
+        try:
+            while True:
+                count = Attempt.finalize_expired(batch_size=options["batch_size"])
+                if count:
+                    self.stdout.write(f"Finalized {count} expired attempts.")
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from Quizez.models import Attempt, Question, Quiz, QuizCard
+
+
+class Command(BaseCommand):
+    help = "Recompute every QuizCard (question/attempt counters and category names)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        questions = dict(
+            Question.objects.values('quiz_id').annotate(n=Count('id')).order_by().values_list('quiz_id', 'n')
+        )
+        attempts = {
+            row['quiz_id']: row
+            for row in Attempt.objects.values('quiz_id').annotate(
+                attempt_count=Count('id'),
+                completion_count=Count('id', filter=Q(is_completed=True)),
+                percent_total=Sum('percent', filter=Q(is_completed=True), default=0),
+            ).order_by().iterator()
+        }
+        cards = []
+        for quiz in Quiz.objects.select_related('category', 'subcategory').iterator():
+            row = attempts.get(quiz.id, {})
+            cards.append(QuizCard(
+                quiz=quiz,
+                question_count=questions.get(quiz.id, 0),
+                attempt_count=row.get('attempt_count', 0),
+                completion_count=row.get('completion_count', 0),
+                percent_total=row.get('percent_total', 0),
+                category_name=quiz.category.name if quiz.category else '',
+                subcategory_name=quiz.subcategory.name if quiz.subcategory else '',
+            ))
+        QuizCard.objects.all().delete()
+        QuizCard.objects.bulk_create(cards, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(cards)} quiz cards."))
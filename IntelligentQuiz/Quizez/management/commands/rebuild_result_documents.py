@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from Quizez.models import Attempt
+
+
+class Command(BaseCommand):
+    help = "Store the result document of completed attempts that lack one (or of all of them with --all)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rebuild existing documents too")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        attempts = Attempt.objects.filter(is_completed=True).select_related('quiz').order_by('pk')
+        if not options["all"]:
+            attempts = attempts.filter(result__isnull=True)
+        count = 0
+        for attempt in attempts.iterator(chunk_size=options["batch_size"]):
+            attempt.store_result()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} result documents."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from Quizez import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over quizzes, questions, categories and subcategories."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            self.stdout.write(self.style.WARNING("FTS5 search table not available; search falls back to icontains."))
+            return
+        count = search.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} documents."))
@@ -128,7 +128,7 @@ class Command(BaseCommand):
             for i, question in enumerate(created_questions, start=1):
                 if i <= 2:
                     # correct choice
-                    correct_choice = question.choices.filter(is_correct=True).first()
+                    correct_choice = question.correct_choice
                     Answer.objects.create(
                         attempt=attempt,
                         question=question,
@@ -142,10 +142,7 @@ class Command(BaseCommand):
                         question=question,
                         selected_choice=wrong_choice,
                     )
-            # Update attempt totals
-            attempt.total = len(created_questions)
-            attempt.score = sum(1 for a in attempt.answers.all() if a.is_correct_cached)
-            attempt.is_completed = True
-            attempt.save()
+            # Score from the answers and mark completed
+            attempt.complete()
 
         self.stdout.write(self.style.SUCCESS("Sample quiz data seeded successfully."))
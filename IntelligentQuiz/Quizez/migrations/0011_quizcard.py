@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_quiz_cards(apps, schema_editor):
+    Quiz = apps.get_model('Quizez', 'Quiz')
+    Question = apps.get_model('Quizez', 'Question')
+    Attempt = apps.get_model('Quizez', 'Attempt')
+    QuizCard = apps.get_model('Quizez', 'QuizCard')
+
+    questions = dict(Question.objects.values('quiz_id').annotate(n=Count('id')).values_list('quiz_id', 'n'))
+    attempts = {
+        row['quiz_id']: row
+        for row in Attempt.objects.values('quiz_id').annotate(
+            attempt_count=Count('id'),
+            completion_count=Count('id', filter=Q(is_completed=True)),
+            percent_total=Sum('score', filter=Q(is_completed=True), default=0),
+        )
+    }
+    cards = []
+    for quiz in Quiz.objects.select_related('category', 'subcategory').iterator():
+        row = attempts.get(quiz.id, {})
+        cards.append(QuizCard(
+            quiz=quiz,
+            question_count=questions.get(quiz.id, 0),
+            attempt_count=row.get('attempt_count', 0),
+            completion_count=row.get('completion_count', 0),
+            percent_total=row.get('percent_total', 0),
+            category_name=quiz.category.name if quiz.category else '',
+            subcategory_name=quiz.subcategory.name if quiz.subcategory else '',
+        ))
+    QuizCard.objects.bulk_create(cards, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0010_explanation_answer_explanation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizCard',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='Quizez.quiz')),
+                ('question_count', models.PositiveIntegerField(default=0)),
+                ('attempt_count', models.PositiveIntegerField(default=0, help_text='Attempts started, completed or not')),
+                ('completion_count', models.PositiveIntegerField(default=0)),
+                ('percent_total', models.PositiveIntegerField(default=0, help_text="Sum of completed attempts' percent")),
+                ('category_name', models.CharField(blank=True, max_length=100)),
+                ('subcategory_name', models.CharField(blank=True, max_length=100)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_quiz_cards, migrations.RunPython.noop),
+    ]
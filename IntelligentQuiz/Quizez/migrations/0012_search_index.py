@@ -0,0 +1,64 @@
+from django.db import DatabaseError, migrations
+
+# Kept in sync with Quizez.search: rowid = object_id * 4 + index of kind in KINDS
+CREATE_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS quizez_search USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    quiz_id UNINDEXED,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+POPULATE = [
+    """
+    INSERT INTO quizez_search (rowid, kind, object_id, quiz_id, title, body)
+    SELECT q.id * 4, 'quiz', q.id, q.id, q.title,
+           TRIM(q.description || ' ' || COALESCE(c.name, '') || ' ' || COALESCE(s.name, ''))
+    FROM "Quizez_quiz" q
+    LEFT JOIN "Quizez_category" c ON c.id = q.category_id
+    LEFT JOIN "Quizez_subcategory" s ON s.id = q.subcategory_id
+    """,
+    """
+    INSERT INTO quizez_search (rowid, kind, object_id, quiz_id, title, body)
+    SELECT id * 4 + 1, 'question', id, quiz_id, '', text FROM "Quizez_question"
+    """,
+    """
+    INSERT INTO quizez_search (rowid, kind, object_id, quiz_id, title, body)
+    SELECT id * 4 + 2, 'category', id, NULL, name, description FROM "Quizez_category"
+    """,
+    """
+    INSERT INTO quizez_search (rowid, kind, object_id, quiz_id, title, body)
+    SELECT id * 4 + 3, 'subcategory', id, NULL, name, description FROM "Quizez_subcategory"
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends (or builds without FTS5) fall back to icontains
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(CREATE_TABLE)
+    except DatabaseError:
+        return
+    for statement in POPULATE:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS quizez_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0011_quizcard'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
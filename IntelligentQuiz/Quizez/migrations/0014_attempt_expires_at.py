@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:33
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+# Quiz.session_time_limit() at the time of this migration
+SESSION_MINUTES = {5: 5, 10: 10, 15: 12, 20: 15}
+
+
+def set_expiry_of_ongoing_attempts(apps, schema_editor):
+    Attempt = apps.get_model('Quizez', 'Attempt')
+
+    batch = []
+    for attempt in Attempt.objects.filter(is_completed=False).select_related('quiz').iterator():
+        minutes = SESSION_MINUTES.get(attempt.total, int(attempt.quiz.time_limit))
+        attempt.expires_at = attempt.started_at + timedelta(seconds=max(1, minutes * 60))
+        batch.append(attempt)
+        if len(batch) >= 500:
+            Attempt.objects.bulk_update(batch, ['expires_at'])
+            batch = []
+    Attempt.objects.bulk_update(batch, ['expires_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0013_quiz_content_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['is_completed', 'expires_at'], name='Quizez_atte_is_comp_727808_idx'),
+        ),
+        migrations.RunPython(set_expiry_of_ongoing_attempts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:41
+
+from django.db import migrations, models
+
+
+def record_progress_of_ongoing_attempts(apps, schema_editor):
+    Attempt = apps.get_model('Quizez', 'Attempt')
+    Answer = apps.get_model('Quizez', 'Answer')
+    Question = apps.get_model('Quizez', 'Question')
+
+    positions = {}
+    batch = []
+    for attempt in Attempt.objects.filter(is_completed=False).iterator():
+        if attempt.quiz_id not in positions:
+            # Snapshot order: questions by id
+            ids = Question.objects.filter(quiz_id=attempt.quiz_id).order_by('id').values_list('id', flat=True)
+            positions[attempt.quiz_id] = {qid: n for n, qid in enumerate(ids)}
+        by_question = positions[attempt.quiz_id]
+        bits = bytearray((len(by_question) + 7) // 8)
+        selected = [None] * len(by_question)
+        for question_id, choice_id in Answer.objects.filter(attempt=attempt).values_list('question_id', 'selected_choice_id'):
+            n = by_question.get(question_id)
+            if n is not None:
+                bits[n // 8] |= 1 << (n % 8)
+                selected[n] = choice_id
+        attempt.answered_bits = bytes(bits)
+        attempt.selected_choices = selected
+        batch.append(attempt)
+        if len(batch) >= 500:
+            Attempt.objects.bulk_update(batch, ['answered_bits', 'selected_choices'])
+            batch = []
+    Attempt.objects.bulk_update(batch, ['answered_bits', 'selected_choices'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0014_attempt_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='answered_bits',
+            field=models.BinaryField(default=b'', editable=False),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='selected_choices',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.RunPython(record_progress_of_ongoing_attempts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0015_attempt_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='result',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def point_questions_at_correct_choices(apps, schema_editor):
+    Question = apps.get_model('Quizez', 'Question')
+    Choice = apps.get_model('Quizez', 'Choice')
+
+    correct = Choice.objects.filter(question=OuterRef('pk'), is_correct=True).values('pk')[:1]
+    Question.objects.update(correct_choice=Subquery(correct))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0016_attempt_result'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='correct_choice',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Quizez.choice'),
+        ),
+        migrations.RunPython(point_questions_at_correct_choices, migrations.RunPython.noop),
+    ]
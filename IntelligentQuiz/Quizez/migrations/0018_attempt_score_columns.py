@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0017_question_correct_choice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='correct_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='weighted_score',
+            field=models.PositiveIntegerField(default=0, help_text='Points of the correctly answered questions'),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='max_score',
+            field=models.PositiveIntegerField(default=0, help_text="Points of all the quiz's questions"),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='percent',
+            field=models.PositiveIntegerField(default=0, help_text='weighted_score / max_score as a rounded percentage'),
+        ),
+    ]
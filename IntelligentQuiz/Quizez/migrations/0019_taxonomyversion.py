@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0018_attempt_score_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaxonomyVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taxonomy', models.BigIntegerField(help_text='Bumped when a category or subcategory is written')),
+                ('counts', models.BigIntegerField(help_text='Bumped when a quiz is written')),
+            ],
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:40
+
+from datetime import datetime, time, timedelta
+
+from django.db import migrations
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def backfill_score_columns(apps, schema_editor):
+    # Attempt.rescore() at the time of this migration, over completed attempts in pk chunks
+    Attempt = apps.get_model('Quizez', 'Attempt')
+    Answer = apps.get_model('Quizez', 'Answer')
+    Question = apps.get_model('Quizez', 'Question')
+
+    correct = Answer.objects.filter(attempt=OuterRef('pk'), is_correct_cached=True).order_by().values('attempt')
+    points = Question.objects.filter(quiz=OuterRef('quiz_id')).order_by().values('quiz')
+    percent = Case(
+        When(max_score=0, then=Value(0)),
+        default=(F('weighted_score') * 200 + F('max_score')) / (F('max_score') * 2),
+    )
+    completed = Attempt.objects.filter(is_completed=True).order_by('pk')
+    last_pk = 0
+    while True:
+        ids = list(completed.filter(pk__gt=last_pk).values_list('pk', flat=True)[:1000])
+        if not ids:
+            break
+        Attempt.objects.filter(pk__in=ids).update(
+            correct_count=Coalesce(Subquery(correct.annotate(n=Count('pk')).values('n')[:1]), 0),
+            weighted_score=Coalesce(Subquery(correct.annotate(s=Sum('question__points')).values('s')[:1]), 0),
+            max_score=Coalesce(Subquery(points.annotate(s=Sum('points')).values('s')[:1]), 0),
+        )
+        Attempt.objects.filter(pk__in=ids).update(percent=percent, score=percent)
+        last_pk = ids[-1]
+
+
+def rebuild_score_read_models(apps, schema_editor):
+    # The read models earlier migrations filled from the legacy score column, rebuilt from the
+    # columns above (what backfill_attempt_scores does by hand after a rescore)
+    Attempt = apps.get_model('Quizez', 'Attempt')
+    QuizCard = apps.get_model('Quizez', 'QuizCard')
+    LeaderboardEntry = apps.get_model('dashboard', 'LeaderboardEntry')
+    LeaderboardPeriodEntry = apps.get_model('dashboard', 'LeaderboardPeriodEntry')
+    UserStats = apps.get_model('users', 'UserStats')
+    Achievement = apps.get_model('users', 'Achievement')
+    UserAchievement = apps.get_model('users', 'UserAchievement')
+
+    completed = Attempt.objects.filter(is_completed=True)
+
+    by_quiz = completed.filter(quiz=OuterRef('quiz_id')).order_by().values('quiz')
+    QuizCard.objects.update(percent_total=Coalesce(Subquery(by_quiz.annotate(s=Sum('percent')).values('s')[:1]), 0))
+
+    def leaderboard_totals(model, attempts, **fields):
+        # LeaderboardTotals.aggregate_attempts and refresh_accuracy
+        rows = attempts.filter(user__isnull=False).values('user_id').annotate(
+            total_score=Coalesce(Sum('weighted_score'), 0),
+            total_possible=Coalesce(Sum('max_score'), 0),
+            total_quizzes=Count('id'),
+            total_time=Coalesce(Sum('time_taken'), 0),
+            perfect_scores=Count('id', filter=Q(max_score__gt=0, weighted_score=F('max_score'))),
+        ).order_by()
+        return [
+            model(accuracy=round(row['total_score'] / row['total_possible'] * 100, 1) if row['total_possible'] else 0, **fields, **row)
+            for row in rows.iterator()
+        ]
+
+    LeaderboardEntry.objects.all().delete()
+    LeaderboardEntry.objects.bulk_create(leaderboard_totals(LeaderboardEntry, completed), batch_size=500)
+
+    tz = timezone.get_current_timezone()
+    buckets = list(LeaderboardPeriodEntry.objects.values_list('period', 'period_start').distinct().order_by())
+    for period, start in buckets:
+        end = start + timedelta(days=7) if period == 'week' else (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        attempts = completed.filter(
+            completed_at__gte=datetime.combine(start, time.min, tzinfo=tz),
+            completed_at__lt=datetime.combine(end, time.min, tzinfo=tz),
+        )
+        LeaderboardPeriodEntry.objects.filter(period=period, period_start=start).delete()
+        LeaderboardPeriodEntry.objects.bulk_create(
+            leaderboard_totals(LeaderboardPeriodEntry, attempts, period=period, period_start=start),
+            batch_size=500,
+        )
+
+    # Only the percent-based stats change; attempts, time, categories and streaks stay as built
+    by_user = completed.filter(user=OuterRef('user_id')).order_by().values('user')
+    UserStats.objects.update(
+        total_score=Coalesce(Subquery(by_user.annotate(s=Sum('percent')).values('s')[:1]), 0),
+        best_score=Coalesce(Subquery(by_user.annotate(m=Max('percent')).values('m')[:1]), 0),
+    )
+    for rule in Achievement.objects.filter(is_active=True):
+        qualified = UserStats.objects.filter(**{f'{rule.metric}__gte': rule.threshold}).values_list('user_id', flat=True)
+        UserAchievement.objects.bulk_create(
+            [UserAchievement(user_id=user_id, achievement=rule) for user_id in qualified.iterator()],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0019_taxonomyversion'),
+        ('dashboard', '0003_quizpeercounts'),
+        ('users', '0005_seed_achievements'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_score_columns, migrations.RunPython.noop),
+        migrations.RunPython(rebuild_score_read_models, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0020_backfill_attempt_score_columns'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attempt',
+            name='current_index',
+            field=models.PositiveIntegerField(default=0, help_text='Position (0-based, snapshot order) of the question the session is on; answered positions are in answered_bits'),
+        ),
+    ]
@@ -1,9 +1,14 @@
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 
+from . import snapshots
+from .signals import attempt_completed
+
 
 class Category(models.Model):
 	name = models.CharField(max_length=100, unique=True)
@@ -53,6 +58,19 @@ class Subcategory(models.Model):
 		return self.quiz_set.count()
 
 
+class TaxonomyVersion(models.Model):
+	"""Single row of version stamps for the process-local category tree (see ``Quizez.taxonomy``).
+
+	Kept in the database rather than the cache so a bump reaches every worker, whatever the
+	cache backend.
+	"""
+	taxonomy = models.BigIntegerField(help_text="Bumped when a category or subcategory is written")
+	counts = models.BigIntegerField(help_text="Bumped when a quiz is written")
+
+	def __str__(self) -> str:
+		return f"taxonomy {self.taxonomy} / counts {self.counts}"
+
+
 class Quiz(models.Model):
 	DIFFICULTY_EASY = "easy"
 	DIFFICULTY_MEDIUM = "medium"
@@ -84,6 +102,8 @@ class Quiz(models.Model):
 	time_limit = models.PositiveIntegerField(default=30, help_text="Time limit in minutes")
 	passing_score = models.PositiveIntegerField(default=60, help_text="Passing score percentage")
 	max_attempts = models.PositiveIntegerField(default=3, help_text="Maximum number of attempts allowed per user")
+	# Bumped on every question/choice write; keys the compiled snapshots in Quizez.snapshots
+	content_version = models.PositiveIntegerField(default=1, editable=False)
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
@@ -118,8 +138,7 @@ class Quiz(models.Model):
 					"status": "An active/published quiz must contain at least one question.",
 				})
 			# every question must have a correct choice
-			missing_correct = [q.id for q in qs if not q.choices.filter(is_correct=True).exists()]
-			if missing_correct:
+			if qs.filter(correct_choice__isnull=True).exists():
 				raise ValidationError({
 					"status": "All questions in an active/published quiz must have a correct choice.",
 				})
@@ -160,6 +179,20 @@ class Quiz(models.Model):
 	def question_count(self) -> int:
 		return self.questions.count()
 
+	def session_time_limit(self, total: int) -> int:
+		"""Seconds allowed for a ``quiz_session`` of ``total`` questions.
+
+		Dynamic time limit by question count: 5→5m, 10→10m, 15→12m, 20→15m; fallback to time_limit
+		"""
+		minutes_map = {5: 5, 10: 10, 15: 12, 20: 15}
+		minutes = minutes_map.get(total, int(self.time_limit))
+		return max(1, int(minutes) * 60)
+
+	@classmethod
+	def bump_content_version(cls, quiz_id) -> None:
+		"""Invalidate compiled snapshots of ``quiz_id`` after its questions or choices change."""
+		cls.objects.filter(pk=quiz_id).update(content_version=models.F('content_version') + 1, updated_at=timezone.now())
+
 
 class Question(models.Model):
 	QUESTION_TYPE_MULTIPLE = 'multiple_choice'
@@ -176,15 +209,12 @@ class Question(models.Model):
 	image = models.ImageField(upload_to='questions/', blank=True, null=True)
 	question_type = models.CharField(max_length=20, choices=QUESTION_TYPE_CHOICES, default=QUESTION_TYPE_MULTIPLE)
 	points = models.PositiveIntegerField(default=1)
+	# Denormalized answer key: the choice marked is_correct, kept in step by Quizez.signals
+	correct_choice = models.ForeignKey('Choice', null=True, blank=True, on_delete=models.SET_NULL, related_name='+', editable=False)
 
 	def __str__(self) -> str:
 		return f"{self.quiz.title}: {self.text[:50]}"
 
-	@property
-	def correct_choice(self):
-		"""Return the correct choice for this question if available."""
-		return self.choices.filter(is_correct=True).first()
-
 
 class Choice(models.Model):
 	question = models.ForeignKey(Question, related_name='choices', on_delete=models.CASCADE)
@@ -209,39 +239,346 @@ class Attempt(models.Model):
 	"""UserQuizAttempt: tracks per-user progress on a quiz."""
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='quiz_attempts')
 	quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
+	# Legacy score column: equals ``percent`` once the attempt is completed
 	score = models.PositiveIntegerField(default=0)
 	total = models.PositiveIntegerField(default=0)
-	current_index = models.PositiveIntegerField(default=0, help_text="Number of questions answered so far")
+	# Normalized score, written on completion from tally() (``manage.py backfill_attempt_scores``
+	# recomputes older rows)
+	correct_count = models.PositiveIntegerField(default=0)
+	weighted_score = models.PositiveIntegerField(default=0, help_text="Points of the correctly answered questions")
+	max_score = models.PositiveIntegerField(default=0, help_text="Points of all the quiz's questions")
+	percent = models.PositiveIntegerField(default=0, help_text="weighted_score / max_score as a rounded percentage")
+	current_index = models.PositiveIntegerField(default=0, help_text="Position (0-based, snapshot order) of the question the session is on; answered positions are in answered_bits")
 	is_completed = models.BooleanField(default=False)
 	started_at = models.DateTimeField(auto_now_add=True)
 	completed_at = models.DateTimeField(auto_now=True)
 	# Total time taken in seconds
 	time_taken = models.PositiveIntegerField(null=True, blank=True, help_text="Total time taken in seconds")
+	# Session deadline; in-progress attempts past it are finalized by ``manage.py finalize_expired_attempts``
+	expires_at = models.DateTimeField(null=True, blank=True)
+	# In-progress selections by question position (snapshot order), written to Answer rows on
+	# completion: a bitset of answered positions and the chosen choice id per position
+	answered_bits = models.BinaryField(default=b'', editable=False)
+	selected_choices = models.JSONField(default=list, editable=False)
+	# Review document read by quiz_result, stored once the attempt is completed (see build_result)
+	result = models.JSONField(null=True, blank=True, editable=False)
+
+	SCORE_FIELDS = ('correct_count', 'weighted_score', 'max_score', 'percent')
+
+	class Meta:
+		indexes = [
+			models.Index(fields=["is_completed", "expires_at"]),
+		]
 
 	def __str__(self) -> str:
-		return f"{self.user or 'Anonymous'} - {self.quiz} ({self.score}/{self.total})"
+		return f"{self.user or 'Anonymous'} - {self.quiz} ({self.percent}%)"
+
+	@staticmethod
+	def percent_of(weighted_score: int, max_score: int) -> int:
+		# Rounds half up, like the expression used by rescore()
+		return (weighted_score * 200 + max_score) // (max_score * 2) if max_score else 0
+
+	def tally(self) -> dict:
+		"""Score columns plus ``questions``/``answered`` counts, in one aggregate query.
+
+		The quiz's questions are joined to this attempt's answers; ``weighted_score`` sums
+		the points of the correctly answered ones and ``max_score`` the points of all.
+		"""
+		tally = Question.objects.filter(quiz_id=self.quiz_id).annotate(
+			mine=models.FilteredRelation('answer', condition=Q(answer__attempt=self.pk)),
+		).aggregate(
+			questions=models.Count('pk'),
+			answered=models.Count('mine'),
+			correct_count=models.Count('pk', filter=Q(mine__is_correct_cached=True)),
+			weighted_score=Coalesce(models.Sum(models.Case(
+				models.When(mine__is_correct_cached=True, then=models.F('points')),
+				default=models.Value(0),
+			)), 0),
+			max_score=Coalesce(models.Sum('points'), 0),
+		)
+		tally['percent'] = self.percent_of(tally['weighted_score'], tally['max_score'])
+		return tally
 
 	def calculate_score(self) -> int:
-		"""Calculate raw score from answers' correctness (1 point per correct unless question points is used)."""
-		# If question-level points are present, sum those; else default to 1 per correct
-		answers = self.answers.select_related('question').all()
-		if not answers:
-			return 0
-		points = 0
-		for a in answers:
-			if a.is_correct_cached:
-				points += getattr(a.question, 'points', 1)
-		return points
+		"""Points of the correctly answered questions."""
+		return self.tally()['weighted_score']
 
 	def update_progress(self):
-		"""Recompute total answered, correct answers, and score."""
-		ans = self.answers.all()
-		self.current_index = ans.count()
-		correct = ans.filter(is_correct_cached=True).count()
-		self.score = correct  # raw correct count (kept for backward-compat)
-		self.total = self.quiz.questions.count()
-		# We keep score as correct count; a consumer may compute weighted with calculate_score()
-		self.save(update_fields=['current_index', 'score', 'total'])
+		"""Recompute the question count and the score columns (``current_index`` is the session's position, not a count)."""
+		tally = self.tally()
+		self.total = tally['questions']
+		for field in self.SCORE_FIELDS:
+			setattr(self, field, tally[field])
+		self.score = self.percent
+		self.save(update_fields=['total', 'score', *self.SCORE_FIELDS])
+
+	def is_answered(self, position: int) -> bool:
+		byte = position // 8
+		return byte < len(self.answered_bits) and bool(self.answered_bits[byte] >> (position % 8) & 1)
+
+	@property
+	def answered_count(self) -> int:
+		return int.from_bytes(bytes(self.answered_bits), 'little').bit_count()
+
+	def selected_choice_at(self, position: int):
+		return self.selected_choices[position] if position < len(self.selected_choices) else None
+
+	def record_selection(self, position: int, choice_id) -> None:
+		"""Mark ``position`` answered with ``choice_id`` (None for an invalid choice); not saved."""
+		bits = bytearray(self.answered_bits)
+		if len(bits) <= position // 8:
+			bits.extend(b'\0' * (position // 8 + 1 - len(bits)))
+		bits[position // 8] |= 1 << (position % 8)
+		self.answered_bits = bytes(bits)
+		if len(self.selected_choices) <= position:
+			self.selected_choices = self.selected_choices + [None] * (position + 1 - len(self.selected_choices))
+		self.selected_choices[position] = choice_id
+
+	def selections(self, snapshot) -> dict:
+		"""``{question_id: choice_id}`` for every answered position of ``snapshot``.
+
+		A choice that does not belong to the question at its position (the quiz was edited
+		mid-attempt) counts as answered without a selection.
+		"""
+		selections = {}
+		for position, question in enumerate(snapshot.questions):
+			if self.is_answered(position):
+				choice = question.choice(self.selected_choice_at(position))
+				selections[question.id] = choice.id if choice else None
+		return selections
+
+	def build_answers(self, snapshot) -> list:
+		"""Unsaved Answer rows for the recorded selections, correctness taken from ``snapshot``."""
+		correct = {question.id: question.correct_choice_id for question in snapshot.questions}
+		return [
+			Answer(
+				attempt_id=self.pk,
+				question_id=question_id,
+				selected_choice_id=choice_id,
+				is_correct_cached=choice_id is not None and choice_id == correct[question_id],
+			)
+			for question_id, choice_id in self.selections(snapshot).items()
+		]
+
+	def build_result(self, snapshot) -> dict:
+		"""Compact review of the attempt: one item per question of ``snapshot`` with its answer.
+
+		Items hold the question text, ``choices`` as ``[id, text]`` pairs, ``correct_id``,
+		``selected_id``, ``answered``, ``answer_id`` (None without an Answer row), ``is_correct``
+		and ``time_taken``. An attempt still in progress also shows the selections recorded on
+		the row, which only become Answer rows on completion.
+		"""
+		answers = {
+			question_id: (answer_id, choice_id, is_correct, time_taken)
+			for answer_id, question_id, choice_id, is_correct, time_taken in self.answers.values_list(
+				'id', 'question_id', 'selected_choice_id', 'is_correct_cached', 'time_taken',
+			)
+		}
+		if not self.is_completed:
+			correct = {question.id: question.correct_choice_id for question in snapshot.questions}
+			for question_id, choice_id in self.selections(snapshot).items():
+				answer_id, _, _, time_taken = answers.get(question_id, (None, None, False, None))
+				is_correct = choice_id is not None and choice_id == correct[question_id]
+				answers[question_id] = (answer_id, choice_id, is_correct, time_taken)
+		items = []
+		for question in snapshot.questions:
+			answer_id, choice_id, is_correct, time_taken = answers.get(question.id, (None, None, False, None))
+			items.append({
+				'question_id': question.id,
+				'text': question.text,
+				'choices': [[choice.id, choice.text] for choice in question.choices],
+				'correct_id': question.correct_choice_id,
+				'selected_id': choice_id,
+				'answered': question.id in answers,
+				'answer_id': answer_id,
+				'is_correct': is_correct,
+				'time_taken': time_taken,
+			})
+		# Fallback to completed_at - started_at if time_taken is missing
+		secs = self.time_taken
+		if secs is None and self.started_at and self.completed_at:
+			secs = int((self.completed_at - self.started_at).total_seconds())
+		return {
+			'correct_count': sum(1 for a in answers.values() if a[2]),
+			'time_taken': secs or 0,
+			'items': items,
+		}
+
+	def store_result(self) -> dict:
+		"""Build and save ``result`` for a completed attempt."""
+		self.result = self.build_result(snapshots.get_snapshot(self.quiz))
+		Attempt.objects.filter(pk=self.pk).update(result=self.result)
+		return self.result
+
+	def result_items(self) -> list:
+		"""``result`` items with the selected and correct choice texts resolved, for display."""
+		items = []
+		for item in (self.result or {}).get('items', []):
+			texts = dict(item['choices'])
+			items.append({
+				**item,
+				# Documents stored before ``answered`` was recorded
+				'answered': item.get('answered', item['answer_id'] is not None),
+				'selected_text': texts.get(item['selected_id']),
+				'correct_text': texts.get(item['correct_id']),
+			})
+		return items
+
+	def complete(self, time_taken=None) -> bool:
+		"""Score the attempt from its Answer rows, mark it completed and send ``attempt_completed``
+		in the same transaction.
+
+		The update is conditional on the row still being in progress, so a double submit
+		only finalizes (and is counted by read models) once. Returns True if this call
+		completed the attempt.
+		"""
+		with transaction.atomic():
+			tally = self.tally()
+			values = {field: tally[field] for field in self.SCORE_FIELDS}
+			values.update(
+				score=tally['percent'],
+				total=tally['questions'],
+				is_completed=True,
+				time_taken=time_taken,
+				completed_at=timezone.now(),
+			)
+			updated = Attempt.objects.filter(pk=self.pk, is_completed=False).update(**values)
+			if not updated:
+				self.refresh_from_db(fields=list(values))
+				return False
+			for field, value in values.items():
+				setattr(self, field, value)
+			attempt_completed.send(sender=Attempt, attempt=self)
+		return True
+
+	@classmethod
+	def rescore(cls, ids) -> None:
+		"""Recompute the score columns of the attempts ``ids`` from their Answer rows, in SQL.
+
+		Two UPDATEs: the counts and point sums through correlated subqueries, then ``percent``
+		(and ``score``) from the stored sums.
+		"""
+		correct = (
+			Answer.objects.filter(attempt=models.OuterRef('pk'), is_correct_cached=True)
+			.order_by().values('attempt')
+		)
+		points = Question.objects.filter(quiz=models.OuterRef('quiz_id')).order_by().values('quiz')
+		cls.objects.filter(pk__in=ids).update(
+			correct_count=Coalesce(models.Subquery(correct.annotate(n=models.Count('pk')).values('n')[:1]), 0),
+			weighted_score=Coalesce(models.Subquery(correct.annotate(s=models.Sum('question__points')).values('s')[:1]), 0),
+			max_score=Coalesce(models.Subquery(points.annotate(s=models.Sum('points')).values('s')[:1]), 0),
+		)
+		# Rounded half up in integer arithmetic, as percent_of()
+		percent = models.Case(
+			models.When(max_score=0, then=models.Value(0)),
+			default=(models.F('weighted_score') * 200 + models.F('max_score')) / (models.F('max_score') * 2),
+		)
+		cls.objects.filter(pk__in=ids).update(percent=percent, score=percent)
+
+	@classmethod
+	def finalize_expired(cls, now=None, batch_size: int = 500) -> int:
+		"""Complete every in-progress attempt whose ``expires_at`` has passed; returns how many.
+
+		Each batch first writes the recorded selections as Answer rows (one upsert) and is
+		scored set-based by ``rescore()``. Attempts are then completed one at a time, with the
+		deadline as ``completed_at``, each followed by its ``attempt_completed`` send inside the
+		batch's transaction: receivers that look at the user's other completed attempts see
+		only those finished before this one, exactly as with ``complete()``. As there, the
+		update is conditional on the row still being in progress, so where the backend takes
+		no row locks an attempt finished concurrently is neither completed nor counted twice.
+		"""
+		now = now or timezone.now()
+		finalized = 0
+		while True:
+			with transaction.atomic():
+				batch = list(
+					cls.objects.select_for_update(skip_locked=True)
+					.filter(is_completed=False, expires_at__lte=now)
+					.order_by('expires_at')
+					.only('id', 'quiz_id', 'started_at', 'expires_at', 'answered_bits', 'selected_choices')[:batch_size]
+				)
+				if not batch:
+					return finalized
+				quizzes = Quiz.objects.in_bulk({attempt.quiz_id for attempt in batch})
+				Answer.upsert([
+					answer
+					for attempt in batch if attempt.answered_bits
+					for answer in attempt.build_answers(snapshots.get_snapshot(quizzes[attempt.quiz_id]))
+				])
+				cls.rescore([attempt.pk for attempt in batch])
+				questions = dict(
+					Question.objects.filter(quiz_id__in=quizzes).values('quiz_id')
+					.annotate(n=models.Count('pk')).values_list('quiz_id', 'n')
+				)
+				scored = cls.objects.filter(pk__in=[a.pk for a in batch]).select_related('quiz').order_by('expires_at', 'pk')
+				for attempt in scored:
+					attempt.is_completed = True
+					attempt.completed_at = attempt.expires_at
+					attempt.time_taken = max(0, round((attempt.expires_at - attempt.started_at).total_seconds()))
+					attempt.total = questions.get(attempt.quiz_id, 0)
+					updated = cls.objects.filter(pk=attempt.pk, is_completed=False).update(
+						is_completed=True,
+						completed_at=attempt.completed_at,
+						time_taken=attempt.time_taken,
+						total=attempt.total,
+					)
+					if updated:
+						attempt_completed.send(sender=cls, attempt=attempt)
+						finalized += 1
+
+
+class QuizCard(models.Model):
+	"""Denormalized catalog card per quiz, read by the quiz list, home and admin.
+
+	Counters are kept current by the receivers in ``Quizez.signals`` (question writes,
+	attempt start/completion, category renames); ``manage.py rebuild_quiz_cards``
+	recomputes every card from scratch.
+	"""
+	quiz = models.OneToOneField(Quiz, primary_key=True, on_delete=models.CASCADE, related_name='card')
+	question_count = models.PositiveIntegerField(default=0)
+	attempt_count = models.PositiveIntegerField(default=0, help_text="Attempts started, completed or not")
+	completion_count = models.PositiveIntegerField(default=0)
+	percent_total = models.PositiveIntegerField(default=0, help_text="Sum of completed attempts' percent")
+	category_name = models.CharField(max_length=100, blank=True)
+	subcategory_name = models.CharField(max_length=100, blank=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self) -> str:
+		return f"{self.quiz} card"
+
+	@property
+	def avg_percent(self) -> float:
+		return round(self.percent_total / self.completion_count, 1) if self.completion_count else 0
+
+	@classmethod
+	def bump(cls, quiz_id, **deltas) -> None:
+		"""Atomically add ``deltas`` (field=amount) to the card for ``quiz_id``, creating it if needed."""
+		if not cls.objects.filter(quiz_id=quiz_id).exists():
+			cls.refresh(quiz_id)
+			return
+		# update() skips auto_now; updated_at feeds the quiz list's conditional GET validators
+		cls.objects.filter(quiz_id=quiz_id).update(
+			updated_at=timezone.now(),
+			**{f: models.F(f) + n for f, n in deltas.items()},
+		)
+
+	@classmethod
+	def refresh(cls, quiz_id) -> None:
+		"""Recompute one card from its quiz, questions and attempts."""
+		quiz = Quiz.objects.select_related('category', 'subcategory').filter(pk=quiz_id).first()
+		if quiz is None:
+			return
+		attempts = Attempt.objects.filter(quiz_id=quiz_id).aggregate(
+			attempt_count=models.Count('id'),
+			completion_count=models.Count('id', filter=Q(is_completed=True)),
+			percent_total=models.Sum('percent', filter=Q(is_completed=True), default=0),
+		)
+		cls.objects.update_or_create(quiz=quiz, defaults={
+			'question_count': quiz.questions.count(),
+			'category_name': quiz.category.name if quiz.category else '',
+			'subcategory_name': quiz.subcategory.name if quiz.subcategory else '',
+			**attempts,
+		})
 
 
 class Answer(models.Model):
@@ -262,6 +599,16 @@ class Answer(models.Model):
 		self.is_correct_cached = self.is_correct()
 		return super().save(*args, **kwargs)
 
+	@classmethod
+	def upsert(cls, answers) -> None:
+		"""Insert or overwrite ``answers`` (correctness precomputed) in one statement."""
+		cls.objects.bulk_create(
+			answers,
+			update_conflicts=True,
+			unique_fields=['attempt', 'question'],
+			update_fields=['selected_choice', 'is_correct_cached'],
+		)
+
 	class Meta:
 		constraints = [
 			models.UniqueConstraint(fields=["attempt", "question"], name="unique_answer_per_attempt_question"),
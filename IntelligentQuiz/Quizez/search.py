@@ -0,0 +1,195 @@
+"""Full-text search over quizzes, questions, categories and subcategories.
+
+On SQLite the documents live in an FTS5 table (``quizez_search``, created by migration
+0012) and are kept in step by the receivers in ``Quizez.signals``; results are ranked
+with bm25. Each document's rowid encodes ``(kind, object id)`` so an update or delete
+touches one row by rowid instead of scanning the index. On other backends, or if the
+SQLite build lacks FTS5, every helper falls back to unranked ``icontains`` lookups.
+
+``manage.py rebuild_search_index`` rebuilds the table from scratch.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'quizez_search'
+KINDS = ('quiz', 'question', 'category', 'subcategory')
+SEARCH_LIMIT = 20
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_available = None
+
+
+def fts_available() -> bool:
+	"""True when the FTS5 search table exists on the default database (checked once per process)."""
+	global _available
+	if _available is None:
+		_available = connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+	return _available
+
+
+def _rowid(kind: str, object_id: int) -> int:
+	return object_id * len(KINDS) + KINDS.index(kind)
+
+
+def match_expression(query: str) -> str:
+	"""Turn free text into an FTS5 query: every word must match, the last one as a prefix."""
+	tokens = _TOKEN_RE.findall(query or '')
+	if not tokens:
+		return ''
+	terms = [f'"{t}"' for t in tokens]
+	terms[-1] += '*'
+	return ' '.join(terms)
+
+
+# Documents -----------------------------------------------------------------
+
+def quiz_document(quiz):
+	category = quiz.category.name if quiz.category_id else ''
+	subcategory = quiz.subcategory.name if quiz.subcategory_id else ''
+	return ('quiz', quiz.pk, quiz.pk, quiz.title, ' '.join(filter(None, [quiz.description, category, subcategory])))
+
+
+def question_document(question):
+	return ('question', question.pk, question.quiz_id, '', question.text)
+
+
+def category_document(category):
+	return ('category', category.pk, None, category.name, category.description)
+
+
+def subcategory_document(subcategory):
+	return ('subcategory', subcategory.pk, None, subcategory.name, subcategory.description)
+
+
+def index_documents(documents) -> None:
+	"""Insert or replace ``(kind, object_id, quiz_id, title, body)`` documents."""
+	if not fts_available():
+		return
+	rows = [(_rowid(kind, pk), kind, pk, quiz_id, title, body or '') for kind, pk, quiz_id, title, body in documents]
+	if not rows:
+		return
+	with connection.cursor() as cursor:
+		cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+		cursor.executemany(
+			f'INSERT INTO {FTS_TABLE} (rowid, kind, object_id, quiz_id, title, body) VALUES (%s, %s, %s, %s, %s, %s)',
+			rows,
+		)
+
+
+def remove_document(kind: str, object_id: int) -> None:
+	if not fts_available():
+		return
+	with connection.cursor() as cursor:
+		cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [_rowid(kind, object_id)])
+
+
+def rebuild(batch_size: int = 2000) -> int:
+	"""Recreate every document from the tables; returns the number indexed."""
+	from .models import Category, Question, Quiz, Subcategory
+
+	if not fts_available():
+		return 0
+	with connection.cursor() as cursor:
+		cursor.execute(f'DELETE FROM {FTS_TABLE}')
+	sources = [
+		(Quiz.objects.select_related('category', 'subcategory'), quiz_document),
+		(Question.objects.only('id', 'quiz_id', 'text'), question_document),
+		(Category.objects.all(), category_document),
+		(Subcategory.objects.all(), subcategory_document),
+	]
+	count = 0
+	for queryset, document in sources:
+		batch = []
+		for obj in queryset.order_by('pk').iterator(chunk_size=batch_size):
+			batch.append(document(obj))
+			if len(batch) >= batch_size:
+				index_documents(batch)
+				count += len(batch)
+				batch = []
+		index_documents(batch)
+		count += len(batch)
+	return count
+
+
+# Queries -------------------------------------------------------------------
+
+def matching_ids(kind: str, query: str) -> RawSQL:
+	"""Subquery of ``kind`` ids matching ``query``, for ``filter(<field>__in=...)`` (FTS only)."""
+	return RawSQL(
+		f'SELECT object_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND kind = %s',
+		[match_expression(query), kind],
+	)
+
+
+def filter_quizzes(queryset, query: str, prefix: str = ''):
+	"""Restrict ``queryset`` to quizzes matching by title, description or category names.
+
+	``prefix`` is the lookup path to the quiz, e.g. ``'quiz__'`` for attempts.
+	"""
+	if fts_available():
+		if not match_expression(query):
+			return queryset.none()
+		return queryset.filter(**{f'{prefix}id__in': matching_ids('quiz', query)})
+	return queryset.filter(
+		Q(**{f'{prefix}title__icontains': query})
+		| Q(**{f'{prefix}subcategory__name__icontains': query})
+		| Q(**{f'{prefix}category__name__icontains': query})
+	)
+
+
+def filter_subcategories(queryset, query: str):
+	if fts_available():
+		if not match_expression(query):
+			return queryset.none()
+		return queryset.filter(id__in=matching_ids('subcategory', query))
+	return queryset.filter(name__icontains=query)
+
+
+def search(query: str, kinds=KINDS, limit: int = SEARCH_LIMIT) -> list:
+	"""Best ``limit`` matches as dicts (kind, id, quiz_id, title, snippet), most relevant first.
+
+	Questions and quizzes are only returned for published quizzes.
+	"""
+	from .models import Category, Question, Quiz, Subcategory
+
+	kinds = [k for k in kinds if k in KINDS]
+	if not kinds:
+		return []
+	if fts_available():
+		expression = match_expression(query)
+		if not expression:
+			return []
+		placeholders = ', '.join(['%s'] * len(kinds))
+		sql = (
+			f'SELECT kind, object_id, quiz_id, title, snippet({FTS_TABLE}, 4, \'\', \'\', \'…\', 12) '
+			f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND kind IN ({placeholders}) '
+			f'AND (quiz_id IS NULL OR quiz_id IN (SELECT id FROM {connection.ops.quote_name(Quiz._meta.db_table)} WHERE is_published)) '
+			f'ORDER BY rank LIMIT %s'
+		)
+		with connection.cursor() as cursor:
+			cursor.execute(sql, [expression, *kinds, limit])
+			return [
+				{'kind': kind, 'id': pk, 'quiz_id': quiz_id, 'title': title, 'snippet': snippet}
+				for kind, pk, quiz_id, title, snippet in cursor.fetchall()
+			]
+
+	query = (query or '').strip()
+	if not query:
+		return []
+	results = []
+	if 'quiz' in kinds:
+		for quiz in filter_quizzes(Quiz.objects.filter(is_published=True), query)[:limit]:
+			results.append({'kind': 'quiz', 'id': quiz.pk, 'quiz_id': quiz.pk, 'title': quiz.title, 'snippet': quiz.description[:120]})
+	if 'question' in kinds:
+		for question in Question.objects.filter(quiz__is_published=True, text__icontains=query)[:limit]:
+			results.append({'kind': 'question', 'id': question.pk, 'quiz_id': question.quiz_id, 'title': '', 'snippet': question.text[:120]})
+	if 'category' in kinds:
+		for category in Category.objects.filter(name__icontains=query)[:limit]:
+			results.append({'kind': 'category', 'id': category.pk, 'quiz_id': None, 'title': category.name, 'snippet': category.description[:120]})
+	if 'subcategory' in kinds:
+		for subcategory in filter_subcategories(Subcategory.objects.all(), query)[:limit]:
+			results.append({'kind': 'subcategory', 'id': subcategory.pk, 'quiz_id': None, 'title': subcategory.name, 'snippet': subcategory.description[:120]})
+	return results[:limit]
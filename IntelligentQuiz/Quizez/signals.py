@@ -0,0 +1,167 @@
+from django.apps import apps
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import search, taxonomy
+
+# Sent with ``attempt=<Attempt>`` from inside the transaction that finalizes an attempt.
+# Receivers keep read models (leaderboards, stats) in step with the attempt row, so a
+# failing receiver rolls the completion back with it.
+attempt_completed = Signal()
+
+
+# QuizCard read model upkeep. Models are resolved lazily because models.py imports this module.
+
+def _quiz_card():
+	return apps.get_model('Quizez', 'QuizCard')
+
+
+@receiver(post_save, sender='Quizez.Quiz')
+def sync_quiz_card(sender, instance, **kwargs):
+	"""Create the card for a new quiz and keep its category names in step with the quiz."""
+	_quiz_card().objects.update_or_create(quiz=instance, defaults={
+		'category_name': instance.category.name if instance.category_id else '',
+		'subcategory_name': instance.subcategory.name if instance.subcategory_id else '',
+	})
+
+
+@receiver(post_save, sender='Quizez.Category')
+def rename_category_on_cards(sender, instance, created, **kwargs):
+	if not created:
+		_quiz_card().objects.filter(quiz__category=instance).update(category_name=instance.name, updated_at=timezone.now())
+
+
+@receiver(post_save, sender='Quizez.Subcategory')
+def rename_subcategory_on_cards(sender, instance, created, **kwargs):
+	if not created:
+		_quiz_card().objects.filter(quiz__subcategory=instance).update(subcategory_name=instance.name, updated_at=timezone.now())
+
+
+@receiver(post_save, sender='Quizez.Question')
+def count_added_question(sender, instance, created, **kwargs):
+	if created:
+		_quiz_card().bump(instance.quiz_id, question_count=1)
+
+
+@receiver(post_delete, sender='Quizez.Question')
+def count_removed_question(sender, instance, **kwargs):
+	# Recount: a cascading quiz delete also removes the card, so there may be nothing to update
+	QuizCard = _quiz_card()
+	QuizCard.objects.filter(quiz_id=instance.quiz_id).update(
+		question_count=apps.get_model('Quizez', 'Question').objects.filter(quiz_id=instance.quiz_id).count(),
+		updated_at=timezone.now(),
+	)
+
+
+@receiver(post_save, sender='Quizez.Attempt')
+def count_started_attempt(sender, instance, created, **kwargs):
+	if created:
+		_quiz_card().bump(instance.quiz_id, attempt_count=1)
+
+
+@receiver(attempt_completed)
+def count_completed_attempt(sender, attempt, **kwargs):
+	_quiz_card().bump(attempt.quiz_id, completion_count=1, percent_total=attempt.percent)
+
+
+@receiver(attempt_completed)
+def store_result_document(sender, attempt, **kwargs):
+	"""Materialize the review shown by ``quiz_result`` (inside the completing transaction)."""
+	attempt.store_result()
+
+
+# Full-text search index upkeep (no-ops when the FTS5 table is unavailable)
+
+@receiver(post_save, sender='Quizez.Quiz')
+def index_quiz(sender, instance, **kwargs):
+	search.index_documents([search.quiz_document(instance)])
+
+
+@receiver(post_save, sender='Quizez.Question')
+def index_question(sender, instance, **kwargs):
+	search.index_documents([search.question_document(instance)])
+
+
+@receiver(post_save, sender='Quizez.Category')
+def index_category(sender, instance, created, **kwargs):
+	documents = [search.category_document(instance)]
+	if not created:
+		# Quiz documents carry their category name
+		quizzes = apps.get_model('Quizez', 'Quiz').objects.filter(category=instance).select_related('category', 'subcategory')
+		documents += [search.quiz_document(quiz) for quiz in quizzes.iterator()]
+	search.index_documents(documents)
+
+
+@receiver(post_save, sender='Quizez.Subcategory')
+def index_subcategory(sender, instance, created, **kwargs):
+	documents = [search.subcategory_document(instance)]
+	if not created:
+		quizzes = apps.get_model('Quizez', 'Quiz').objects.filter(subcategory=instance).select_related('category', 'subcategory')
+		documents += [search.quiz_document(quiz) for quiz in quizzes.iterator()]
+	search.index_documents(documents)
+
+
+@receiver(post_delete, sender='Quizez.Quiz')
+@receiver(post_delete, sender='Quizez.Question')
+@receiver(post_delete, sender='Quizez.Category')
+@receiver(post_delete, sender='Quizez.Subcategory')
+def unindex_document(sender, instance, **kwargs):
+	search.remove_document(sender._meta.model_name, instance.pk)
+
+
+# Category tree invalidation: taxonomy edits reload each worker's tree, quiz writes only its counts
+
+@receiver(post_save, sender='Quizez.Category')
+@receiver(post_delete, sender='Quizez.Category')
+@receiver(post_save, sender='Quizez.Subcategory')
+@receiver(post_delete, sender='Quizez.Subcategory')
+def invalidate_taxonomy(sender, **kwargs):
+	transaction.on_commit(taxonomy.bump_version)
+
+
+@receiver(post_save, sender='Quizez.Quiz')
+@receiver(post_delete, sender='Quizez.Quiz')
+def invalidate_quiz_counts(sender, **kwargs):
+	transaction.on_commit(taxonomy.bump_counts_version)
+
+
+@receiver(request_started)
+def expire_taxonomy_check(sender, **kwargs):
+	taxonomy.expire_check()
+
+
+# Compiled quiz snapshots are keyed by Quiz.content_version
+
+@receiver(post_save, sender='Quizez.Question')
+@receiver(post_delete, sender='Quizez.Question')
+def bump_quiz_content_version(sender, instance, **kwargs):
+	apps.get_model('Quizez', 'Quiz').bump_content_version(instance.quiz_id)
+
+
+@receiver(post_save, sender='Quizez.Choice')
+@receiver(post_delete, sender='Quizez.Choice')
+def bump_quiz_content_version_for_choice(sender, instance, **kwargs):
+	quiz_id = apps.get_model('Quizez', 'Question').objects.filter(pk=instance.question_id).values('quiz_id')[:1]
+	apps.get_model('Quizez', 'Quiz').bump_content_version(Subquery(quiz_id))
+
+
+# Question.correct_choice follows the choice marked correct (at most one, see Choice.Meta);
+# deleting that choice clears it through on_delete=SET_NULL
+
+@receiver(post_save, sender='Quizez.Choice')
+def sync_correct_choice(sender, instance, **kwargs):
+	questions = apps.get_model('Quizez', 'Question').objects.filter(pk=instance.question_id)
+	# Keep a question instance held by the caller (``Choice(question=q)``) in step too
+	question = instance.question if sender.question.is_cached(instance) else None
+	if instance.is_correct:
+		questions.update(correct_choice=instance.pk)
+		if question is not None:
+			question.correct_choice_id = instance.pk
+	else:
+		questions.filter(correct_choice=instance.pk).update(correct_choice=None)
+		if question is not None and question.correct_choice_id == instance.pk:
+			question.correct_choice_id = None
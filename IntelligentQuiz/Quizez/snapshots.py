@@ -0,0 +1,112 @@
+"""Immutable compiled quiz snapshots for the question-by-question session.
+
+A snapshot holds everything ``quiz_session`` needs to show and score a quiz: the
+ordered questions with their text, image URL, points, choices and correct choice id.
+It is keyed by ``(quiz id, created_at, Quiz.content_version)``; the version is bumped by the
+question/choice receivers in ``Quizez.signals``, so a stale snapshot is simply never
+looked up again. Snapshots live in a bounded per-process LRU in front of the shared
+cache, so a warm worker serves quiz content without touching the database.
+"""
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from django.core.cache import cache
+
+SNAPSHOT_LRU_SIZE = 256
+SNAPSHOT_TTL = 60 * 60 * 24
+
+
+class ChoiceSnapshot(NamedTuple):
+	id: int
+	text: str
+
+
+class QuestionSnapshot(NamedTuple):
+	id: int
+	text: str
+	image_url: str
+	question_type: str
+	points: int
+	choices: tuple
+	correct_choice_id: Optional[int]
+
+	def choice(self, choice_id) -> Optional[ChoiceSnapshot]:
+		"""The choice with ``choice_id`` (any int-like) if it belongs to this question."""
+		try:
+			choice_id = int(choice_id)
+		except (TypeError, ValueError):
+			return None
+		return next((c for c in self.choices if c.id == choice_id), None)
+
+
+class QuizSnapshot(NamedTuple):
+	quiz_id: int
+	version: int
+	questions: tuple
+
+	def __len__(self) -> int:
+		return len(self.questions)
+
+
+class _LRU:
+	def __init__(self, maxsize: int):
+		self.maxsize = maxsize
+		self._data = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key):
+		with self._lock:
+			value = self._data.get(key)
+			if value is not None:
+				self._data.move_to_end(key)
+			return value
+
+	def set(self, key, value) -> None:
+		with self._lock:
+			self._data[key] = value
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+
+
+_local = _LRU(SNAPSHOT_LRU_SIZE)
+
+
+def compile_snapshot(quiz) -> QuizSnapshot:
+	"""Build a snapshot from the database (two queries)."""
+	questions = []
+	for q in quiz.questions.prefetch_related('choices').order_by('id'):
+		choices = sorted(q.choices.all(), key=lambda c: c.id)
+		questions.append(QuestionSnapshot(
+			id=q.id,
+			text=q.text,
+			image_url=q.image.url if q.image else '',
+			question_type=q.question_type,
+			points=q.points,
+			choices=tuple(ChoiceSnapshot(c.id, c.text) for c in choices),
+			correct_choice_id=q.correct_choice_id,
+		))
+	return QuizSnapshot(quiz.id, quiz.content_version, tuple(questions))
+
+
+def get_snapshot(quiz) -> QuizSnapshot:
+	"""The snapshot for ``quiz`` at its current ``content_version``: local LRU, then shared cache, then DB."""
+	# created_at guards against a reused primary key (e.g. a rolled-back test database)
+	key = f'quiz:snapshot:{quiz.id}:{quiz.created_at.timestamp()}:{quiz.content_version}'
+	snapshot = _local.get(key)
+	if snapshot is None:
+		snapshot = cache.get(key)
+		if snapshot is None:
+			snapshot = compile_snapshot(quiz)
+			cache.set(key, snapshot, timeout=SNAPSHOT_TTL)
+		_local.set(key, snapshot)
+	return snapshot
+
+
+def clear_local() -> None:
+	_local.clear()
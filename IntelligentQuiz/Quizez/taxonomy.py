@@ -0,0 +1,177 @@
+"""Process-local category → subcategory tree with published-quiz counts.
+
+The tree is a list of ``Category`` instances (annotated with ``quiz_count``), each with
+a ``children`` list of ``Subcategory`` instances (also annotated). Each worker process
+keeps its own copy, stamped with the two version numbers of the ``TaxonomyVersion`` row:
+
+* ``taxonomy`` is bumped when a Category or Subcategory is written; the worker then
+  reloads the structure from the database (a few times a month).
+* ``counts`` is bumped when a Quiz is written; the worker then fetches the published-quiz
+  counts, which are built once with one grouped query per level and shared through the
+  cache, and builds a new annotated tree.
+
+The stamps live in the database so that a bump reaches every worker even with the
+per-process LocMem cache (no ``REDIS_URL``). A worker reads them at most once per request
+(one primary-key query): the ``request_started`` receiver in ``Quizez.signals`` calls
+``expire_check()``. Outside requests the check runs once per thread.
+"""
+import copy
+import threading
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+COUNTS_TTL = 60 * 60 * 24
+
+_lock = threading.Lock()
+_request = threading.local()
+_local = {
+	'version': None,
+	'counts_version': None,
+	# Unannotated categories/subcategories, never handed out
+	'structure': [],
+	'tree': [],
+}
+
+
+def _seed() -> int:
+	# Microsecond clock: a restored or rolled-back row never repeats a version a worker still holds
+	return time.time_ns() // 1000
+
+
+def _read_versions():
+	from .models import TaxonomyVersion
+
+	versions = TaxonomyVersion.objects.filter(pk=1).values_list('taxonomy', 'counts').first()
+	if versions is None:
+		row, _ = TaxonomyVersion.objects.get_or_create(pk=1, defaults={'taxonomy': _seed(), 'counts': _seed()})
+		versions = (row.taxonomy, row.counts)
+	return versions
+
+
+def _bump(field: str) -> None:
+	from .models import TaxonomyVersion
+
+	if not TaxonomyVersion.objects.filter(pk=1).update(**{field: Greatest(F(field) + 1, _seed())}):
+		_read_versions()
+	_request.versions = None
+
+
+def bump_version() -> None:
+	"""Invalidate every worker's categories/subcategories (after a taxonomy edit)."""
+	_bump('taxonomy')
+
+
+def bump_counts_version() -> None:
+	"""Invalidate the published-quiz counts (after a quiz write)."""
+	_bump('counts')
+
+
+def shared_versions():
+	"""``(taxonomy_version, counts_version)`` from the ``TaxonomyVersion`` row, read once per request."""
+	versions = getattr(_request, 'versions', None)
+	if versions is None:
+		versions = _request.versions = _read_versions()
+	return versions
+
+
+def _load_structure() -> list:
+	from .models import Category, Subcategory
+
+	categories = list(Category.objects.order_by('id'))
+	by_id = {c.id: c for c in categories}
+	for category in categories:
+		category.children = []
+	for sub in Subcategory.objects.order_by('name'):
+		# Attach the parent so ``str(sub)`` and ``sub.category`` never query
+		sub.category = by_id[sub.category_id]
+		sub.category.children.append(sub)
+	return categories
+
+
+def _annotate(structure, counts) -> list:
+	"""A new tree of copies of ``structure`` with ``quiz_count`` set from ``counts``."""
+	tree = []
+	for node in structure:
+		category = copy.copy(node)
+		category.quiz_count = counts.get(('category', category.id), 0)
+		category.children = []
+		for child in node.children:
+			sub = copy.copy(child)
+			sub.category = category
+			sub.quiz_count = counts.get(('subcategory', sub.id), 0)
+			category.children.append(sub)
+		tree.append(category)
+	return tree
+
+
+def build_counts() -> dict:
+	"""Published-quiz counts keyed by ``('category' | 'subcategory', id)``."""
+	from .models import Quiz
+
+	published = Quiz.objects.filter(is_published=True).order_by()
+	counts = {}
+	for field in ('category', 'subcategory'):
+		rows = published.filter(**{f'{field}__isnull': False}).values_list(f'{field}_id').annotate(n=Count('id'))
+		counts.update({(field, pk): n for pk, n in rows})
+	return counts
+
+
+def _shared_counts(counts_version) -> dict:
+	key = f'taxonomy:counts:{counts_version}'
+	counts = cache.get(key)
+	if counts is None:
+		counts = build_counts()
+		cache.set(key, counts, timeout=COUNTS_TTL)
+	return counts
+
+
+def refresh() -> list:
+	"""Compare the local stamps with the shared ones and rebuild whatever changed.
+
+	The tree is replaced, never updated in place, so threads still rendering the previous
+	one are unaffected.
+	"""
+	version, counts_version = shared_versions()
+	if version == _local['version'] and counts_version == _local['counts_version']:
+		return _local['tree']
+	with _lock:
+		structure = _local['structure']
+		if version != _local['version']:
+			structure = _load_structure()
+		tree = _annotate(structure, _shared_counts(counts_version))
+		_local.update(version=version, counts_version=counts_version, structure=structure, tree=tree)
+	return tree
+
+
+def expire_check() -> None:
+	"""Make the next ``category_tree()`` call on this thread re-check the shared versions."""
+	_request.checked = False
+	_request.versions = None
+
+
+def category_tree() -> list:
+	"""Every category (id order) with its subcategories (name order) and published-quiz counts.
+
+	The returned instances are shared by the whole process: read them, never mutate them.
+	"""
+	if not getattr(_request, 'checked', False):
+		_request.checked = True
+		return refresh()
+	return _local['tree']
+
+
+def get_category(slug: str):
+	"""The tree node for ``slug``, or None."""
+	return next((c for c in category_tree() if c.slug == slug), None)
+
+
+def get_subcategory(category, subcategory_id):
+	"""The child of ``category`` with ``subcategory_id`` (any int-like), or None."""
+	try:
+		subcategory_id = int(subcategory_id)
+	except (TypeError, ValueError):
+		return None
+	return next((s for s in category.children if s.id == subcategory_id), None)
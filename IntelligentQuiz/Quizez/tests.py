@@ -1,3 +1,627 @@
+import os
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import search, snapshots, taxonomy
+from .models import Answer, Attempt, Category, Choice, Question, Quiz, QuizCard, Subcategory, TaxonomyVersion
+
+
+def make_quiz(title, points=(1, 1, 1), category=None):
+	"""A published quiz with one question per entry of ``points``, each with a right and a wrong choice."""
+	quiz = Quiz(title=title, category=category, is_published=False)
+	quiz.save()
+	for i, value in enumerate(points):
+		question = Question.objects.create(quiz=quiz, text=f'{title} {i}', points=value)
+		Choice.objects.create(question=question, text='right', is_correct=True)
+		Choice.objects.create(question=question, text='wrong')
+	quiz.is_published = True
+	quiz.status = Quiz.STATUS_ACTIVE
+	quiz.save()
+	return quiz
+
+
+def complete_attempt(user, quiz, correct, time_taken=60):
+	"""Answer question ``i`` of ``quiz`` rightly or wrongly per ``correct[i]`` (None skips it) and complete the attempt."""
+	attempt = Attempt.objects.create(user=user, quiz=quiz, total=len(correct))
+	for question, ok in zip(quiz.questions.order_by('id'), correct):
+		if ok is not None:
+			Answer.objects.create(attempt=attempt, question=question, selected_choice=question.choices.get(is_correct=ok))
+	attempt.complete(time_taken=time_taken)
+	return attempt
+
+
+class ConditionalGetTests(TestCase):
+	"""Catalog and result pages answer revalidation with 304 without rendering."""
+
+	def setUp(self):
+		cache.clear()
+		self.category = Category.objects.create(name='Science')
+		self.subcategory = Subcategory.objects.create(category=self.category, name='Physics')
+		self.quiz = Quiz(title='Forces', category=self.category, subcategory=self.subcategory, is_published=False)
+		self.quiz.save()
+		for i in range(3):
+			question = Question.objects.create(quiz=self.quiz, text=f'Question {i}')
+			Choice.objects.create(question=question, text='right', is_correct=True)
+			Choice.objects.create(question=question, text='wrong')
+		self.quiz.is_published = True
+		self.quiz.status = Quiz.STATUS_ACTIVE
+		self.quiz.save()
+		self.user = User.objects.create_user('alice', password='pw')
+		self.client.force_login(self.user)
+
+	def assertRevalidates(self, url, max_queries):
+		first = self.client.get(url)
+		self.assertEqual(first.status_code, 200)
+		self.assertTrue(first.has_header('ETag'))
+		# Session + user lookups plus the cheap validator queries; no page queries, no template
+		with self.assertNumQueries(max_queries):
+			second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+		self.assertEqual(second.status_code, 304)
+		self.assertEqual(second.templates, [])
+		return first
+
+	def test_quiz_list_304(self):
+		first = self.assertRevalidates(reverse('quiz_list'), 5)
+		self.assertTrue(first.has_header('Last-Modified'))
+
+	def test_quiz_list_etag_changes_with_attempts(self):
+		first = self.client.get(reverse('quiz_list'))
+		Attempt.objects.create(user=self.user, quiz=self.quiz, total=3)
+		second = self.client.get(reverse('quiz_list'), HTTP_IF_NONE_MATCH=first['ETag'])
+		self.assertEqual(second.status_code, 200)
+
+	def test_quiz_list_etag_changes_when_another_user_completes(self):
+		# The card's play count and average change, though none of the viewer's rows do
+		other = Attempt.objects.create(user=User.objects.create_user('bob', password='pw'), quiz=self.quiz, total=3)
+		first = self.client.get(reverse('quiz_list'))
+		other.complete(time_taken=30)
+		second = self.client.get(reverse('quiz_list'), HTTP_IF_NONE_MATCH=first['ETag'])
+		self.assertEqual(second.status_code, 200)
+
+	def test_subcategory_select_304(self):
+		self.assertRevalidates(reverse('subcategory_select', args=[self.category.slug]), 3)
+
+	def test_completed_result_304(self):
+		attempt = Attempt.objects.create(user=self.user, quiz=self.quiz, total=3)
+		attempt.complete(time_taken=30)
+		first = self.assertRevalidates(reverse('quiz_result', args=[attempt.id]), 3)
+		second = self.client.get(reverse('quiz_result', args=[attempt.id]), HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+		self.assertEqual(second.status_code, 304)
+
+	def test_ongoing_result_is_always_rendered(self):
+		attempt = Attempt.objects.create(user=self.user, quiz=self.quiz, total=3)
+		first = self.client.get(reverse('quiz_result', args=[attempt.id]))
+		self.assertEqual(first.status_code, 200)
+		self.assertFalse(first.has_header('ETag'))
+
+
+class FinalizeExpiredTests(TestCase):
+	"""The sweeper completes attempts past their deadline as if each had been submitted."""
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user('alice', password='pw')
+		self.category = Category.objects.create(name='History')
+
+	def expired_attempt(self, quiz, minutes_ago=5):
+		attempt = Attempt.objects.create(user=self.user, quiz=quiz)
+		Attempt.objects.filter(pk=attempt.pk).update(
+			started_at=timezone.now() - timedelta(minutes=minutes_ago + 10),
+			expires_at=timezone.now() - timedelta(minutes=minutes_ago),
+		)
+		return attempt
+
+	def test_receivers_see_only_earlier_completions(self):
+		from dashboard.models import QuizPeerCounts
+		from users.models import UserStats
+
+		first = make_quiz('Rome', category=self.category)
+		second = make_quiz('Greece', category=self.category)
+		self.expired_attempt(first, minutes_ago=3)
+		self.expired_attempt(second, minutes_ago=2)
+		self.expired_attempt(first, minutes_ago=1)
+
+		self.assertEqual(Attempt.finalize_expired(), 3)
+		stats = UserStats.objects.get(user=self.user)
+		self.assertEqual((stats.total_attempts, stats.categories_count), (3, 1))
+		self.assertEqual(QuizPeerCounts.objects.get(quiz=first).completed_users, 1)
+		self.assertEqual(QuizPeerCounts.objects.get(quiz=second).completed_users, 1)
+		self.assertFalse(Attempt.objects.filter(is_completed=False).exists())
+
+	def test_scores_recorded_selections(self):
+		quiz = make_quiz('Weighted', points=(1, 3))
+		attempt = self.expired_attempt(quiz)
+		questions = list(quiz.questions.order_by('id'))
+		attempt.record_selection(1, questions[1].correct_choice_id)
+		attempt.save(update_fields=['answered_bits', 'selected_choices'])
+
+		self.assertEqual(Attempt.finalize_expired(), 1)
+		attempt.refresh_from_db()
+		self.assertEqual((attempt.correct_count, attempt.weighted_score, attempt.max_score, attempt.percent), (1, 3, 4, 75))
+		self.assertEqual(attempt.time_taken, 600)
+		self.assertEqual(attempt.completed_at, attempt.expires_at)
+		self.assertEqual(attempt.total, 2)
+		self.assertEqual(Attempt.finalize_expired(), 0)
+
+	def test_attempt_completed_meanwhile_is_not_finalized_again(self):
+		from dashboard.models import LeaderboardEntry
+
+		quiz = make_quiz('Carthage')
+		attempt = self.expired_attempt(quiz)
+		rescore = Attempt.rescore
+
+		def completed_meanwhile(ids):
+			# Without row locks a submit can land between the batch read and the sweep's update
+			rescore(ids)
+			attempt.complete(time_taken=30)
+
+		with mock.patch.object(Attempt, 'rescore', side_effect=completed_meanwhile):
+			self.assertEqual(Attempt.finalize_expired(), 0)
+		attempt.refresh_from_db()
+		self.assertEqual(attempt.time_taken, 30)
+		self.assertEqual(LeaderboardEntry.objects.get(user=self.user).total_quizzes, 1)
+
+
+class QuizCardTests(TestCase):
+	"""Catalog cards follow question, attempt and category writes and can be rebuilt."""
+
+	CARD_FIELDS = ('quiz_id', 'question_count', 'attempt_count', 'completion_count', 'percent_total', 'category_name', 'subcategory_name')
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user('alice', password='pw')
+		self.category = Category.objects.create(name='Science')
+		self.quiz = make_quiz('Forces', category=self.category)
+
+	def card(self):
+		return QuizCard.objects.get(quiz=self.quiz)
+
+	def test_question_writes_update_the_count(self):
+		self.assertEqual(self.card().question_count, 3)
+		Question.objects.create(quiz=self.quiz, text='Extra')
+		self.assertEqual(self.card().question_count, 4)
+		self.quiz.questions.first().delete()
+		self.assertEqual(self.card().question_count, 3)
+
+	def test_attempts_update_the_counters(self):
+		complete_attempt(self.user, self.quiz, (True, True, False))
+		complete_attempt(self.user, self.quiz, (True, True, True))
+		Attempt.objects.create(user=self.user, quiz=self.quiz)
+		card = self.card()
+		self.assertEqual((card.attempt_count, card.completion_count, card.percent_total), (3, 2, 167))
+		self.assertEqual(card.avg_percent, 83.5)
+
+	def test_renames_reach_the_cards(self):
+		subcategory = Subcategory.objects.create(category=self.category, name='Physics')
+		self.quiz.subcategory = subcategory
+		self.quiz.save()
+		self.category.name = 'Natural Science'
+		self.category.save()
+		subcategory.name = 'Mechanics'
+		subcategory.save()
+		self.assertEqual((self.card().category_name, self.card().subcategory_name), ('Natural Science', 'Mechanics'))
+
+	def test_rebuild_matches_the_incremental_cards(self):
+		complete_attempt(self.user, self.quiz, (True, False, False))
+		Attempt.objects.create(user=self.user, quiz=self.quiz)
+		make_quiz('Optics')
+		incremental = list(QuizCard.objects.order_by('quiz_id').values(*self.CARD_FIELDS))
+		QuizCard.objects.all().delete()
+		call_command('rebuild_quiz_cards', stdout=StringIO())
+		self.assertEqual(list(QuizCard.objects.order_by('quiz_id').values(*self.CARD_FIELDS)), incremental)
+
+	def test_quiz_list_reads_the_cards(self):
+		complete_attempt(self.user, self.quiz, (True, True, False))
+		response = self.client.get(reverse('quiz_list'))
+		quiz = response.context['quizzes'][0]
+		with self.assertNumQueries(0):
+			self.assertEqual((quiz.card.question_count, quiz.card.completion_count, quiz.card.category_name), (3, 1, 'Science'))
+
+
+class SearchTests(TestCase):
+	"""Search finds published content by word prefix, through FTS5 or the icontains fallback."""
+
+	def setUp(self):
+		cache.clear()
+		self.category = Category.objects.create(name='Astronomy', description='Stars and planets')
+		self.subcategory = Subcategory.objects.create(category=self.category, name='Planets')
+		self.quiz = make_quiz('Solar system', category=self.category)
+		self.quiz.subcategory = self.subcategory
+		self.quiz.save()
+		Question.objects.create(quiz=self.quiz, text='Which planet is largest?')
+		self.draft = make_quiz('Solar wind', category=self.category)
+		Quiz.objects.filter(pk=self.draft.pk).update(is_published=False)
+
+	def found(self, query, **kwargs):
+		return {(r['kind'], r['id']) for r in search.search(query, **kwargs)}
+
+	def check_search(self):
+		self.assertEqual(self.found('solar', kinds=['quiz']), {('quiz', self.quiz.pk)})
+		self.assertEqual(self.found('planet', kinds=['question', 'subcategory']), {
+			('question', self.quiz.questions.get(text__startswith='Which').pk),
+			('subcategory', self.subcategory.pk),
+		})
+		self.assertEqual(self.found('Astronomy', kinds=['category']), {('category', self.category.pk)})
+		self.assertEqual(self.found('   '), set())
+		self.assertEqual(self.found('solar', kinds=['nonsense']), set())
+		quizzes = search.filter_quizzes(Quiz.objects.all(), 'planets')
+		self.assertEqual(set(quizzes), {self.quiz})
+
+	def test_full_text_search(self):
+		if not search.fts_available():
+			self.skipTest('SQLite build without FTS5')
+		self.check_search()
+		# Prefix match on the last word only, and removed documents are gone
+		self.assertEqual(self.found('sol', kinds=['quiz']), {('quiz', self.quiz.pk)})
+		self.subcategory.delete()
+		self.assertEqual(self.found('planet', kinds=['subcategory']), set())
+
+	def test_fallback_without_fts(self):
+		with mock.patch.object(search, '_available', False):
+			self.check_search()
+
+	def test_search_view(self):
+		response = self.client.get(reverse('quiz_search'), {'q': 'solar', 'kind': 'quiz', 'limit': 'x'})
+		self.assertEqual([r['id'] for r in response.json()['results']], [self.quiz.pk])
+
+
+class CorrectChoiceTests(TestCase):
+	"""Question.correct_choice follows the choice marked correct as choices are saved and deleted."""
+
+	def setUp(self):
+		self.quiz = make_quiz('Forces', points=(1,))
+		self.question = self.quiz.questions.get()
+		self.right = self.question.choices.get(is_correct=True)
+		self.wrong = self.question.choices.get(is_correct=False)
+
+	def correct_choice_id(self):
+		return Question.objects.values_list('correct_choice_id', flat=True).get(pk=self.question.pk)
+
+	def test_follows_the_correct_choice(self):
+		self.assertEqual(self.correct_choice_id(), self.right.pk)
+		self.right.is_correct = False
+		self.right.save()
+		self.assertIsNone(self.correct_choice_id())
+		self.wrong.is_correct = True
+		self.wrong.save()
+		self.assertEqual(self.correct_choice_id(), self.wrong.pk)
+		# Unmarking another choice leaves it alone
+		self.right.save()
+		self.assertEqual(self.correct_choice_id(), self.wrong.pk)
+
+	def test_deleting_the_correct_choice_clears_it(self):
+		self.right.delete()
+		self.assertIsNone(self.correct_choice_id())
+
+	def test_caller_instance_is_kept_in_step(self):
+		question = Question.objects.create(quiz=self.quiz, text='New')
+		choice = Choice.objects.create(question=question, text='yes', is_correct=True)
+		self.assertEqual(question.correct_choice_id, choice.pk)
+		choice.is_correct = False
+		choice.save()
+		self.assertIsNone(question.correct_choice_id)
+
+
+class SnapshotTests(TestCase):
+	"""Compiled snapshots are immutable, shared between lookups and replaced on content edits."""
+
+	def setUp(self):
+		cache.clear()
+		snapshots.clear_local()
+		self.quiz = make_quiz('Forces', points=(1, 2))
+
+	def test_snapshot_is_immutable_and_reused(self):
+		snapshot = snapshots.get_snapshot(self.quiz)
+		self.assertEqual([(q.points, len(q.choices)) for q in snapshot.questions], [(1, 2), (2, 2)])
+		question = snapshot.questions[0]
+		self.assertEqual(question.choice(str(question.correct_choice_id)).text, 'right')
+		self.assertIsNone(question.choice(snapshot.questions[1].choices[0].id))
+		with self.assertRaises(AttributeError):
+			question.text = 'Changed'
+		with self.assertNumQueries(0):
+			self.assertIs(snapshots.get_snapshot(self.quiz), snapshot)
+		# Another worker: empty local LRU, warm shared cache
+		snapshots.clear_local()
+		with self.assertNumQueries(0):
+			self.assertEqual(snapshots.get_snapshot(self.quiz), snapshot)
+
+	def test_content_edits_compile_a_new_snapshot(self):
+		before = snapshots.get_snapshot(self.quiz)
+		Question.objects.create(quiz=self.quiz, text='Added')
+		self.quiz.refresh_from_db()
+		after = snapshots.get_snapshot(self.quiz)
+		self.assertEqual((len(before), len(after)), (2, 3))
+		self.assertGreater(after.version, before.version)
+
+		Choice.objects.filter(question=after.questions[0].id, is_correct=False).get().delete()
+		self.quiz.refresh_from_db()
+		self.assertEqual(len(snapshots.get_snapshot(self.quiz).questions[0].choices), 1)
+		self.assertEqual(len(after.questions[0].choices), 2)
+
+	def test_local_cache_is_bounded(self):
+		lru = snapshots._LRU(2)
+		for key in 'abc':
+			lru.set(key, key.upper())
+		self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (None, 'B', 'C'))
+
+
+class TaxonomyTests(TestCase):
+	"""The process-local category tree follows version stamps kept in the database."""
+
+	def setUp(self):
+		cache.clear()
+		self.category = Category.objects.create(name='Arts')
+		make_quiz('Painting', category=self.category)
+		taxonomy.expire_check()
+
+	def test_bump_from_another_worker_is_seen(self):
+		self.assertEqual(taxonomy.get_category(self.category.slug).name, 'Arts')
+		# Another worker's edit: the row changes, this process's cache does not
+		Category.objects.filter(pk=self.category.pk).update(name='Fine Arts')
+		TaxonomyVersion.objects.filter(pk=1).update(taxonomy=F('taxonomy') + 1)
+		taxonomy.expire_check()
+		self.assertEqual(taxonomy.get_category(self.category.slug).name, 'Fine Arts')
+
+	def test_refresh_builds_a_new_tree(self):
+		before = taxonomy.get_category(self.category.slug)
+		self.assertEqual(before.quiz_count, 1)
+		make_quiz('Sculpture', category=self.category)
+		taxonomy.bump_counts_version()
+		taxonomy.expire_check()
+		after = taxonomy.get_category(self.category.slug)
+		self.assertEqual((before.quiz_count, after.quiz_count), (1, 2))
+		self.assertIsNot(before, after)
+
+	def test_counts_published_quizzes_per_subcategory(self):
+		physics = Subcategory.objects.create(category=self.category, name='Physics')
+		music = Subcategory.objects.create(category=self.category, name='Music')
+		for title, subcategory in (('Forces', physics), ('Optics', physics), ('Scales', music), ('Draft', music)):
+			quiz = make_quiz(title, category=self.category)
+			quiz.subcategory = subcategory
+			quiz.is_published = title != 'Draft'
+			quiz.save()
+		taxonomy.expire_check()
+		category = taxonomy.get_category(self.category.slug)
+		self.assertEqual(category.quiz_count, 4)
+		self.assertEqual([(s.name, s.quiz_count) for s in category.children], [('Music', 1), ('Physics', 2)])
+		self.assertIs(taxonomy.get_subcategory(category, str(physics.pk)), category.children[1])
+		self.assertIsNone(taxonomy.get_subcategory(category, 'x'))
+
+		response = self.client.get(reverse('subcategory_select', args=[self.category.slug]))
+		self.assertEqual([(s.name, s.quiz_count) for s in response.context['subcategories']], [('Music', 1), ('Physics', 2)])
+
+
+class SessionTests(TestCase):
+	"""Only opening the session page starts an attempt; the JSON API never does."""
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user('alice', password='pw')
+		self.client.force_login(self.user)
+		self.quiz = make_quiz('Forces')
+		self.page = reverse('quiz_session', args=[self.quiz.id])
+		self.api = reverse('quiz_session_api', args=[self.quiz.id])
+
+	def test_requests_after_completion_return_the_result(self):
+		self.client.get(self.page)
+		attempt = Attempt.objects.get(user=self.user)
+		self.assertTrue(self.client.post(self.api, {'q': 2, 'nav': 'submit'}).json()['done'])
+		result_url = reverse('quiz_result', args=[attempt.id])
+
+		# The page-load prefetch and a repeated submit, through the API and the form
+		for response in (self.client.get(self.api, {'q': 0}), self.client.post(self.api, {'q': 2, 'nav': 'submit'})):
+			self.assertEqual(response.json(), {'ok': True, 'done': True, 'timed_out': False, 'redirect': result_url})
+		self.assertRedirects(self.client.post(self.page, {'q': 2, 'nav': 'submit'}), result_url)
+		self.assertEqual(Attempt.objects.filter(user=self.user).count(), 1)
+
+		# Opening the page again is an explicit retry
+		self.client.get(self.page)
+		self.assertEqual(Attempt.objects.filter(user=self.user, is_completed=False).count(), 1)
+
+	def test_api_without_an_attempt_does_not_start_one(self):
+		self.assertEqual(self.client.get(self.api, {'q': 0}).status_code, 409)
+		self.assertFalse(Attempt.objects.exists())
+
+	def test_selections_are_buffered_on_the_attempt_until_submit(self):
+		self.client.get(self.page)
+		attempt = Attempt.objects.get(user=self.user)
+		right, wrong = [], []
+		for question in self.quiz.questions.order_by('id'):
+			right.append(question.correct_choice_id)
+			wrong.append(question.choices.exclude(pk=question.correct_choice_id).get().id)
+
+		self.client.post(self.page + '?q=0', {'choice': wrong[0], 'nav': 'next'})
+		payload = self.client.post(self.api, {'q': 1, 'choice': right[1], 'to': 0}).json()
+		self.assertEqual(payload['answered'], [True, True, False])
+		self.assertEqual((payload['question']['index'], payload['question']['selected_id']), (0, wrong[0]))
+		# Changing an answer overwrites the recorded selection
+		self.client.post(self.api, {'q': 0, 'choice': right[0], 'nav': 'skip'})
+		attempt.refresh_from_db()
+		self.assertEqual((attempt.current_index, attempt.answered_count), (1, 2))
+		self.assertEqual(attempt.selected_choices, [right[0], right[1]])
+		self.assertFalse(Answer.objects.exists())
+
+		self.client.post(self.api, {'q': 2, 'nav': 'submit'})
+		attempt.refresh_from_db()
+		self.assertEqual(
+			sorted(attempt.answers.values_list('selected_choice_id', 'is_correct_cached')),
+			sorted([(right[0], True), (right[1], True)]),
+		)
+		self.assertEqual((attempt.is_completed, attempt.correct_count, attempt.percent), (True, 2, 67))
+
+
+class TakeQuizTests(TestCase):
+	"""The one-page form is scored against the snapshot and saved in one batch."""
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user('alice', password='pw')
+		self.client.force_login(self.user)
+		self.quiz = make_quiz('Forces', points=(1, 2, 3, 4))
+		self.questions = list(self.quiz.questions.order_by('id'))
+
+	def wrong(self, question):
+		return question.choices.exclude(pk=question.correct_choice_id).get().id
+
+	def test_submission_is_scored_and_completed(self):
+		q = self.questions
+		response = self.client.post(reverse('take_quiz', args=[self.quiz.id]), {
+			f'question_{q[0].id}': q[0].correct_choice_id,
+			f'question_{q[1].id}': self.wrong(q[1]),
+			# A choice of another question does not count as an answer
+			f'question_{q[2].id}': q[3].correct_choice_id,
+			f'question_{q[3].id}': q[3].correct_choice_id,
+		})
+		attempt = Attempt.objects.get(user=self.user)
+		self.assertRedirects(response, reverse('quiz_result', args=[attempt.id]))
+		self.assertEqual(
+			list(attempt.answers.order_by('question_id').values_list('selected_choice_id', 'is_correct_cached')),
+			[(q[0].correct_choice_id, True), (self.wrong(q[1]), False), (None, False), (q[3].correct_choice_id, True)],
+		)
+		self.assertEqual(
+			(attempt.is_completed, attempt.correct_count, attempt.weighted_score, attempt.max_score, attempt.percent),
+			(True, 2, 5, 10, 50),
+		)
+		self.assertEqual(len(attempt.result['items']), 4)
+
+	def test_get_shows_the_form(self):
+		response = self.client.get(reverse('take_quiz', args=[self.quiz.id]))
+		self.assertEqual(len(response.context['questions']), 4)
+		self.assertFalse(Attempt.objects.exists())
+
+
+class ResultDocumentTests(TestCase):
+	"""The result review is stored on completion, rebuilt by command, and built live for an attempt in progress."""
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user('alice', password='pw')
+		self.client.force_login(self.user)
+		self.quiz = make_quiz('Optics')
+		self.questions = list(self.quiz.questions.order_by('id'))
+
+	def test_ongoing_attempt_shows_recorded_selections(self):
+		attempt = Attempt.objects.create(user=self.user, quiz=self.quiz, total=3)
+		wrong = self.questions[1].choices.exclude(pk=self.questions[1].correct_choice_id).get()
+		attempt.record_selection(0, self.questions[0].correct_choice_id)
+		attempt.record_selection(1, wrong.id)
+		attempt.save(update_fields=['answered_bits', 'selected_choices'])
+
+		response = self.client.get(reverse('quiz_result', args=[attempt.id]))
+		items = response.context['review_items']
+		self.assertEqual([item['answered'] for item in items], [True, True, False])
+		self.assertEqual([item['is_correct'] for item in items], [True, False, False])
+		self.assertEqual(items[1]['selected_text'], 'wrong')
+		self.assertEqual(response.context['correct_count'], 1)
+		self.assertNotContains(response, 'class="explain-wrap"')
+
+	def test_completion_stores_the_document(self):
+		attempt = complete_attempt(self.user, self.quiz, (True, False, None), time_taken=75)
+		attempt.refresh_from_db()
+		self.assertEqual((attempt.result['correct_count'], attempt.result['time_taken']), (1, 75))
+		self.assertEqual([item['answered'] for item in attempt.result['items']], [True, True, False])
+		# Later edits to the quiz do not rewrite a finished attempt's review
+		self.questions[0].text = 'Edited'
+		self.questions[0].save()
+		response = self.client.get(reverse('quiz_result', args=[attempt.id]))
+		self.assertEqual(response.context['review_items'][0]['text'], 'Optics 0')
+		self.assertEqual(response.context['time_taken_display'], '01:15')
+
+	def test_rebuild_command_stores_missing_documents(self):
+		stored = complete_attempt(self.user, self.quiz, (True, True, True))
+		missing = complete_attempt(self.user, self.quiz, (False, None, None))
+		Attempt.objects.filter(pk=missing.pk).update(result=None)
+		Attempt.objects.filter(pk=stored.pk).update(result={'correct_count': 0, 'time_taken': 0, 'items': []})
+
+		out = StringIO()
+		call_command('rebuild_result_documents', stdout=out)
+		self.assertIn('Stored 1 result documents', out.getvalue())
+		missing.refresh_from_db()
+		self.assertEqual(len(missing.result['items']), 3)
+		self.assertEqual(Attempt.objects.get(pk=stored.pk).result['items'], [])
+
+		call_command('rebuild_result_documents', '--all', stdout=StringIO())
+		self.assertEqual(Attempt.objects.get(pk=stored.pk).result['correct_count'], 3)
+
+
+class ScoringTests(TestCase):
+	"""Weighted score columns: tally() in Python and rescore() in SQL agree, rounding included."""
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user('alice', password='pw')
+
+	def attempt_with(self, quiz, picks):
+		"""An attempt answering question n correctly (True), wrongly (False) or not at all (None)."""
+		attempt = Attempt.objects.create(user=self.user, quiz=quiz)
+		for question, pick in zip(quiz.questions.order_by('id'), picks):
+			if pick is None:
+				continue
+			choice = question.choices.get(is_correct=pick)
+			Answer.objects.create(attempt=attempt, question=question, selected_choice=choice, is_correct_cached=pick)
+		return attempt
+
+	def test_tally_weights_points_and_skips(self):
+		attempt = self.attempt_with(make_quiz('Weighted', points=(1, 2, 5, 2)), [True, False, True, None])
+		with self.assertNumQueries(1):
+			tally = attempt.tally()
+		self.assertEqual(tally, {
+			'questions': 4, 'answered': 3, 'correct_count': 2,
+			'weighted_score': 6, 'max_score': 10, 'percent': 60,
+		})
+		self.assertEqual(attempt.calculate_score(), 6)
+
+	def test_zero_max_score(self):
+		attempt = self.attempt_with(make_quiz('Unscored', points=(0, 0)), [True, True])
+		self.assertTrue(attempt.complete(time_taken=5))
+		self.assertEqual((attempt.correct_count, attempt.weighted_score, attempt.max_score, attempt.percent), (2, 0, 0, 0))
+		Attempt.rescore([attempt.pk])
+		attempt.refresh_from_db()
+		self.assertEqual((attempt.percent, attempt.score), (0, 0))
+		self.assertEqual(Attempt.percent_of(0, 0), 0)
+
+	def test_rescore_matches_complete(self):
+		cases = [
+			((1, 1, 1), [True, False, None], 33),
+			((1, 1, 1), [True, True, False], 67),
+			((1, 7), [True, False], 13),  # 12.5 rounds half up
+			((3, 5), [False, True], 63),  # 62.5
+			((1, 1), [True, None], 50),
+			((2, 2), [False, None], 0),
+		]
+		for points, picks, expected in cases:
+			quiz = make_quiz(f'Case {points} {picks}', points=points)
+			completed = self.attempt_with(quiz, picks)
+			rescored = self.attempt_with(quiz, picks)
+			completed.complete(time_taken=10)
+			Attempt.rescore([rescored.pk])
+			rescored.refresh_from_db()
+			columns = ('correct_count', 'weighted_score', 'max_score', 'percent', 'score')
+			self.assertEqual(
+				[getattr(rescored, c) for c in columns], [getattr(completed, c) for c in columns], (points, picks),
+			)
+			self.assertEqual(completed.percent, expected, (points, picks))
+			self.assertEqual(Attempt.percent_of(completed.weighted_score, completed.max_score), expected)
+
+	def test_backfill_converts_legacy_rows(self):
+		from dashboard.models import LeaderboardEntry
+		from users.models import UserStats
 
-# Create your tests here.
+		attempt = self.attempt_with(make_quiz('Legacy', points=(1, 3)), [False, True])
+		# A take_quiz row from before the score columns: raw correct count, columns unset
+		Attempt.objects.filter(pk=attempt.pk).update(is_completed=True, score=1, completed_at=timezone.now())
+		call_command('backfill_attempt_scores', batch_size=1, stdout=open(os.devnull, 'w'))
+		attempt.refresh_from_db()
+		self.assertEqual((attempt.correct_count, attempt.weighted_score, attempt.max_score, attempt.percent, attempt.score), (1, 3, 4, 75, 75))
+		entry = LeaderboardEntry.objects.get(user=self.user)
+		self.assertEqual((entry.total_score, entry.total_possible), (3, 4))
+		self.assertEqual(UserStats.objects.get(user=self.user).best_score, 75)
@@ -3,11 +3,14 @@ from . import views
 
 urlpatterns = [
     path('', views.quiz_list, name='quiz_list'),
+    path('items/', views.quiz_list_items, name='quiz_list_items'),
+    path('search/', views.quiz_search, name='quiz_search'),
     path('categories/<slug:category_slug>/', views.subcategory_select, name='subcategory_select'),
     path('categories/<slug:category_slug>/start/', views.start_quiz, name='start_quiz'),
     path('categories/<slug:category_slug>/generate-ai/', views.generate_ai_quiz, name='generate_ai_quiz'),
     # New session-based quiz taking (one question per page)
     path('<int:quiz_id>/session/', views.quiz_session, name='quiz_session'),
+    path('<int:quiz_id>/session/api/', views.quiz_session_api, name='quiz_session_api'),
     path('<int:quiz_id>/take/', views.take_quiz, name='take_quiz'),
     path('attempt/<int:attempt_id>/result/', views.quiz_result, name='quiz_result'),
     # AI explanations
@@ -1,44 +1,190 @@
+import hashlib
+from datetime import datetime
+
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
+from django.db.models import Max, Q
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib import messages
 from django.urls import reverse
 from django.utils import timezone
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.http import JsonResponse, HttpResponseNotAllowed
+from django.views.decorators.http import condition
+from django.http import Http404, JsonResponse, HttpResponseNotAllowed
+from django.template.loader import render_to_string
 
-from .models import Quiz, Question, Choice, Attempt, Answer, Category, Subcategory, AIQuestionDraft, Explanation
+from .models import Quiz, Question, Attempt, Answer, Subcategory, AIQuestionDraft, Explanation
+from . import search, snapshots, taxonomy
+from .cursors import decode_cursor, encode_cursor
 from .services.ai_generation import generate_questions, generate_explanation
 
 
-def quiz_list(request):
-	categories = Category.objects.all()
-	category_id = request.GET.get('category')
+CATALOG_PAGE_SIZE = 24
+
+
+def _catalog_page(category_id, cursor_token):
+	"""One keyset page of published quizzes, newest first; returns ``(quizzes, next_cursor)``.
 
-	quizzes = Quiz.objects.filter(is_published=True)
+	Ordered by ``(-created_at, -id)`` so each page is an index range scan after the cursor,
+	however deep the catalog is scrolled.
+	"""
+	# Card counters come from the QuizCard read model in the same query
+	quizzes = Quiz.objects.filter(is_published=True).select_related('card')
 	if category_id:
-		quizzes = quizzes.filter(category_id=category_id)
-	quizzes = quizzes.order_by('-created_at')
-	# Track which quizzes the current user has attempted
-	attempted_ids = set()
-	if request.user.is_authenticated:
-		attempted_ids = set(Attempt.objects.filter(user=request.user).values_list('quiz_id', flat=True))
+		try:
+			quizzes = quizzes.filter(category_id=int(category_id))
+		except (TypeError, ValueError):
+			pass
+	cursor = decode_cursor(cursor_token, datetime, int)
+	if cursor:
+		created_at, pk = cursor
+		quizzes = quizzes.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+	page = list(quizzes.order_by('-created_at', '-id')[:CATALOG_PAGE_SIZE + 1])
+	if len(page) <= CATALOG_PAGE_SIZE:
+		return page, None
+	page = page[:CATALOG_PAGE_SIZE]
+	return page, encode_cursor(page[-1].created_at, page[-1].pk)
+
+
+def _attempted_ids(user, quizzes) -> set:
+	"""Which of the given (on-screen) quizzes the user has attempted."""
+	if not user.is_authenticated or not quizzes:
+		return set()
+	return set(
+		Attempt.objects
+		.filter(user=user, quiz_id__in=[q.id for q in quizzes])
+		.values_list('quiz_id', flat=True)
+		.distinct()
+	)
+
+
+def _make_etag(*parts) -> str:
+	return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def _has_pending_messages(request) -> bool:
+	# A 304 would leave flashed messages unrendered, so those responses are always built
+	return bool(len(messages.get_messages(request)))
+
+
+def _catalog_validators(request):
+	"""``(etag, last_modified)`` for the quiz list, computed once per request.
+
+	Covers the viewer, the query string, the taxonomy and quiz-count versions, the newest
+	published quiz or card change, and the viewer's latest attempt (the "Attempted" badges).
+	"""
+	if not hasattr(request, '_catalog_validators'):
+		if _has_pending_messages(request):
+			request._catalog_validators = (None, None)
+		else:
+			latest = Quiz.objects.filter(is_published=True).aggregate(quiz=Max('updated_at'), card=Max('card__updated_at'))
+			last_attempt = None
+			if request.user.is_authenticated:
+				last_attempt = Attempt.objects.filter(user=request.user).aggregate(last=Max('id'))['last']
+			last_modified = max(filter(None, [latest['quiz'], latest['card']]), default=None)
+			etag = _make_etag('quiz_list', request.user.pk, request.GET.urlencode(), taxonomy.shared_versions(), last_modified, last_attempt)
+			request._catalog_validators = (etag, last_modified)
+	return request._catalog_validators
+
+
+def _quiz_list_etag(request):
+	return _catalog_validators(request)[0]
+
+
+def _quiz_list_last_modified(request):
+	return _catalog_validators(request)[1]
+
+
+def _subcategory_select_etag(request, category_slug: str):
+	if _has_pending_messages(request):
+		return None
+	return _make_etag('subcategory_select', request.user.pk, category_slug, request.GET.urlencode(), taxonomy.shared_versions())
+
+
+def _completed_result(request, attempt_id: int):
+	"""``(completed_at, quiz_updated_at)`` of the viewer's completed attempt, else None (always render)."""
+	if not hasattr(request, '_completed_result'):
+		row = None
+		if request.user.is_authenticated and not _has_pending_messages(request):
+			row = (
+				Attempt.objects
+				.filter(pk=attempt_id, user=request.user, is_completed=True)
+				.values_list('completed_at', 'quiz__updated_at')
+				.first()
+			)
+		request._completed_result = row
+	return request._completed_result
+
+
+def _result_etag(request, attempt_id: int):
+	row = _completed_result(request, attempt_id)
+	return _make_etag('quiz_result', attempt_id, *row) if row else None
+
+
+def _result_last_modified(request, attempt_id: int):
+	row = _completed_result(request, attempt_id)
+	return max(row) if row else None
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=_quiz_list_etag, last_modified_func=_quiz_list_last_modified)
+def quiz_list(request):
+	"""Published quizzes, keyset-paginated (``?after=<cursor>``); ``quiz_list_items`` serves further pages."""
+	categories = taxonomy.category_tree()
+	category_id = request.GET.get('category')
+	quizzes, next_cursor = _catalog_page(category_id, request.GET.get('after'))
 
 	return render(request, 'quizez/quiz_list.html', {
 		'quizzes': quizzes,
 		'categories': categories,
 		'current_category': category_id,
-		'attempted_ids': attempted_ids,
+		'attempted_ids': _attempted_ids(request.user, quizzes),
+		'next_cursor': next_cursor,
+	})
+
+
+def quiz_list_items(request):
+	"""JSON page of catalog cards for infinite scroll on the quiz list."""
+	quizzes, next_cursor = _catalog_page(request.GET.get('category'), request.GET.get('after'))
+	attempted_ids = _attempted_ids(request.user, quizzes)
+	return JsonResponse({
+		'items': [
+			{
+				'id': quiz.id,
+				'title': quiz.title,
+				'attempted': quiz.id in attempted_ids,
+				'html': render_to_string('quizez/quiz_card.html', {'quiz': quiz, 'attempted_ids': attempted_ids}, request=request),
+			}
+			for quiz in quizzes
+		],
+		'next_cursor': next_cursor,
 	})
 
 
+def quiz_search(request):
+	"""Ranked full-text search: ``?q=<text>[&kind=quiz|question|category|subcategory...][&limit=n]``."""
+	q = (request.GET.get('q') or '').strip()
+	kinds = request.GET.getlist('kind') or search.KINDS
+	try:
+		limit = min(max(1, int(request.GET.get('limit', search.SEARCH_LIMIT))), 100)
+	except (TypeError, ValueError):
+		limit = search.SEARCH_LIMIT
+	return JsonResponse({'q': q, 'results': search.search(q, kinds=kinds, limit=limit)})
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=_subcategory_select_etag)
 def subcategory_select(request, category_slug: str):
 	"""Display subcategories for a given category with difficulty and question count options."""
-	category = get_object_or_404(Category, slug=category_slug)
+	category = taxonomy.get_category(category_slug)
+	if category is None:
+		raise Http404("No Category matches the given query.")
 	q = request.GET.get('q', '').strip()
-	subcategories = category.subcategories.all().order_by('name')
+	subcategories = category.children
 	if q:
-		subcategories = subcategories.filter(name__icontains=q)
+		matches = set(search.filter_subcategories(Subcategory.objects.filter(category_id=category.id), q).values_list('id', flat=True))
+		subcategories = [s for s in subcategories if s.id in matches]
 
 	# Defaults
 	difficulties = [
@@ -54,7 +200,7 @@ def subcategory_select(request, category_slug: str):
 		'q': q,
 		'difficulties': difficulties,
 		'question_options': question_options,
-		'has_subcategories': category.subcategories.exists(),
+		'has_subcategories': bool(category.children),
 	})
 
 
@@ -65,19 +211,16 @@ def start_quiz(request, category_slug: str):
 		messages.error(request, 'Please select a subcategory and options to start a quiz.')
 		return redirect('subcategory_select', category_slug=category_slug)
 
-	category = get_object_or_404(Category, slug=category_slug)
+	category = taxonomy.get_category(category_slug)
+	if category is None:
+		raise Http404("No Category matches the given query.")
 	subcategory_id = request.POST.get('subcategory')
 	difficulty = request.POST.get('difficulty')
 	num_questions = request.POST.get('num_questions')
 
 	# Validate inputs
-	has_subcats = category.subcategories.exists()
-	subcategory = None
-	if subcategory_id:
-		try:
-			subcategory = Subcategory.objects.get(id=int(subcategory_id), category=category)
-		except Exception:
-			subcategory = None
+	has_subcats = bool(category.children)
+	subcategory = taxonomy.get_subcategory(category, subcategory_id) if subcategory_id else None
 
 	valid_difficulties = {Quiz.DIFFICULTY_EASY, Quiz.DIFFICULTY_MEDIUM, Quiz.DIFFICULTY_HARD}
 	valid_counts = {'5', '10', '15', '20'}
@@ -118,15 +261,12 @@ def start_quiz(request, category_slug: str):
 def generate_ai_quiz(request, category_slug: str):
 	"""Generate AI questions from the pending selection and store as AIQuestionDraft for admin review."""
 	data = request.session.get('pending_quiz_request') or {}
-	category = get_object_or_404(Category, slug=category_slug)
-	subcategory = None
-	if data.get('subcategory_id'):
-		try:
-			subcategory = Subcategory.objects.get(id=int(data['subcategory_id']), category=category)
-		except Exception:
-			subcategory = None
+	category = taxonomy.get_category(category_slug)
+	if category is None:
+		raise Http404("No Category matches the given query.")
+	subcategory = taxonomy.get_subcategory(category, data['subcategory_id']) if data.get('subcategory_id') else None
 	# Allow category-only flow when this category has no subcategories
-	if not subcategory and category.subcategories.exists():
+	if not subcategory and category.children:
 		messages.error(request, 'No pending quiz request found. Please select options again.')
 		return redirect('subcategory_select', category_slug=category_slug)
 
@@ -197,31 +337,30 @@ def generate_ai_quiz(request, category_slug: str):
 
 
 @login_required
-@transaction.atomic
 def take_quiz(request, quiz_id: int):
 	quiz = get_object_or_404(Quiz, pk=quiz_id, is_published=True)
 	questions = quiz.questions.prefetch_related('choices').all()
 
 	if request.method == 'POST':
-		attempt = Attempt.objects.create(user=request.user, quiz=quiz)
-
-		score = 0
-		total = questions.count()
-		for q in questions:
-			choice_id = request.POST.get(f'question_{q.id}')
-			selected = None
-			if choice_id:
-				try:
-					selected = q.choices.get(id=int(choice_id))
-				except (ValueError, Choice.DoesNotExist):
-					selected = None
-			ans = Answer.objects.create(attempt=attempt, question=q, selected_choice=selected)
-			if ans.is_correct():
-				score += 1
-		attempt.score = score
-		attempt.total = total
-		attempt.save()
-		messages.success(request, f'Quiz submitted! You scored {score} out of {total}.')
+		# Validate and score against the compiled answer key, in memory
+		snapshot = snapshots.get_snapshot(quiz)
+		answers = []
+		for q in snapshot.questions:
+			selected = q.choice(request.POST.get(f'question_{q.id}'))
+			answers.append(Answer(
+				question_id=q.id,
+				selected_choice_id=selected.id if selected else None,
+				is_correct_cached=selected is not None and selected.id == q.correct_choice_id,
+			))
+
+		# Only the writes run in a transaction
+		with transaction.atomic():
+			attempt = Attempt.objects.create(user=request.user, quiz=quiz)
+			for ans in answers:
+				ans.attempt = attempt
+			Answer.objects.bulk_create(answers)
+			attempt.complete()
+		messages.success(request, f'Quiz submitted! You scored {attempt.correct_count} out of {attempt.total}.')
 		return redirect('quiz_result', attempt_id=attempt.id)
 
 	return render(request, 'quizez/take_quiz.html', {
@@ -232,30 +371,24 @@ def take_quiz(request, quiz_id: int):
 
 @login_required
 @ensure_csrf_cookie
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_result_etag, last_modified_func=_result_last_modified)
 def quiz_result(request, attempt_id: int):
-	attempt = get_object_or_404(Attempt.objects.select_related('quiz', 'user'), pk=attempt_id, user=request.user)
-	answers = attempt.answers.select_related('question', 'selected_choice').all()
-	# Map answers by question id to allow inclusion of skipped questions
-	answer_by_qid = {a.question_id: a for a in answers}
-	# Full ordered question list for the quiz
-	questions = list(attempt.quiz.questions.all())
-	# Build review items preserving original quiz order: each item is (question, answer or None)
-	review_items = [(q, answer_by_qid.get(q.id)) for q in questions]
-	# Compute correct count for display (raw correct answers)
-	correct_count = sum(1 for a in answers if a.is_correct_cached)
-	# Format time taken (fallback to completed_at - started_at if missing)
-	secs = attempt.time_taken
-	if secs is None and attempt.started_at and attempt.completed_at:
-		secs = int((attempt.completed_at - attempt.started_at).total_seconds())
-	if secs is None:
-		secs = 0
-	m, s = divmod(int(secs), 60)
+	attempt = get_object_or_404(Attempt.objects.select_related('quiz'), pk=attempt_id, user=request.user)
+	if attempt.result is None:
+		if attempt.is_completed:
+			# Completed before result documents were stored
+			attempt.store_result()
+		else:
+			attempt.result = attempt.build_result(snapshots.get_snapshot(attempt.quiz))
+	m, s = divmod(int(attempt.result['time_taken']), 60)
 	time_taken_display = f"{m:02d}:{s:02d}"
 	return render(request, 'quizez/quiz_result.html', {
 		'attempt': attempt,
-		'review_items': review_items,
-		'answers': answers,  # kept for backward compatibility if template pieces still reference it
-		'correct_count': correct_count,
+		# Review items in quiz order, skipped questions included
+		'review_items': attempt.result_items(),
+		# Raw correct answers for display
+		'correct_count': attempt.result['correct_count'],
 		'time_taken_display': time_taken_display,
 	})
 
@@ -267,7 +400,7 @@ def answer_explanation(request, answer_id: int):
 	GET: returns {explanation, resources, helpful, not_helpful}
 	POST: expects {action: 'helpful'|'not_helpful'} to update feedback counters
 	"""
-	answer = get_object_or_404(Answer.objects.select_related('attempt', 'question', 'selected_choice'),
+	answer = get_object_or_404(Answer.objects.select_related('attempt', 'question__correct_choice', 'selected_choice'),
 							   pk=answer_id, attempt__user=request.user)
 	if request.method == 'GET':
 		exp = Explanation.objects.filter(question=answer.question).order_by('-created_at').first()
@@ -319,107 +452,137 @@ def answer_explanation(request, answer_id: int):
 # Create your views here.
 
 
+def _session_attempt(request, quiz: Quiz, total: int, start: bool = True):
+	"""The user's in-progress attempt at ``quiz``; if there is none, a new one when ``start`` is set, else None."""
+	attempt = Attempt.objects.filter(user=request.user, quiz=quiz, is_completed=False).order_by('-started_at').first()
+	if not attempt and start:
+		expires_at = timezone.now() + timezone.timedelta(seconds=quiz.session_time_limit(total))
+		attempt = Attempt.objects.create(user=request.user, quiz=quiz, total=total, expires_at=expires_at)
+	return attempt
+
+
+def _last_completed_attempt(request, quiz: Quiz):
+	return Attempt.objects.filter(user=request.user, quiz=quiz, is_completed=True).order_by('-completed_at', '-pk').first()
+
+
+def _session_deadline(attempt: Attempt, time_limit_seconds: int):
+	return attempt.expires_at or attempt.started_at + timezone.timedelta(seconds=time_limit_seconds)
+
+
+def _session_index(value, default, total: int) -> int:
+	try:
+		idx = int(value)
+	except (TypeError, ValueError):
+		idx = default or 0
+	return max(0, min(idx, total - 1))
+
+
+def _finalize_session(attempt: Attempt, snapshot, time_taken: int) -> int:
+	"""Write the recorded selections as answers and complete the attempt; returns the percent score."""
+	with transaction.atomic():
+		Answer.upsert(attempt.build_answers(snapshot))
+		attempt.complete(time_taken=time_taken)
+	return attempt.percent
+
+
+def _record_session_post(request, attempt: Attempt, idx: int, current_q) -> list:
+	"""Record the selection posted for the current question on the attempt; returns the changed fields."""
+	choice_id = request.POST.get('choice')
+	if not choice_id:
+		return []
+	selected = current_q.choice(choice_id)
+	attempt.record_selection(idx, selected.id if selected else None)
+	return ['answered_bits', 'selected_choices']
+
+
+def _next_session_index(nav: str, idx: int, total: int) -> int:
+	# Move index for prev/next/skip
+	if nav == 'prev':
+		return max(0, idx - 1)
+	return min(total - 1, idx + 1)
+
+
+def _session_question_payload(questions, idx: int, attempt: Attempt) -> dict:
+	question = questions[idx]
+	return {
+		'index': idx,
+		'id': question.id,
+		'text': question.text,
+		'image_url': question.image_url,
+		'choices': [{'id': c.id, 'text': c.text} for c in question.choices],
+		'selected_id': attempt.selected_choice_at(idx),
+	}
+
+
 @login_required
 def quiz_session(request, quiz_id: int):
 	"""Single-question session flow with Previous/Next navigation.
 
 	Part 1 focuses on displaying one question at a time, tracking selection,
-	and navigating without final submission.
+	and navigating without final submission. ``quiz_session_api`` serves the
+	same flow as JSON for in-page navigation.
 	"""
 	quiz = get_object_or_404(Quiz, pk=quiz_id, is_published=True)
-	questions = list(quiz.questions.prefetch_related('choices').all())
+	# Question content comes from the compiled snapshot (process LRU / shared cache)
+	snapshot = snapshots.get_snapshot(quiz)
+	questions = snapshot.questions
 	total = len(questions)
 	if total == 0:
 		messages.error(request, 'This quiz has no questions yet.')
 		return redirect('quiz_list')
 
-	# Get or create an in-progress attempt for this user
-	attempt = Attempt.objects.filter(user=request.user, quiz=quiz, is_completed=False).order_by('-started_at').first()
-	if not attempt:
-		attempt = Attempt.objects.create(user=request.user, quiz=quiz, total=total)
-
-	if attempt.is_completed:
-		return redirect('quiz_result', attempt_id=attempt.id)
+	# Only opening the page starts an attempt: a POST once it has finished (a double submit,
+	# a stale tab) goes to the result rather than silently starting another one
+	attempt = _session_attempt(request, quiz, total, start=request.method != 'POST')
+	if attempt is None:
+		finished = _last_completed_attempt(request, quiz)
+		if finished:
+			return redirect('quiz_result', attempt_id=finished.id)
+		return redirect('quiz_session', quiz_id=quiz.id)
 
 	# Enforce time limit (server-side guard)
-	# Dynamic time limit by question count: 5→5m, 10→10m, 15→12m, 20→15m; fallback to quiz.time_limit
-	minutes_map = {5: 5, 10: 10, 15: 12, 20: 15}
-	minutes = minutes_map.get(total, int(getattr(quiz, 'time_limit', 30)))
-	time_limit_seconds = max(1, int(minutes) * 60)
-	deadline = attempt.started_at + timezone.timedelta(seconds=time_limit_seconds)
+	time_limit_seconds = quiz.session_time_limit(total)
+	deadline = _session_deadline(attempt, time_limit_seconds)
 	now = timezone.now()
 	if now >= deadline:
-		# Time up – finalize immediately
-		answers = attempt.answers.select_related('question', 'selected_choice').all()
-		correct = sum(1 for a in answers if a.is_correct())
-		percent = int(round((correct / total) * 100)) if total else 0
-		attempt.score = percent
-		attempt.total = total
-		attempt.is_completed = True
-		attempt.time_taken = time_limit_seconds
-		attempt.save(update_fields=['score', 'total', 'is_completed', 'time_taken'])
+		# Time up – write the recorded selections and finalize immediately
+		_finalize_session(attempt, snapshot, time_limit_seconds)
 		messages.info(request, 'Time is up. Your quiz was submitted automatically.')
 		return redirect('quiz_result', attempt_id=attempt.id)
 
 	# Determine current index (0-based)
-	try:
-		idx = int(request.GET.get('q', attempt.current_index or 0))
-	except Exception:
-		idx = attempt.current_index or 0
-	idx = max(0, min(idx, total - 1))
+	idx = _session_index(request.GET.get('q', attempt.current_index or 0), attempt.current_index, total)
 
 	current_q = questions[idx]
 
-	# Track answered questions for review panel/progress
-	answered_qids = set(attempt.answers.values_list('question_id', flat=True))
-	answered_count = len(answered_qids)
+	# Progress for the review panel comes from the attempt row (answered bitset)
+	answered_count = attempt.answered_count
 
 	if request.method == 'POST':
 		nav = request.POST.get('nav', 'next')  # 'prev' | 'next' | 'skip' | 'submit'
-		choice_id = request.POST.get('choice')
-
-		# Save or update answer selection for current question
-		if choice_id:
-			try:
-				selected = current_q.choices.get(id=int(choice_id))
-			except (ValueError, Choice.DoesNotExist):
-				selected = None
-			ans, _ = Answer.objects.get_or_create(attempt=attempt, question=current_q)
-			ans.selected_choice = selected
-			ans.save()
+		changed = _record_session_post(request, attempt, idx, current_q)
 
 		# If user pressed submit on last question, finalize the attempt
 		if nav == 'submit' or (nav == 'next' and idx == total - 1):
-			# Recalculate correctness and set percent score
-			answers = attempt.answers.select_related('question', 'selected_choice').all()
-			correct = sum(1 for a in answers if a.is_correct())
-			percent = int(round((correct / total) * 100)) if total else 0
-			attempt.score = percent
-			attempt.total = total
-			attempt.is_completed = True
 			# Compute time taken from start
-			attempt.time_taken = int((timezone.now() - attempt.started_at).total_seconds())
-			attempt.save(update_fields=['score', 'total', 'is_completed', 'time_taken'])
+			time_taken = int((timezone.now() - attempt.started_at).total_seconds())
+			if changed:
+				attempt.save(update_fields=changed)
+			percent = _finalize_session(attempt, snapshot, time_taken)
 			messages.success(request, f'Quiz submitted! You scored {percent}%')
 			# Redirect to result page; profile will reflect stats automatically
 			return redirect('quiz_result', attempt_id=attempt.id)
 
-		# Otherwise, move index for prev/next/skip
-		if nav == 'prev':
-			idx = max(0, idx - 1)
-		else:
-			idx = min(total - 1, idx + 1)
-
+		idx = _next_session_index(nav, idx, total)
 		attempt.current_index = idx
 		attempt.total = total
-		attempt.save(update_fields=['current_index', 'total'])
+		attempt.save(update_fields=['current_index', 'total', *changed])
 
 		# Redirect to avoid re-posting
 		return redirect(f"{request.path}?q={idx}")
 
 	# Preselect previously chosen option, if any
-	existing = attempt.answers.filter(question=current_q).first()
-	selected_id = existing.selected_choice_id if existing and existing.selected_choice_id else None
+	selected_id = attempt.selected_choice_at(idx)
 
 	context = {
 		'quiz': quiz,
@@ -438,7 +601,7 @@ def quiz_session(request, quiz_id: int):
 		'review_map': [
 			{
 				'n': i + 1,
-				'answered': questions[i].id in answered_qids,
+				'answered': attempt.is_answered(i),
 				'is_current': i == idx,
 			}
 			for i in range(total)
@@ -448,3 +611,77 @@ def quiz_session(request, quiz_id: int):
 		'time_limit_seconds': time_limit_seconds,
 	}
 	return render(request, 'quizez/quiz_session.html', context)
+
+
+@login_required
+def quiz_session_api(request, quiz_id: int):
+	"""JSON counterpart of ``quiz_session`` for in-page navigation.
+
+	``GET ?q=<index>`` returns that question. ``POST`` takes the session form fields
+	(``q``, ``choice``, ``nav``, plus an optional ``to`` index to jump to), buffers the
+	selection and returns the question navigated to in the same response, together
+	with the progress map and the question after it (``prefetch``), so the page can
+	show the next click without waiting. A finished attempt returns ``done`` and the
+	result URL instead.
+
+	Attempts are only started by opening ``quiz_session``: without one in progress this
+	returns ``done`` with the result of the user's latest finished attempt (409 if they
+	have none), so a late prefetch or a repeated submit never starts a new one.
+	"""
+	if request.method not in ('GET', 'POST'):
+		return HttpResponseNotAllowed(['GET', 'POST'])
+	quiz = get_object_or_404(Quiz, pk=quiz_id, is_published=True)
+	snapshot = snapshots.get_snapshot(quiz)
+	questions = snapshot.questions
+	total = len(questions)
+	if total == 0:
+		return JsonResponse({'ok': False, 'error': 'This quiz has no questions yet.'}, status=404)
+
+	attempt = _session_attempt(request, quiz, total, start=False)
+	if attempt is None:
+		finished = _last_completed_attempt(request, quiz)
+		if finished is None:
+			return JsonResponse({'ok': False, 'error': 'No attempt in progress.'}, status=409)
+		return JsonResponse({'ok': True, 'done': True, 'timed_out': False, 'redirect': reverse('quiz_result', args=[finished.id])})
+	time_limit_seconds = quiz.session_time_limit(total)
+	deadline = _session_deadline(attempt, time_limit_seconds)
+	result_url = reverse('quiz_result', args=[attempt.id])
+	if timezone.now() >= deadline:
+		_finalize_session(attempt, snapshot, time_limit_seconds)
+		return JsonResponse({'ok': True, 'done': True, 'timed_out': True, 'redirect': result_url})
+
+	params = request.POST if request.method == 'POST' else request.GET
+	idx = _session_index(params.get('q', attempt.current_index or 0), attempt.current_index, total)
+
+	if request.method == 'POST':
+		nav = request.POST.get('nav', 'next')
+		changed = _record_session_post(request, attempt, idx, questions[idx])
+		if nav == 'submit' or (nav == 'next' and idx == total - 1):
+			time_taken = int((timezone.now() - attempt.started_at).total_seconds())
+			if changed:
+				attempt.save(update_fields=changed)
+			percent = _finalize_session(attempt, snapshot, time_taken)
+			messages.success(request, f'Quiz submitted! You scored {percent}%')
+			return JsonResponse({'ok': True, 'done': True, 'timed_out': False, 'redirect': result_url})
+		if 'to' in request.POST:
+			idx = _session_index(request.POST['to'], idx, total)
+		else:
+			idx = _next_session_index(nav, idx, total)
+		if changed or idx != attempt.current_index or attempt.total != total:
+			attempt.current_index = idx
+			attempt.total = total
+			attempt.save(update_fields=['current_index', 'total', *changed])
+
+	answered = [attempt.is_answered(i) for i in range(total)]
+	answered_count = sum(answered)
+	return JsonResponse({
+		'ok': True,
+		'done': False,
+		'total': total,
+		'question': _session_question_payload(questions, idx, attempt),
+		'prefetch': _session_question_payload(questions, idx + 1, attempt) if idx < total - 1 else None,
+		'answered': answered,
+		'answered_count': answered_count,
+		'progress_percent': int((answered_count / total) * 100) if total else 0,
+		'deadline_epoch': int(deadline.timestamp()),
+	})
@@ -1,3 +1,25 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import LeaderboardEntry, LeaderboardPeriodEntry, QuizPeerCounts
+
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+	list_display = ("user", "total_score", "total_possible", "accuracy", "total_quizzes", "perfect_scores", "updated_at")
+	search_fields = ("user__username",)
+	readonly_fields = ("updated_at",)
+
+
+@admin.register(LeaderboardPeriodEntry)
+class LeaderboardPeriodEntryAdmin(admin.ModelAdmin):
+	list_display = ("user", "period", "period_start", "total_score", "accuracy", "total_quizzes", "updated_at")
+	list_filter = ("period", "period_start")
+	search_fields = ("user__username",)
+	readonly_fields = ("updated_at",)
+
+
+@admin.register(QuizPeerCounts)
+class QuizPeerCountsAdmin(admin.ModelAdmin):
+	list_display = ("quiz", "ongoing_users", "completed_users", "updated_at")
+	search_fields = ("quiz__title",)
+	readonly_fields = ("updated_at",)
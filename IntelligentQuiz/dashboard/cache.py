@@ -0,0 +1,161 @@
+"""Versioned cache for leaderboard pages.
+
+Each cached page is stored together with the leaderboard version it was built
+from. Completing an attempt bumps the version (after commit), which makes every
+cached page stale without deleting it: the first reader to notice takes a short
+lock and rebuilds, while concurrent readers keep serving the stale copy instead
+of all recomputing at once. A page that is not cached at all is built under the
+same lock, and the other readers wait briefly for it. Fresh pages are also
+rebuilt early at random, the more likely the closer they are to expiry and the
+longer they took to build (probabilistic early expiration), so a busy page is
+usually refreshed by one reader before it expires. Pages go stale after
+``LEADERBOARD_SOFT_TTL`` seconds at the latest, which bounds how long changes
+made outside the completion hook stay hidden.
+
+The version and the hit/stale/early/miss counters live in the
+``LeaderboardCacheState`` row, not in the cache, so a bump from any worker or
+management command reaches every worker on its next request, and
+``manage.py leaderboard_cache_stats`` sees every process's counters, even with
+the per-process LocMem cache (no ``REDIS_URL``). Each process buffers its
+counters and adds them to the row at most every ``STATS_FLUSH_INTERVAL`` seconds.
+The page lock is a cache key, so it is shared by the workers sharing a cache.
+"""
+import math
+import random
+import threading
+import time
+
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import LeaderboardCacheState
+
+LEADERBOARD_SOFT_TTL = 60
+LEADERBOARD_HARD_TTL = 60 * 30
+LEADERBOARD_LOCK_TTL = 30
+# How long a reader waits for someone else's build of an uncached page before building it too
+LEADERBOARD_LOCK_WAIT = 2
+LEADERBOARD_LOCK_POLL = 0.05
+# Above 1 refreshes earlier, below 1 later
+EARLY_REFRESH_BETA = 1.0
+STATS_FLUSH_INTERVAL = 10
+
+STAT_NAMES = ('hits', 'stale', 'early', 'misses')
+
+_stats_lock = threading.Lock()
+_stats = {
+	'pending': dict.fromkeys(STAT_NAMES, 0),
+	'flushed_at': time.monotonic(),
+}
+
+
+def _seed() -> int:
+	# Microsecond clock: a restored or rolled-back row never repeats a version a page was built from
+	return time.time_ns() // 1000
+
+
+def current_version() -> int:
+	version = LeaderboardCacheState.objects.filter(pk=1).values_list('version', flat=True).first()
+	if version is None:
+		row, _ = LeaderboardCacheState.objects.get_or_create(pk=1, defaults={'version': _seed()})
+		version = row.version
+	return version
+
+
+def bump_version() -> None:
+	"""Invalidate every cached leaderboard page (all filters)."""
+	if not LeaderboardCacheState.objects.filter(pk=1).update(version=Greatest(F('version') + 1, _seed())):
+		current_version()
+
+
+def _count(name: str) -> None:
+	with _stats_lock:
+		_stats['pending'][name] += 1
+		due = time.monotonic() - _stats['flushed_at'] >= STATS_FLUSH_INTERVAL
+	if due:
+		flush_stats()
+
+
+def flush_stats() -> None:
+	"""Add this process's buffered counters to the shared row."""
+	with _stats_lock:
+		counts = {name: n for name, n in _stats['pending'].items() if n}
+		_stats['pending'] = dict.fromkeys(STAT_NAMES, 0)
+		_stats['flushed_at'] = time.monotonic()
+	if counts:
+		current_version()
+		LeaderboardCacheState.objects.filter(pk=1).update(**{name: F(name) + n for name, n in counts.items()})
+
+
+def _expires_early(entry) -> bool:
+	# XFetch: refresh once now - delta * beta * ln(rand) passes the soft expiry
+	gap = -entry['delta'] * EARLY_REFRESH_BETA * math.log(1.0 - random.random())
+	return time.time() + gap >= entry['soft_expires']
+
+
+def _build(key: str, version: int, build):
+	started = time.monotonic()
+	data = build()
+	cache.set(key, {
+		'version': version,
+		'soft_expires': time.time() + LEADERBOARD_SOFT_TTL,
+		'delta': time.monotonic() - started,
+		'data': data,
+	}, timeout=LEADERBOARD_HARD_TTL)
+	return data
+
+
+def _wait_for(key: str):
+	"""The page another reader is building, if it lands within ``LEADERBOARD_LOCK_WAIT``."""
+	deadline = time.monotonic() + LEADERBOARD_LOCK_WAIT
+	while time.monotonic() < deadline:
+		time.sleep(LEADERBOARD_LOCK_POLL)
+		entry = cache.get(key)
+		if entry:
+			return entry
+	return None
+
+
+def get_page(page_key: str, build):
+	"""Return the cached leaderboard page for ``page_key``, rebuilding it with ``build()`` when stale."""
+	key = f'leaderboard:page:{page_key}'
+	version = current_version()
+	entry = cache.get(key)
+	fresh = bool(entry) and entry['version'] == version and entry['soft_expires'] > time.time()
+	if fresh and not _expires_early(entry):
+		_count('hits')
+		return entry['data']
+
+	lock_key = f'{key}:lock'
+	if not cache.add(lock_key, 1, timeout=LEADERBOARD_LOCK_TTL):
+		# Someone else is rebuilding this page; serve what is cached meanwhile
+		if entry:
+			_count('hits' if fresh else 'stale')
+			return entry['data']
+		entry = _wait_for(key)
+		if entry:
+			_count('hits')
+			return entry['data']
+		# The other build is slow or died with the lock held: build without it
+		_count('misses')
+		return _build(key, version, build)
+
+	_count('early' if fresh else 'misses')
+	try:
+		return _build(key, version, build)
+	finally:
+		cache.delete(lock_key)
+
+
+def stats() -> dict:
+	"""Counters of every process since they were last reset (this process's flushed first)."""
+	flush_stats()
+	row = LeaderboardCacheState.objects.filter(pk=1).values(*STAT_NAMES).first()
+	return row or dict.fromkeys(STAT_NAMES, 0)
+
+
+def reset_stats() -> None:
+	with _stats_lock:
+		_stats['pending'] = dict.fromkeys(STAT_NAMES, 0)
+	LeaderboardCacheState.objects.filter(pk=1).update(**dict.fromkeys(STAT_NAMES, 0))
@@ -0,0 +1,132 @@
+"""Streaming CSV / JSON Lines exports of the leaderboard and attempt history.
+
+Rows are read with ``.iterator(chunk_size=EXPORT_CHUNK_SIZE)`` and encoded one line at a
+time, so an export keeps constant memory however many attempts it covers and the first
+bytes go out before the query has been fully read. The same generators back the
+``export_leaderboard``/``export_history`` endpoints and ``manage.py export_quiz_data``.
+"""
+import csv
+import json
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+from django.db.models import F
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from .queries import LEADERBOARD_ORDER, history_attempts, history_filters, leaderboard_standings, with_ranks
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+	'csv': 'text/csv; charset=utf-8',
+	'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+LEADERBOARD_COLUMNS = (
+	'rank', 'user_id', 'username', 'total_score', 'total_possible', 'accuracy',
+	'total_quizzes', 'perfect_scores', 'total_time',
+)
+HISTORY_COLUMNS = (
+	'id', 'user_id', 'username', 'quiz_id', 'quiz_title', 'category', 'status',
+	'started_at', 'completed_at', 'correct_count', 'total', 'weighted_score', 'max_score', 'percent', 'time_taken',
+)
+
+
+class _Echo:
+	"""File-like object whose ``write`` hands the line back instead of buffering it."""
+	def write(self, value):
+		return value
+
+
+def encode_rows(rows, columns, fmt: str):
+	"""Yield dict ``rows`` as CSV lines (with a header) or as JSON Lines."""
+	if fmt == 'csv':
+		writer = csv.writer(_Echo())
+		yield writer.writerow(columns)
+		for row in rows:
+			yield writer.writerow([row[c] for c in columns])
+	else:
+		for row in rows:
+			yield json.dumps({c: row[c] for c in columns}) + '\n'
+
+
+def leaderboard_rows(standings, chunk_size: int = EXPORT_CHUNK_SIZE):
+	"""Stream ``standings`` in leaderboard order, numbering them with RANK() semantics."""
+	rows = (
+		standings
+		.annotate(username=F('user__username'))
+		.order_by(*LEADERBOARD_ORDER)
+		.iterator(chunk_size=chunk_size)
+	)
+	for row, rank in with_ranks(rows):
+		row['rank'] = rank
+		yield row
+
+
+def _isoformat(value):
+	return value.isoformat() if value else None
+
+
+def history_rows(attempts, chunk_size: int = EXPORT_CHUNK_SIZE):
+	"""Stream attempts (ongoing and completed) from a ``history_attempts`` queryset."""
+	rows = attempts.values(
+		'id', 'user_id', 'quiz_id', 'started_at', 'completed_at',
+		'correct_count', 'total', 'weighted_score', 'max_score', 'percent', 'time_taken', 'is_completed',
+		username=F('user__username'),
+		quiz_title=F('quiz__title'),
+		category=F('quiz__category__name'),
+	).iterator(chunk_size=chunk_size)
+	for row in rows:
+		row['status'] = 'completed' if row.pop('is_completed') else 'ongoing'
+		row['started_at'] = _isoformat(row['started_at'])
+		row['completed_at'] = _isoformat(row['completed_at']) if row['status'] == 'completed' else None
+		yield row
+
+
+def filter_status(attempts, status: str):
+	if status == 'completed':
+		return attempts.filter(is_completed=True)
+	if status == 'ongoing':
+		return attempts.filter(is_completed=False)
+	return attempts
+
+
+def _export_format(request) -> str:
+	fmt = request.GET.get('format', 'csv')
+	if fmt not in EXPORT_FORMATS:
+		raise Http404(f"Unknown export format: {fmt}")
+	return fmt
+
+
+def _streaming_export(lines, fmt: str, name: str) -> StreamingHttpResponse:
+	response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[fmt])
+	stamp = timezone.localtime().strftime('%Y%m%d-%H%M')
+	response['Content-Disposition'] = f'attachment; filename="{name}-{stamp}.{fmt}"'
+	return response
+
+
+@staff_member_required
+def export_leaderboard(request):
+	"""Full leaderboard for ``?filter=`` as ``?format=csv`` (default) or ``jsonl``."""
+	fmt = _export_format(request)
+	filter_type, _label, _start, standings = leaderboard_standings(request.GET.get('filter', 'all_time'))
+	lines = encode_rows(leaderboard_rows(standings), LEADERBOARD_COLUMNS, fmt)
+	return _streaming_export(lines, fmt, f'leaderboard-{filter_type}')
+
+
+@login_required
+def export_history(request):
+	"""The user's attempt history with the history page filters; staff may pass ``?user=<username>``."""
+	fmt = _export_format(request)
+	user = request.user
+	username = request.GET.get('user')
+	if username and username != user.username:
+		if not user.is_staff:
+			raise PermissionDenied
+		user = get_object_or_404(User, username=username)
+	filters = history_filters(request)
+	attempts = filter_status(history_attempts(user, filters), filters['status'])
+	lines = encode_rows(history_rows(attempts), HISTORY_COLUMNS, fmt)
+	return _streaming_export(lines, fmt, f'history-{user.username}')
@@ -0,0 +1,58 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from dashboard import cache as leaderboard_cache
+from dashboard.models import LeaderboardPeriodEntry
+from Quizez.models import Attempt
+
+
+class Command(BaseCommand):
+    help = "Build weekly/monthly leaderboard buckets from historical completed attempts, one period at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--period",
+            choices=[p for p, _ in LeaderboardPeriodEntry.PERIOD_CHOICES],
+            help="Only backfill this period type (default: all)",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        periods = [options["period"]] if options["period"] else [p for p, _ in LeaderboardPeriodEntry.PERIOD_CHOICES]
+        completed = Attempt.objects.filter(is_completed=True, user__isnull=False)
+        first = completed.aggregate(v=Min('completed_at'))['v']
+        if first is None:
+            self.stdout.write("No completed attempts; nothing to backfill.")
+            return
+
+        current = {p: LeaderboardPeriodEntry.period_start_for(p) for p in periods}
+        for period in periods:
+            start = LeaderboardPeriodEntry.period_start_for(period, first)
+            buckets = 0
+            # Each chunk is one whole period, so buckets are replaced rather than merged
+            while start <= current[period]:
+                end = LeaderboardPeriodEntry.next_period_start(period, start)
+                buckets += self.rebuild_bucket(completed, period, start, end, options["batch_size"])
+                start = end
+            self.stdout.write(self.style.SUCCESS(f"{period}: wrote {buckets} buckets"))
+        leaderboard_cache.bump_version()
+
+    @transaction.atomic
+    def rebuild_bucket(self, completed, period, start, end, batch_size) -> int:
+        tz = timezone.get_current_timezone()
+        rows = LeaderboardPeriodEntry.aggregate_attempts(completed.filter(
+            completed_at__gte=datetime.combine(start, time.min, tzinfo=tz),
+            completed_at__lt=datetime.combine(end, time.min, tzinfo=tz),
+        ))
+        entries = []
+        for row in rows.iterator():
+            entry = LeaderboardPeriodEntry(period=period, period_start=start, **row)
+            entry.refresh_accuracy()
+            entries.append(entry)
+        LeaderboardPeriodEntry.objects.filter(period=period, period_start=start).delete()
+        LeaderboardPeriodEntry.objects.bulk_create(entries, batch_size=batch_size)
+        return len(entries)
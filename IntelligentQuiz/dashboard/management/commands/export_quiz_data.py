@@ -0,0 +1,60 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.exports import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    HISTORY_COLUMNS,
+    LEADERBOARD_COLUMNS,
+    encode_rows,
+    filter_status,
+    history_rows,
+    leaderboard_rows,
+)
+from dashboard.queries import HISTORY_SORTS, history_attempts, leaderboard_standings
+
+
+class Command(BaseCommand):
+    help = "Stream the leaderboard or attempt history as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=["leaderboard", "history"])
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", "-o", help="Write to this file instead of stdout")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument("--filter", default="all_time", help="Leaderboard filter: all_time, this_week or this_month")
+        parser.add_argument("--user", help="History of this username only (default: every user)")
+        parser.add_argument("--status", choices=["completed", "ongoing"], help="History: only completed or ongoing attempts")
+        parser.add_argument("--sort", choices=sorted(HISTORY_SORTS), default="date", help="History order")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if options["dataset"] == "leaderboard":
+            _filter, _label, _start, standings = leaderboard_standings(options["filter"])
+            rows = leaderboard_rows(standings, chunk_size=chunk_size)
+            columns = LEADERBOARD_COLUMNS
+        else:
+            user = None
+            if options["user"]:
+                user = User.objects.filter(username=options["user"]).first()
+                if user is None:
+                    raise CommandError(f"No user named {options['user']!r}")
+            filters = {"q": "", "category": "", "status": options["status"] or "", "sort": options["sort"]}
+            attempts = filter_status(history_attempts(user, filters), filters["status"])
+            rows = history_rows(attempts, chunk_size=chunk_size)
+            columns = HISTORY_COLUMNS
+
+        lines = encode_rows(rows, columns, options["format"])
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(options["output"], "w", newline="", encoding="utf-8") as out:
+            count = 0
+            for line in lines:
+                out.write(line)
+                count += 1
+        if options["format"] == "csv":
+            count -= 1  # header
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} rows to {options['output']}"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from dashboard import cache as leaderboard_cache
+
+
+class Command(BaseCommand):
+    help = "Show the leaderboard cache version and the hit/stale/early/miss counters of every worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters after printing them")
+
+    def handle(self, *args, **options):
+        stats = leaderboard_cache.stats()
+        served = sum(stats.values())
+        hit_rate = ((stats['hits'] + stats['stale']) / served * 100) if served else 0
+        self.stdout.write(f"Version: {leaderboard_cache.current_version()}")
+        for name, value in stats.items():
+            self.stdout.write(f"{name}: {value}")
+        self.stdout.write(self.style.SUCCESS(f"Hit rate: {hit_rate:.1f}% of {served} requests"))
+        if options["reset"]:
+            leaderboard_cache.reset_stats()
+            self.stdout.write("Counters reset.")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dashboard import cache as leaderboard_cache
+from dashboard.models import LeaderboardEntry
+from Quizez.models import Attempt
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized leaderboard from completed attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rows = LeaderboardEntry.aggregate_attempts(
+            Attempt.objects.filter(is_completed=True, user__isnull=False)
+        )
+        entries = []
+        for row in rows.iterator():
+            entry = LeaderboardEntry(**row)
+            entry.refresh_accuracy()
+            entries.append(entry)
+
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=options["batch_size"])
+        transaction.on_commit(leaderboard_cache.bump_version)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(entries)} leaderboard entries."))
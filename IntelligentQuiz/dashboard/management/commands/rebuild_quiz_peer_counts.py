@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from dashboard.models import QuizPeerCounts
+from Quizez.models import Attempt
+
+
+class Command(BaseCommand):
+    help = "Recompute per-quiz ongoing/completed peer counters from attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rows = (
+            Attempt.objects
+            .filter(user__isnull=False)
+            .values('quiz_id')
+            .annotate(
+                ongoing_users=Count('user', filter=Q(is_completed=False), distinct=True),
+                completed_users=Count('user', filter=Q(is_completed=True), distinct=True),
+            )
+            .order_by()
+        )
+        counters = [QuizPeerCounts(**row) for row in rows.iterator()]
+        QuizPeerCounts.objects.all().delete()
+        QuizPeerCounts.objects.bulk_create(counters, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt peer counts for {len(counters)} quizzes."))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_leaderboard(apps, schema_editor):
+    # rebuild_leaderboard at the time of this migration, so existing players start ranked
+    Attempt = apps.get_model('Quizez', 'Attempt')
+    LeaderboardEntry = apps.get_model('dashboard', 'LeaderboardEntry')
+
+    rows = (
+        Attempt.objects
+        .filter(is_completed=True, user__isnull=False)
+        .values('user_id')
+        .annotate(
+            total_score=Coalesce(Sum('score'), 0),
+            total_possible=Coalesce(Sum('total'), 0),
+            total_quizzes=Count('id'),
+            total_time=Coalesce(Sum('time_taken'), 0),
+            perfect_scores=Count('id', filter=Q(total__gt=0, score=F('total'))),
+        )
+        .order_by()
+    )
+    entries = []
+    for row in rows.iterator():
+        possible = row['total_possible']
+        entries.append(LeaderboardEntry(accuracy=round(row['total_score'] / possible * 100, 1) if possible else 0, **row))
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('Quizez', '0010_explanation_answer_explanation'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_entry', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_score', models.PositiveIntegerField(default=0)),
+                ('total_possible', models.PositiveIntegerField(default=0)),
+                ('total_quizzes', models.PositiveIntegerField(default=0)),
+                ('total_time', models.PositiveIntegerField(default=0, help_text='Total time taken in seconds')),
+                ('perfect_scores', models.PositiveIntegerField(default=0)),
+                ('accuracy', models.FloatField(default=0, help_text='total_score / total_possible as a percentage')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Leaderboard entries',
+                'indexes': [models.Index(fields=['-total_score', '-accuracy'], name='leaderboard_rank_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_leaderboard, migrations.RunPython.noop),
+    ]
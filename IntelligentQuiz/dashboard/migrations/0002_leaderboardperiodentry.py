@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:07
+
+from datetime import datetime, time, timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def backfill_current_periods(apps, schema_editor):
+    # The running week and month, so they are complete from the first request;
+    # older buckets are built by ``manage.py backfill_leaderboard_periods``.
+    Attempt = apps.get_model('Quizez', 'Attempt')
+    LeaderboardPeriodEntry = apps.get_model('dashboard', 'LeaderboardPeriodEntry')
+
+    today = timezone.localdate()
+    tz = timezone.get_current_timezone()
+    starts = {'week': today - timedelta(days=today.weekday()), 'month': today.replace(day=1)}
+    entries = []
+    for period, start in starts.items():
+        rows = (
+            Attempt.objects
+            .filter(is_completed=True, user__isnull=False, completed_at__gte=datetime.combine(start, time.min, tzinfo=tz))
+            .values('user_id')
+            .annotate(
+                total_score=Coalesce(Sum('score'), 0),
+                total_possible=Coalesce(Sum('total'), 0),
+                total_quizzes=Count('id'),
+                total_time=Coalesce(Sum('time_taken'), 0),
+                perfect_scores=Count('id', filter=Q(total__gt=0, score=F('total'))),
+            )
+            .order_by()
+        )
+        for row in rows.iterator():
+            possible = row['total_possible']
+            entries.append(LeaderboardPeriodEntry(
+                period=period,
+                period_start=start,
+                accuracy=round(row['total_score'] / possible * 100, 1) if possible else 0,
+                **row,
+            ))
+    LeaderboardPeriodEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0010_explanation_answer_explanation'),
+        ('dashboard', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardPeriodEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_score', models.PositiveIntegerField(default=0)),
+                ('total_possible', models.PositiveIntegerField(default=0)),
+                ('total_quizzes', models.PositiveIntegerField(default=0)),
+                ('total_time', models.PositiveIntegerField(default=0, help_text='Total time taken in seconds')),
+                ('perfect_scores', models.PositiveIntegerField(default=0)),
+                ('accuracy', models.FloatField(default=0, help_text='total_score / total_possible as a percentage')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField(help_text='Monday of the ISO week, or the first day of the month')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_periods', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Leaderboard period entries',
+                'indexes': [models.Index(fields=['period', 'period_start', '-total_score', '-accuracy'], name='leaderboard_period_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start', 'user'), name='unique_leaderboard_period_per_user')],
+            },
+        ),
+        migrations.RunPython(backfill_current_periods, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_peer_counts(apps, schema_editor):
+    # rebuild_quiz_peer_counts at the time of this migration; the receivers only apply deltas
+    Attempt = apps.get_model('Quizez', 'Attempt')
+    QuizPeerCounts = apps.get_model('dashboard', 'QuizPeerCounts')
+
+    rows = (
+        Attempt.objects
+        .filter(user__isnull=False)
+        .values('quiz_id')
+        .annotate(
+            ongoing_users=Count('user', filter=Q(is_completed=False), distinct=True),
+            completed_users=Count('user', filter=Q(is_completed=True), distinct=True),
+        )
+        .order_by()
+    )
+    QuizPeerCounts.objects.bulk_create([QuizPeerCounts(**row) for row in rows.iterator()], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0010_explanation_answer_explanation'),
+        ('dashboard', '0002_leaderboardperiodentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizPeerCounts',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='peer_counts', serialize=False, to='Quizez.quiz')),
+                ('ongoing_users', models.PositiveIntegerField(default=0)),
+                ('completed_users', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Quiz peer counts',
+            },
+        ),
+        migrations.RunPython(backfill_peer_counts, migrations.RunPython.noop),
+    ]
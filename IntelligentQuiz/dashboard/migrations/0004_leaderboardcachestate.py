@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:10
+
+import time
+
+from django.db import migrations, models
+
+
+def create_state_row(apps, schema_editor):
+    # dashboard.cache creates the row on demand too; seeding it keeps that off the first request
+    LeaderboardCacheState = apps.get_model('dashboard', 'LeaderboardCacheState')
+    LeaderboardCacheState.objects.get_or_create(pk=1, defaults={'version': time.time_ns() // 1000})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_quizpeercounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardCacheState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(help_text='Bumped whenever leaderboard totals change')),
+                ('hits', models.PositiveBigIntegerField(default=0)),
+                ('stale', models.PositiveBigIntegerField(default=0)),
+                ('early', models.PositiveBigIntegerField(default=0, help_text='Fresh pages rebuilt early to avoid a stampede at expiry')),
+                ('misses', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_state_row, migrations.RunPython.noop),
+    ]
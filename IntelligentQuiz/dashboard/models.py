@@ -1,3 +1,182 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+
+class LeaderboardTotals(models.Model):
+	"""Running leaderboard totals shared by the all-time and per-period read models."""
+	total_score = models.PositiveIntegerField(default=0)
+	total_possible = models.PositiveIntegerField(default=0)
+	total_quizzes = models.PositiveIntegerField(default=0)
+	total_time = models.PositiveIntegerField(default=0, help_text="Total time taken in seconds")
+	perfect_scores = models.PositiveIntegerField(default=0)
+	# Stored (rather than derived) so it can take part in the ranking index
+	accuracy = models.FloatField(default=0, help_text="total_score / total_possible as a percentage")
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		abstract = True
+
+	def add_attempt(self, attempt) -> None:
+		"""Fold a newly completed attempt into the running totals."""
+		self.total_score += attempt.weighted_score
+		self.total_possible += attempt.max_score
+		self.total_quizzes += 1
+		self.total_time += attempt.time_taken or 0
+		if attempt.max_score > 0 and attempt.weighted_score == attempt.max_score:
+			self.perfect_scores += 1
+		self.refresh_accuracy()
+
+	def refresh_accuracy(self) -> None:
+		self.accuracy = round((self.total_score / self.total_possible) * 100, 1) if self.total_possible else 0
+
+	@property
+	def avg_score(self) -> float:
+		return round(self.total_score / self.total_quizzes, 1) if self.total_quizzes else 0
+
+	@staticmethod
+	def aggregate_attempts(attempts):
+		"""Group completed attempts per user into dicts keyed like the totals fields."""
+		return (
+			attempts
+			.values('user_id')
+			.annotate(
+				total_score=Coalesce(Sum('weighted_score'), 0),
+				total_possible=Coalesce(Sum('max_score'), 0),
+				total_quizzes=Count('id'),
+				total_time=Coalesce(Sum('time_taken'), 0),
+				perfect_scores=Count('id', filter=Q(max_score__gt=0, weighted_score=F('max_score'))),
+			)
+			.order_by()
+		)
+
+
+class LeaderboardEntry(LeaderboardTotals):
+	"""Materialized per-user leaderboard totals.
+
+	Rows are updated incrementally by the ``attempt_completed`` receiver in
+	``dashboard.signals`` and can be rebuilt with ``manage.py rebuild_leaderboard``.
+	"""
+	user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True, on_delete=models.CASCADE, related_name='leaderboard_entry')
+
+	class Meta:
+		verbose_name_plural = 'Leaderboard entries'
+		indexes = [
+			models.Index(fields=['-total_score', '-accuracy'], name='leaderboard_rank_idx'),
+		]
+
+	def __str__(self) -> str:
+		return f"{self.user} - {self.total_score} pts"
+
+
+class LeaderboardPeriodEntry(LeaderboardTotals):
+	"""Per-user totals bucketed by ISO week or calendar month of completion.
+
+	A new bucket starts as soon as an attempt completes in a new period, so the
+	"this week"/"this month" leaderboards only ever read the current partition.
+	Historical buckets are built by ``manage.py backfill_leaderboard_periods``.
+	"""
+	PERIOD_WEEK = 'week'
+	PERIOD_MONTH = 'month'
+	PERIOD_CHOICES = [
+		(PERIOD_WEEK, 'Week'),
+		(PERIOD_MONTH, 'Month'),
+	]
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='leaderboard_periods')
+	period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+	period_start = models.DateField(help_text="Monday of the ISO week, or the first day of the month")
+
+	class Meta:
+		verbose_name_plural = 'Leaderboard period entries'
+		constraints = [
+			models.UniqueConstraint(fields=['period', 'period_start', 'user'], name='unique_leaderboard_period_per_user'),
+		]
+		indexes = [
+			models.Index(fields=['period', 'period_start', '-total_score', '-accuracy'], name='leaderboard_period_rank_idx'),
+		]
+
+	def __str__(self) -> str:
+		return f"{self.user} - {self.period} of {self.period_start} - {self.total_score} pts"
+
+	@classmethod
+	def period_start_for(cls, period: str, when=None):
+		"""Return the bucket start date containing ``when`` (defaults to now)."""
+		day = timezone.localtime(when).date() if when else timezone.localdate()
+		if period == cls.PERIOD_WEEK:
+			return day - timedelta(days=day.weekday())
+		return day.replace(day=1)
+
+	@classmethod
+	def next_period_start(cls, period: str, start):
+		if period == cls.PERIOD_WEEK:
+			return start + timedelta(days=7)
+		return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class QuizPeerCounts(models.Model):
+	"""Distinct users currently ongoing on / having completed each quiz.
+
+	Maintained by the attempt start/completion receivers in ``dashboard.signals`` so the
+	history page reads peer counts by primary key instead of grouping over attempts.
+	"""
+	quiz = models.OneToOneField('Quizez.Quiz', primary_key=True, on_delete=models.CASCADE, related_name='peer_counts')
+	ongoing_users = models.PositiveIntegerField(default=0)
+	completed_users = models.PositiveIntegerField(default=0)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		verbose_name_plural = 'Quiz peer counts'
+
+	def __str__(self) -> str:
+		return f"{self.quiz} - {self.ongoing_users} ongoing / {self.completed_users} completed"
+
+	@classmethod
+	def bump(cls, quiz_id, ongoing: int = 0, completed: int = 0) -> None:
+		"""Atomically adjust the counters for ``quiz_id``, creating the row if needed."""
+		cls.objects.get_or_create(quiz_id=quiz_id)
+		changes = {}
+		if ongoing:
+			changes['ongoing_users'] = Greatest(F('ongoing_users') + ongoing, 0)
+		if completed:
+			changes['completed_users'] = Greatest(F('completed_users') + completed, 0)
+		if changes:
+			cls.objects.filter(quiz_id=quiz_id).update(**changes)
+
+	@classmethod
+	def peers_for(cls, user, quiz_ids):
+		"""Return ``(ongoing, completed)`` dicts of other users per quiz, excluding ``user``."""
+		if not quiz_ids:
+			return {}, {}
+		counts = {c.quiz_id: c for c in cls.objects.filter(quiz_id__in=quiz_ids)}
+		own = set(
+			user.quiz_attempts
+			.filter(quiz_id__in=quiz_ids)
+			.values_list('quiz_id', 'is_completed')
+			.distinct()
+		)
+		ongoing, completed = {}, {}
+		for quiz_id, c in counts.items():
+			ongoing[quiz_id] = max(0, c.ongoing_users - ((quiz_id, False) in own))
+			completed[quiz_id] = max(0, c.completed_users - ((quiz_id, True) in own))
+		return ongoing, completed
+
+
+class LeaderboardCacheState(models.Model):
+	"""Single row with the leaderboard cache version and its counters (see ``dashboard.cache``).
+
+	Kept in the database rather than the cache so a bump and the counters are shared by
+	every worker and management command, whatever the cache backend.
+	"""
+	version = models.BigIntegerField(help_text="Bumped whenever leaderboard totals change")
+	hits = models.PositiveBigIntegerField(default=0)
+	stale = models.PositiveBigIntegerField(default=0)
+	early = models.PositiveBigIntegerField(default=0, help_text="Fresh pages rebuilt early to avoid a stampede at expiry")
+	misses = models.PositiveBigIntegerField(default=0)
 
-# Create your models here.
+	def __str__(self) -> str:
+		return f"leaderboard cache version {self.version}"
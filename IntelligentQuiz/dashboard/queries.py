@@ -0,0 +1,125 @@
+"""Query helpers shared by the dashboard views, the exports in ``dashboard.exports`` and
+``manage.py export_quiz_data``: the filtered and sorted attempt history, and the
+leaderboard standings with their rank order.
+"""
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+
+from Quizez import search as quiz_search
+from Quizez.models import Attempt
+from .models import LeaderboardEntry, LeaderboardPeriodEntry
+
+# Keyset per sort mode: (column, descending). Ties are broken by id in the same direction.
+HISTORY_SORTS = {
+	'date': ('started_at', False),
+	'-date': ('started_at', True),
+	'score': ('percent', False),
+	'-score': ('percent', True),
+	'time': ('time_secs', False),
+	'-time': ('time_secs', True),
+}
+
+
+def history_filters(request) -> dict:
+	return {
+		'q': (request.GET.get('q') or '').strip(),
+		'category': request.GET.get('category') or '',
+		'status': request.GET.get('status') or '',  # 'completed' | 'ongoing' | ''(both)
+		'sort': request.GET.get('sort') if request.GET.get('sort') in HISTORY_SORTS else '-date',
+	}
+
+
+def history_attempts(user, filters):
+	"""The user's attempts matching search/category, annotated with the sortable time column.
+
+	``user=None`` matches every user's attempts (used by the exports).
+	"""
+	attempts = (
+		Attempt.objects
+		.select_related('quiz__category')
+		.annotate(time_secs=Coalesce('time_taken', 0))
+	)
+	if user is not None:
+		attempts = attempts.filter(user=user)
+	# Search by quiz title, description or category names (full-text where available)
+	if filters['q']:
+		attempts = quiz_search.filter_quizzes(attempts, filters['q'], prefix='quiz__')
+	# Filter by category
+	if filters['category']:
+		try:
+			attempts = attempts.filter(quiz__category_id=int(filters['category']))
+		except (TypeError, ValueError):
+			pass
+	column, descending = HISTORY_SORTS[filters['sort']]
+	if descending:
+		return attempts.order_by(F(column).desc(), F('id').desc())
+	return attempts.order_by(F(column).asc(), F('id').asc())
+
+
+LEADERBOARD_FIELDS = ('user_id', 'total_score', 'total_possible', 'total_quizzes', 'total_time', 'perfect_scores', 'accuracy')
+# Ties on (total_score, accuracy) share a rank; user_id only makes page boundaries stable
+LEADERBOARD_RANK_ORDER = [F('total_score').desc(), F('accuracy').desc()]
+LEADERBOARD_ORDER = LEADERBOARD_RANK_ORDER + [F('user_id').asc()]
+
+
+def leaderboard_standings(filter_type: str):
+	"""Return ``(filter_type, period_label, period_start, standings)`` for a leaderboard filter.
+
+	``standings`` is an unordered values queryset of ``LEADERBOARD_FIELDS`` for users with at
+	least one completed quiz; unknown filters fall back to all time.
+	"""
+	# Pick the standings source: the current weekly/monthly bucket, or all-time totals
+	if filter_type == 'this_week':
+		period = LeaderboardPeriodEntry.PERIOD_WEEK
+		period_label = 'This Week'
+	elif filter_type == 'this_month':
+		period = LeaderboardPeriodEntry.PERIOD_MONTH
+		period_label = 'This Month'
+	else:  # all_time
+		filter_type = 'all_time'
+		period = None
+		period_label = 'All Time'
+
+	if period is None:
+		standings = LeaderboardEntry.objects.all()
+		period_start = None
+	else:
+		period_start = LeaderboardPeriodEntry.period_start_for(period)
+		standings = LeaderboardPeriodEntry.objects.filter(period=period, period_start=period_start)
+	return filter_type, period_label, period_start, standings.filter(total_quizzes__gt=0).values(*LEADERBOARD_FIELDS)
+
+
+def after_cursor(cursor) -> Q:
+	"""Seek predicate: standings strictly after ``cursor`` in ``LEADERBOARD_ORDER``."""
+	total_score, accuracy, user_id = cursor
+	return (
+		Q(total_score__lt=total_score)
+		| Q(total_score=total_score, accuracy__lt=accuracy)
+		| Q(total_score=total_score, accuracy=accuracy, user_id__gt=user_id)
+	)
+
+
+def better_than(row: dict) -> Q:
+	"""Standings strictly better than ``row`` (ties on (total_score, accuracy) share a rank)."""
+	return Q(total_score__gt=row['total_score']) | Q(total_score=row['total_score'], accuracy__gt=row['accuracy'])
+
+
+def rank_of(standings, row: dict) -> int:
+	"""Rank of ``row`` as one count of strictly better standings (same semantics as RANK())."""
+	return standings.filter(better_than(row)).count() + 1
+
+
+def with_ranks(rows, rank: int = 1, position: int = 1):
+	"""Yield ``(row, rank)`` for rows in ``LEADERBOARD_ORDER`` with RANK() semantics.
+
+	The first row has ``rank`` and sits at ``position``; each later row either ties with the
+	previous one or is ranked at its own position.
+	"""
+	previous = None
+	for position, row in enumerate(rows, start=position):
+		# Rows arrive in rank order, so a tie is simply the same key as the previous row
+		key = (row['total_score'], row['accuracy'])
+		if previous is not None and key != previous:
+			rank = position
+		previous = key
+		yield row, rank
@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from Quizez.models import Attempt
+from Quizez.signals import attempt_completed
+
+from . import cache as leaderboard_cache
+from .models import LeaderboardEntry, LeaderboardPeriodEntry, QuizPeerCounts
+
+
+@receiver(attempt_completed, sender=Attempt)
+def update_leaderboard_entry(sender, attempt, **kwargs):
+	"""Add a finished attempt to its user's leaderboard rows (runs inside the completing transaction)."""
+	if attempt.user_id is None:
+		return
+	entry, _ = LeaderboardEntry.objects.select_for_update().get_or_create(user_id=attempt.user_id)
+	entry.add_attempt(attempt)
+	entry.save()
+
+	for period, _label in LeaderboardPeriodEntry.PERIOD_CHOICES:
+		bucket, _ = LeaderboardPeriodEntry.objects.select_for_update().get_or_create(
+			user_id=attempt.user_id,
+			period=period,
+			period_start=LeaderboardPeriodEntry.period_start_for(period, attempt.completed_at),
+		)
+		bucket.add_attempt(attempt)
+		bucket.save()
+
+	# Only invalidate once the new totals are visible to the workers that will rebuild
+	transaction.on_commit(leaderboard_cache.bump_version)
+
+
+@receiver(post_save, sender=Attempt)
+def count_started_attempt(sender, instance, created, **kwargs):
+	"""A user starting their first in-progress attempt on a quiz becomes an ongoing peer."""
+	if not created or instance.user_id is None or instance.is_completed:
+		return
+	others = Attempt.objects.filter(user_id=instance.user_id, quiz_id=instance.quiz_id, is_completed=False).exclude(pk=instance.pk)
+	if not others.exists():
+		QuizPeerCounts.bump(instance.quiz_id, ongoing=1)
+
+
+@receiver(attempt_completed, sender=Attempt)
+def count_completed_attempt(sender, attempt, **kwargs):
+	"""Move the user from ongoing to completed peers of the quiz, once per user."""
+	if attempt.user_id is None:
+		return
+	mine = Attempt.objects.filter(user_id=attempt.user_id, quiz_id=attempt.quiz_id).exclude(pk=attempt.pk)
+	still_ongoing = mine.filter(is_completed=False).exists()
+	completed_before = mine.filter(is_completed=True).exists()
+	QuizPeerCounts.bump(
+		attempt.quiz_id,
+		ongoing=0 if still_ongoing else -1,
+		completed=0 if completed_before else 1,
+	)
@@ -1,3 +1,432 @@
+import csv
+import json
+import time
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F, Window
+from django.db.models.functions import Rank
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from Quizez.models import Attempt, Category, Quiz
+from Quizez.tests import complete_attempt, make_quiz
+from users.models import Achievement
+from . import cache as leaderboard_cache
+from .models import LeaderboardCacheState, LeaderboardEntry, LeaderboardPeriodEntry, QuizPeerCounts
+from .queries import HISTORY_SORTS
+from .views import LEADERBOARD_SIZE, RECENT_SCORES_PER_CATEGORY
+
+
+TOTALS_FIELDS = ('user_id', 'total_score', 'total_possible', 'total_quizzes', 'total_time', 'perfect_scores', 'accuracy')
+
+
+class LeaderboardEntryTests(TestCase):
+	"""LeaderboardEntry follows every completion and agrees with a rebuild from attempts."""
+
+	def setUp(self):
+		cache.clear()
+		self.alice = User.objects.create_user('alice', password='pw')
+		self.bob = User.objects.create_user('bob', password='pw')
+		self.quiz = make_quiz('Forces', points=(1, 1, 2))
+
+	def test_completion_adds_to_the_entry(self):
+		complete_attempt(self.alice, self.quiz, (True, True, True), time_taken=40)
+		complete_attempt(self.alice, self.quiz, (True, False, None), time_taken=20)
+		entry = LeaderboardEntry.objects.get(user=self.alice)
+		self.assertEqual(
+			(entry.total_score, entry.total_possible, entry.total_quizzes, entry.total_time, entry.perfect_scores),
+			(5, 8, 2, 60, 1),
+		)
+		self.assertEqual(entry.accuracy, 62.5)
+		self.assertFalse(LeaderboardEntry.objects.filter(user=self.bob).exists())
+
+	def test_rebuild_matches_the_incremental_rows(self):
+		complete_attempt(self.alice, self.quiz, (True, False, True))
+		complete_attempt(self.bob, self.quiz, (False, False, True))
+		complete_attempt(self.bob, self.quiz, (True, True, True))
+		Attempt.objects.create(user=self.alice, quiz=self.quiz)
+		incremental = list(LeaderboardEntry.objects.order_by('user_id').values(*TOTALS_FIELDS))
+		LeaderboardEntry.objects.all().delete()
+		call_command('rebuild_leaderboard', stdout=StringIO())
+		self.assertEqual(list(LeaderboardEntry.objects.order_by('user_id').values(*TOTALS_FIELDS)), incremental)
+
+	def test_leaderboard_orders_by_score(self):
+		complete_attempt(self.alice, self.quiz, (True, False, False))
+		complete_attempt(self.bob, self.quiz, (True, True, True))
+		rows = self.client.get(reverse('leaderboard')).context['users_data']
+		self.assertEqual([(row['user'], row['rank']) for row in rows], [(self.bob, 1), (self.alice, 2)])
+
+	def test_migration_backfills_attempts_finished_before_it(self):
+		# Rows from before the table existed: legacy score/total, no signal sent
+		Attempt.objects.create(user=self.alice, quiz=self.quiz, score=3, total=3, time_taken=30, is_completed=True)
+		Attempt.objects.create(user=self.alice, quiz=self.quiz, score=1, total=3, time_taken=10, is_completed=True)
+		Attempt.objects.create(user=self.bob, quiz=self.quiz, score=2, total=3)
+		import_module('dashboard.migrations.0001_initial').backfill_leaderboard(apps, None)
+		entry = LeaderboardEntry.objects.get(user=self.alice)
+		self.assertEqual(
+			(entry.total_score, entry.total_possible, entry.total_quizzes, entry.total_time, entry.perfect_scores),
+			(4, 6, 2, 40, 1),
+		)
+		self.assertEqual(entry.accuracy, 66.7)
+		self.assertFalse(LeaderboardEntry.objects.filter(user=self.bob).exists())
+
+
+class LeaderboardPeriodTests(TestCase):
+	"""Completions land in the current week and month buckets; history is rebuilt per period."""
+
+	def setUp(self):
+		cache.clear()
+		self.alice = User.objects.create_user('alice', password='pw')
+		self.bob = User.objects.create_user('bob', password='pw')
+		self.quiz = make_quiz('Forces', points=(1, 1, 2))
+
+	def buckets(self, user):
+		return {
+			(bucket.period, bucket.period_start): (bucket.total_score, bucket.total_quizzes)
+			for bucket in LeaderboardPeriodEntry.objects.filter(user=user)
+		}
+
+	def test_completion_lands_in_the_current_buckets(self):
+		complete_attempt(self.alice, self.quiz, (True, True, False))
+		complete_attempt(self.alice, self.quiz, (True, False, True))
+		self.assertEqual(self.buckets(self.alice), {
+			('week', LeaderboardPeriodEntry.period_start_for('week')): (5, 2),
+			('month', LeaderboardPeriodEntry.period_start_for('month')): (5, 2),
+		})
+
+	def test_period_filter_reads_only_the_current_bucket(self):
+		complete_attempt(self.alice, self.quiz, (True, True, True))
+		complete_attempt(self.bob, self.quiz, (True, False, False))
+		# Alice's old bucket is out of this week's standings
+		LeaderboardPeriodEntry.objects.filter(user=self.alice, period='week').update(
+			period_start=LeaderboardPeriodEntry.period_start_for('week') - timedelta(days=7),
+		)
+		rows = self.client.get(reverse('leaderboard'), {'filter': 'this_week'}).context['users_data']
+		self.assertEqual([row['user'] for row in rows], [self.bob])
+
+	def test_backfill_command_rebuilds_past_buckets(self):
+		old = complete_attempt(self.alice, self.quiz, (True, True, True))
+		complete_attempt(self.alice, self.quiz, (True, False, False))
+		nine_days_ago = timezone.now() - timedelta(days=9)
+		Attempt.objects.filter(pk=old.pk).update(completed_at=nine_days_ago)
+		LeaderboardPeriodEntry.objects.all().delete()
+
+		call_command('backfill_leaderboard_periods', period='week', stdout=StringIO())
+		this_week = LeaderboardPeriodEntry.period_start_for('week')
+		past_week = LeaderboardPeriodEntry.period_start_for('week', nine_days_ago)
+		self.assertEqual(self.buckets(self.alice), {('week', past_week): (4, 1), ('week', this_week): (1, 1)})
+
+	def test_migration_backfills_the_current_week_and_month(self):
+		Attempt.objects.create(user=self.alice, quiz=self.quiz, score=2, total=3, is_completed=True)
+		old = Attempt.objects.create(user=self.alice, quiz=self.quiz, score=3, total=3, is_completed=True)
+		Attempt.objects.filter(pk=old.pk).update(completed_at=timezone.now() - timedelta(days=40))
+		import_module('dashboard.migrations.0002_leaderboardperiodentry').backfill_current_periods(apps, None)
+		self.assertEqual(self.buckets(self.alice), {
+			('week', LeaderboardPeriodEntry.period_start_for('week')): (2, 1),
+			('month', LeaderboardPeriodEntry.period_start_for('month')): (2, 1),
+		})
+
+
+class HomeCategoryCardTests(TestCase):
+	"""Home category cards aggregate only the viewer's completed attempts per category."""
+
+	def setUp(self):
+		cache.clear()
+		self.alice = User.objects.create_user('alice', password='pw')
+		self.science = Category.objects.create(name='Science')
+		self.history = Category.objects.create(name='History')
+		self.quiz = make_quiz('Forces', points=(1, 1, 2), category=self.science)
+		make_quiz('Rome', category=self.history)
+		self.client.force_login(self.alice)
+
+	def cards(self):
+		return {card['name']: card for card in self.client.get(reverse('home')).context['category_stats']}
+
+	def test_cards_aggregate_completed_attempts(self):
+		complete_attempt(self.alice, self.quiz, (True, True, True), time_taken=90)
+		complete_attempt(self.alice, self.quiz, (True, False, None), time_taken=30)
+		complete_attempt(User.objects.create_user('bob', password='pw'), self.quiz, (False, False, False))
+		Attempt.objects.create(user=self.alice, quiz=self.quiz)
+		science = self.cards()['Science']
+		self.assertEqual((science['count'], science['avg_score'], science['avg_total']), (2, 2.5, 4))
+		self.assertEqual((science['percent'], science['best_score'], science['time_spent']), (62, 100, '2m 0s'))
+		self.assertEqual(science['recent_scores'], [25, 100])
+		self.assertEqual((self.cards()['History']['count'], self.cards()['History']['recent_scores']), (0, []))
+
+	def test_recent_scores_are_the_latest_few(self):
+		for correct in [(True, True, True)] * 2 + [(False, False, True)] * RECENT_SCORES_PER_CATEGORY:
+			complete_attempt(self.alice, self.quiz, correct)
+		self.assertEqual(self.cards()['Science']['recent_scores'], [50] * RECENT_SCORES_PER_CATEGORY)
+
+
+class StatsPageTests(TestCase):
+	"""The stats page reads totals from the snapshot and earned achievements from their rows."""
+
+	def setUp(self):
+		self.alice = User.objects.create_user('alice', password='pw')
+		self.quiz = make_quiz('Forces')
+		self.client.force_login(self.alice)
+
+	def test_stats_and_achievements(self):
+		Achievement.objects.update(is_active=False)
+		Achievement.objects.create(code='test-first', title='First', metric='total_attempts', threshold=1)
+		Achievement.objects.create(code='test-many', title='Many', metric='total_attempts', threshold=5)
+		complete_attempt(self.alice, self.quiz, (True, True, True), time_taken=3700)
+		complete_attempt(self.alice, self.quiz, (True, False, False), time_taken=20)
+		context = self.client.get(reverse('dashboard_stats')).context
+		self.assertEqual(context['stats']['total_attempts'], 2)
+		self.assertEqual(context['stats']['avg_score'], 66)
+		self.assertEqual((context['stats']['time_spent'], context['stats']['time_spent_secs']), ('1h 02m', 3720))
+		self.assertEqual(context['stats']['streak'], 1)
+		self.assertEqual([(a['title'], a['earned']) for a in context['achievements']], [('First', True), ('Many', False)])
+
+	def test_empty_stats(self):
+		context = self.client.get(reverse('dashboard_stats')).context
+		self.assertEqual((context['stats']['total_attempts'], context['stats']['time_spent']), (0, '0m 00s'))
+
+
+class QuizPeerCountsTests(TestCase):
+	"""Peer counters count distinct users per quiz and can be rebuilt from attempts."""
+
+	def setUp(self):
+		self.alice = User.objects.create_user('alice', password='pw')
+		self.bob = User.objects.create_user('bob', password='pw')
+		self.carol = User.objects.create_user('carol', password='pw')
+		self.quiz = make_quiz('Forces')
+
+	def counts(self):
+		return QuizPeerCounts.objects.filter(quiz=self.quiz).values_list('ongoing_users', 'completed_users').first()
+
+	def test_start_counts_each_user_once(self):
+		Attempt.objects.create(user=self.alice, quiz=self.quiz)
+		Attempt.objects.create(user=self.alice, quiz=self.quiz)
+		Attempt.objects.create(user=self.bob, quiz=self.quiz)
+		self.assertEqual(self.counts(), (2, 0))
+
+	def test_completion_moves_the_user_to_completed(self):
+		Attempt.objects.create(user=self.bob, quiz=self.quiz)
+		complete_attempt(self.alice, self.quiz, (True, True, True))
+		complete_attempt(self.alice, self.quiz, (True, False, True))
+		self.assertEqual(self.counts(), (1, 1))
+
+	def test_peers_exclude_the_viewer(self):
+		complete_attempt(self.alice, self.quiz, (True, True, True))
+		Attempt.objects.create(user=self.alice, quiz=self.quiz)
+		Attempt.objects.create(user=self.bob, quiz=self.quiz)
+		complete_attempt(self.carol, self.quiz, (True, True, True))
+		ongoing, completed = QuizPeerCounts.peers_for(self.alice, {self.quiz.pk})
+		self.assertEqual((ongoing[self.quiz.pk], completed[self.quiz.pk]), (1, 1))
+		ongoing, completed = QuizPeerCounts.peers_for(self.bob, {self.quiz.pk})
+		self.assertEqual((ongoing[self.quiz.pk], completed[self.quiz.pk]), (1, 2))
+
+	def test_rebuild_matches_the_incremental_counts(self):
+		complete_attempt(self.alice, self.quiz, (True, True, True))
+		Attempt.objects.create(user=self.alice, quiz=self.quiz)
+		Attempt.objects.create(user=self.bob, quiz=self.quiz)
+		complete_attempt(self.carol, self.quiz, (True, True, True))
+		incremental = self.counts()
+		QuizPeerCounts.objects.all().delete()
+		call_command('rebuild_quiz_peer_counts', stdout=StringIO())
+		self.assertEqual(self.counts(), incremental)
+
+	def test_migration_seeds_the_counts(self):
+		Attempt.objects.create(user=self.alice, quiz=self.quiz, is_completed=True)
+		Attempt.objects.create(user=self.bob, quiz=self.quiz)
+		Attempt.objects.create(user=self.bob, quiz=self.quiz)
+		QuizPeerCounts.objects.all().delete()
+		import_module('dashboard.migrations.0003_quizpeercounts').backfill_peer_counts(apps, None)
+		self.assertEqual(self.counts(), (1, 1))
+
+
+class ExportTests(TestCase):
+	"""Leaderboard and history exports stream every row, in CSV or JSON Lines."""
+
+	def setUp(self):
+		self.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+		self.alice = User.objects.create_user('alice', password='pw')
+		self.bob = User.objects.create_user('bob', password='pw')
+		self.quiz = make_quiz('Forces')
+		complete_attempt(self.alice, self.quiz, (True, True, False))
+		complete_attempt(self.bob, self.quiz, (True, True, False))
+		complete_attempt(self.staff, self.quiz, (True, True, True))
+		Attempt.objects.create(user=self.alice, quiz=self.quiz)
+
+	def export(self, name, **params):
+		response = self.client.get(reverse(name), params)
+		self.assertEqual(response.status_code, 200)
+		return b''.join(response.streaming_content).decode()
+
+	def test_leaderboard_csv(self):
+		self.client.force_login(self.staff)
+		rows = list(csv.DictReader(self.export('export_leaderboard').splitlines()))
+		self.assertEqual([(row['rank'], row['username']) for row in rows], [('1', 'staff'), ('2', 'alice'), ('2', 'bob')])
+		self.assertEqual((rows[1]['total_score'], rows[1]['total_possible']), ('2', '3'))
+
+	def test_leaderboard_jsonl(self):
+		self.client.force_login(self.staff)
+		rows = [json.loads(line) for line in self.export('export_leaderboard', format='jsonl').splitlines()]
+		self.assertEqual([row['username'] for row in rows], ['staff', 'alice', 'bob'])
+		self.assertEqual(rows[0]['accuracy'], 100.0)
+
+	def test_leaderboard_is_staff_only(self):
+		self.client.force_login(self.alice)
+		self.assertEqual(self.client.get(reverse('export_leaderboard')).status_code, 302)
+
+	def test_unknown_format(self):
+		self.client.force_login(self.staff)
+		self.assertEqual(self.client.get(reverse('export_leaderboard'), {'format': 'xml'}).status_code, 404)
+
+	def test_history_is_the_viewers_own(self):
+		self.client.force_login(self.alice)
+		rows = list(csv.DictReader(self.export('export_history').splitlines()))
+		self.assertEqual({row['username'] for row in rows}, {'alice'})
+		self.assertEqual(sorted(row['status'] for row in rows), ['completed', 'ongoing'])
+		rows = list(csv.DictReader(self.export('export_history', status='completed').splitlines()))
+		self.assertEqual([(row['status'], row['percent']) for row in rows], [('completed', '67')])
+
+	def test_history_of_another_user(self):
+		self.client.force_login(self.alice)
+		self.assertEqual(self.client.get(reverse('export_history'), {'user': 'bob'}).status_code, 403)
+		self.client.force_login(self.staff)
+		rows = [json.loads(line) for line in self.export('export_history', user='bob', format='jsonl').splitlines()]
+		self.assertEqual([(row['username'], row['status']) for row in rows], [('bob', 'completed')])
+
+	def test_command_exports_every_users_history(self):
+		out = StringIO()
+		call_command('export_quiz_data', 'history', status='completed', format='jsonl', stdout=out)
+		rows = [json.loads(line) for line in out.getvalue().splitlines()]
+		self.assertEqual(sorted(row['username'] for row in rows), ['alice', 'bob', 'staff'])
+		out = StringIO()
+		call_command('export_quiz_data', 'leaderboard', stdout=out)
+		self.assertEqual(len(list(csv.DictReader(out.getvalue().splitlines()))), 3)
+
+
+class HistoryCursorTests(TestCase):
+	"""A malformed ``after`` cursor is ignored on every sort, never a server error."""
+
+	def setUp(self):
+		self.user = User.objects.create_user('alice', password='pw')
+		quiz = Quiz.objects.create(title='Forces')
+		Attempt.objects.create(user=self.user, quiz=quiz, total=3, is_completed=True, percent=50)
+		self.client.force_login(self.user)
+
+	def test_tampered_cursor_is_treated_as_missing(self):
+		tampered = urlsafe_b64encode(json.dumps(['not-a-value', 1]).encode()).decode()
+		for sort in HISTORY_SORTS:
+			for name in ('quiz_history', 'quiz_history_items'):
+				response = self.client.get(reverse(name), {'sort': sort, 'after': tampered})
+				self.assertEqual(response.status_code, 200, (name, sort))
+
+
+class LeaderboardPagingTests(TestCase):
+	"""Keyset pages number ranks like RANK() over the whole standings, ties across page edges included."""
+
+	def setUp(self):
+		cache.clear()
+		self.users = [User.objects.create(username=f'player{i}') for i in range(LEADERBOARD_SIZE * 2 + 10)]
+		# Pairs tie on (total_score, accuracy), so a tie straddles the first page boundary
+		LeaderboardEntry.objects.bulk_create([
+			LeaderboardEntry(user=user, total_score=1000 - (i // 3), total_possible=2000, total_quizzes=1, accuracy=50)
+			for i, user in enumerate(self.users)
+		])
+
+	def walk(self):
+		ranks, users, after = [], [], None
+		while True:
+			params = {'after': after} if after else {}
+			response = self.client.get(reverse('leaderboard'), params)
+			rows = response.context['users_data']
+			self.assertEqual(response.context['page_start'], len(ranks) + 1)
+			ranks += [row['rank'] for row in rows]
+			users += [row['user'].id for row in rows]
+			after = response.context['next_cursor']
+			if not after:
+				return ranks, users
+
+	def test_ranks_match_rank_semantics(self):
+		ranks, users = self.walk()
+		self.assertEqual(users, [user.id for user in self.users])
+		self.assertEqual(ranks, [(i // 3) * 3 + 1 for i in range(len(self.users))])
+
+	def test_ranks_match_a_window_rank_across_page_breaks(self):
+		# Same score, lower accuracy: page 2 opens on a rank of its own right after a tie,
+		# while a pair still ties across the break between pages 2 and 3
+		LeaderboardEntry.objects.filter(user__in=[self.users[50], self.users[101]]).update(accuracy=40)
+		expected = dict(
+			LeaderboardEntry.objects
+			.annotate(rank=Window(Rank(), order_by=[F('total_score').desc(), F('accuracy').desc()]))
+			.values_list('user_id', 'rank')
+		)
+		ranks, users = self.walk()
+		self.assertEqual(ranks, [expected[user_id] for user_id in users])
+		self.assertEqual(len(users), len(self.users))
+
+	def test_malformed_cursor_serves_the_first_page(self):
+		response = self.client.get(reverse('leaderboard'), {'after': 'garbage'})
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.context['page_start'], 1)
+
+
+class LeaderboardCacheTests(TestCase):
+	"""The version and counters are shared through the database row; pages are built under a lock."""
+
+	def setUp(self):
+		cache.clear()
+		leaderboard_cache.reset_stats()
+		self.builds = 0
+
+	def build(self):
+		self.builds += 1
+		return {'build': self.builds}
+
+	def test_bump_from_another_worker_invalidates_at_once(self):
+		self.assertEqual(leaderboard_cache.get_page('p', self.build), {'build': 1})
+		self.assertEqual(leaderboard_cache.get_page('p', self.build), {'build': 1})
+		# Another process bumping only touches the row, never this process's cache
+		LeaderboardCacheState.objects.filter(pk=1).update(version=F('version') + 1)
+		self.assertEqual(leaderboard_cache.get_page('p', self.build), {'build': 2})
+
+	def test_counters_are_written_to_the_shared_row(self):
+		leaderboard_cache.get_page('p', self.build)
+		leaderboard_cache.get_page('p', self.build)
+		leaderboard_cache.flush_stats()
+		row = LeaderboardCacheState.objects.get(pk=1)
+		self.assertEqual((row.hits, row.misses), (1, 1))
+		self.assertEqual(leaderboard_cache.stats(), {'hits': 1, 'stale': 0, 'early': 0, 'misses': 1})
+
+	def test_cold_miss_waits_for_the_lock_holder(self):
+		cache.add('leaderboard:page:p:lock', 1)
+		landed = {'version': leaderboard_cache.current_version(), 'soft_expires': time.time() + 60, 'delta': 0, 'data': 'theirs'}
+		with mock.patch.object(leaderboard_cache, '_wait_for', return_value=landed) as wait:
+			self.assertEqual(leaderboard_cache.get_page('p', self.build), 'theirs')
+		wait.assert_called_once()
+		self.assertEqual(self.builds, 0)
+
+	def test_cold_miss_builds_when_the_lock_holder_never_finishes(self):
+		cache.add('leaderboard:page:p:lock', 1)
+		with mock.patch.object(leaderboard_cache, 'LEADERBOARD_LOCK_WAIT', 0.01):
+			self.assertEqual(leaderboard_cache.get_page('p', self.build), {'build': 1})
+		self.assertEqual(leaderboard_cache.stats()['misses'], 1)
 
-# Create your tests here.
+	def test_page_near_expiry_is_refreshed_early(self):
+		cache.set('leaderboard:page:p', {
+			'version': leaderboard_cache.current_version(),
+			'soft_expires': time.time() + 1,
+			'delta': 10,
+			'data': 'old',
+		})
+		with mock.patch.object(leaderboard_cache.random, 'random', return_value=0.5):
+			self.assertEqual(leaderboard_cache.get_page('p', self.build), {'build': 1})
+		self.assertEqual(leaderboard_cache.stats()['early'], 1)
+		# A slow build far from expiry is served as is
+		with mock.patch.object(leaderboard_cache.random, 'random', return_value=0.5):
+			self.assertEqual(leaderboard_cache.get_page('p', self.build), {'build': 1})
@@ -1,9 +1,12 @@
 from django.urls import path
-from . import views
+from . import exports, views
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('history/', views.quiz_history, name='quiz_history'),
+    path('history/items/', views.quiz_history_items, name='quiz_history_items'),
+    path('history/export/', exports.export_history, name='export_history'),
     path('stats/', views.dashboard_stats, name='dashboard_stats'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
+    path('leaderboard/export/', exports.export_leaderboard, name='export_leaderboard'),
 ]
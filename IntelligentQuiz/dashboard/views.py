@@ -1,241 +1,222 @@
+from collections import defaultdict
+
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Count, Avg, Sum, F
+from django.db.models import Q, Count, Avg, Sum, Max, F, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.http import JsonResponse
 from django.shortcuts import render
-from django.utils import timezone
-from datetime import timedelta
+from django.template.loader import render_to_string
+from datetime import datetime
 from django.contrib.auth.models import User
-from Quizez.models import Quiz, Category, Attempt
+from Quizez import taxonomy
+from Quizez.cursors import decode_cursor, encode_cursor
+from Quizez.models import Quiz, Attempt
+from users.models import Achievement, UserStats
+from . import cache as leaderboard_cache
+from .models import QuizPeerCounts
+from .queries import (
+	HISTORY_SORTS,
+	LEADERBOARD_ORDER,
+	after_cursor,
+	better_than,
+	history_attempts,
+	history_filters,
+	leaderboard_standings,
+	rank_of,
+	with_ranks,
+)
+
+
+# Category card palette for the home page breakdown
+CATEGORY_GRADIENTS = [
+	'linear-gradient(135deg,#6366f1,#8b5cf6)',
+	'linear-gradient(135deg,#22c55e,#059669)',
+	'linear-gradient(135deg,#06b6d4,#0284c7)',
+	'linear-gradient(135deg,#f59e0b,#d97706)',
+]
+CATEGORY_EMOJI = {
+	'academic': '📚',
+	'entertainment': '🎬',
+	'general': '🌐',
+	'general knowledge': '🧠',
+	'science': '🔬',
+	'science & technology': '💻',
+	'technology': '💻',
+	'history': '📖',
+	'math': '➗',
+	'sports': '⚽',
+	'programming': '👨‍💻',
+}
+DEFAULT_CATEGORY_EMOJI = '📘'
+HOME_CATEGORY_CARDS = 3
+RECENT_SCORES_PER_CATEGORY = 5
+
+
+def _format_time_spent(total_time: int) -> str:
+	if total_time >= 3600:
+		hours = total_time // 3600
+		mins = (total_time % 3600) // 60
+		return f"{hours}h {mins}m"
+	if total_time >= 60:
+		mins = total_time // 60
+		secs = total_time % 60
+		return f"{mins}m {secs}s"
+	return f"{total_time}s"
+
+
+def _category_performance(user, categories):
+	"""Per-category aggregates and recent scores for ``user`` in two queries.
+
+	Returns ``(stats_by_category_id, recent_scores_by_category_id)``.
+	"""
+	completed = Attempt.objects.filter(
+		user=user,
+		is_completed=True,
+		quiz__category_id__in=[c.id for c in categories],
+	)
+	scored = Q(max_score__gt=0)
+	stats = {
+		r['quiz__category_id']: r
+		for r in completed.values('quiz__category_id').annotate(
+			count=Count('id'),
+			total_score=Coalesce(Sum('weighted_score', filter=scored), 0),
+			total_possible=Coalesce(Sum('max_score', filter=scored), 0),
+			best_score=Coalesce(Max('percent', filter=scored), 0),
+			total_time=Coalesce(Sum('time_taken', filter=scored), 0),
+		).order_by()
+	}
+
+	# Last N scored attempts per category via ROW_NUMBER() partitioned by category
+	recent = defaultdict(list)
+	rows = (
+		completed
+		.filter(scored)
+		.annotate(row=Window(
+			RowNumber(),
+			partition_by=F('quiz__category_id'),
+			order_by=[F('completed_at').desc(), F('id').desc()],
+		))
+		.filter(row__lte=RECENT_SCORES_PER_CATEGORY)
+		.order_by('quiz__category_id', 'row')
+		.values_list('quiz__category_id', 'percent')
+	)
+	for category_id, percent in rows:
+		recent[category_id].append(percent)
+	return stats, recent
 
 
 def home(request):
-	quizzes = Quiz.objects.filter(is_published=True).order_by('-created_at')[:6]
-	categories = Category.objects.all()[:8]
+	quizzes = Quiz.objects.filter(is_published=True).select_related('card').order_by('-created_at')[:6]
+	categories = taxonomy.category_tree()[:8]
 
 	# Build category stats (show first 3 categories in breakdown)
+	selected = categories[:HOME_CATEGORY_CARDS]
+	stats, recent = {}, {}
+	user_stats = None
+	if request.user.is_authenticated:
+		user_stats = UserStats.for_user(request.user)
+		# Users without completed attempts have nothing to aggregate per category
+		if selected and user_stats.total_attempts:
+			stats, recent = _category_performance(request.user, selected)
+
 	category_stats = []
-	selected = list(categories[:3])  # Top 3 categories for dashboard
-	if request.user.is_authenticated and selected:
-		# Simple gradient palette
-		gradients = [
-			'linear-gradient(135deg,#6366f1,#8b5cf6)',
-			'linear-gradient(135deg,#22c55e,#059669)',
-			'linear-gradient(135deg,#06b6d4,#0284c7)',
-			'linear-gradient(135deg,#f59e0b,#d97706)',
-		]
-		emoji_map = {
-			'academic': '📚',
-			'entertainment': '🎬',
-			'general': '🌐',
-			'general knowledge': '🧠',
-			'science': '🔬',
-			'science & technology': '💻',
-			'technology': '💻',
-			'history': '📖',
-			'math': '➗',
-			'sports': '⚽',
-			'programming': '👨‍💻',
-		}
-		for idx, cat in enumerate(selected):
-			# Get all completed attempts for this category
-			completed = (
-				Attempt.objects
-				.select_related('quiz')
-				.filter(user=request.user, is_completed=True, quiz__category=cat)
-				.order_by('-completed_at')
-			)
-			
-			if completed.exists():
-				# Calculate average score per attempt
-				total_score = 0
-				total_possible = 0
-				best_score = 0
-				total_time = 0
-				
-				for attempt in completed:
-					if attempt.total > 0:
-						total_score += attempt.score
-						total_possible += attempt.total
-						# Track best individual score
-						if attempt.score > best_score:
-							best_score = attempt.score
-						if attempt.time_taken:
-							total_time += attempt.time_taken
-				
-				# Calculate average score per quiz
-				count = completed.count()
-				avg_score = round(total_score / count, 1) if count > 0 else 0
-				avg_total = round(total_possible / count, 1) if count > 0 else 0
-				
-				# Get last 5 attempts for trend
-				recent = list(completed[:5])
-				recent_scores = []
-				for r in recent:
-					if r.total > 0:
-						recent_scores.append(int((r.score / r.total) * 100))
-				
-				# Format time spent
-				if total_time >= 3600:
-					hours = total_time // 3600
-					mins = (total_time % 3600) // 60
-					time_display = f"{hours}h {mins}m"
-				elif total_time >= 60:
-					mins = total_time // 60
-					secs = total_time % 60
-					time_display = f"{mins}m {secs}s"
-				else:
-					time_display = f"{total_time}s"
-				
-				category_stats.append({
-					'id': cat.id,
-					'name': cat.name,
-					'slug': cat.slug,
-					'avg_score': avg_score,
-					'avg_total': avg_total,
-					'best_score': best_score,
-					'gradient': gradients[idx % len(gradients)],
-					'emoji': emoji_map.get(cat.slug.lower(), '📘'),
-					'count': count,
-					'time_spent': time_display,
-					'recent_scores': recent_scores,
-				})
-			else:
-				# No attempts yet for this category
-				category_stats.append({
-					'id': cat.id,
-					'name': cat.name,
-					'slug': cat.slug,
-					'avg_score': 0,
-					'avg_total': 0,
-					'best_score': 0,
-					'gradient': gradients[idx % len(gradients)],
-					'emoji': emoji_map.get(cat.slug.lower(), '📘'),
-					'count': 0,
-					'time_spent': '0s',
-					'recent_scores': [],
-				})
-	else:
-		# Fallback empty or zero values if unauthenticated
-		gradients = [
-			'linear-gradient(135deg,#6366f1,#8b5cf6)',
-			'linear-gradient(135deg,#22c55e,#059669)',
-			'linear-gradient(135deg,#06b6d4,#0284c7)',
-			'linear-gradient(135deg,#f59e0b,#d97706)',
-		]
-		emoji_map = {
-			'academic': '📚',
-			'entertainment': '🎬',
-			'general': '🌐',
-			'general knowledge': '🧠',
-			'science': '🔬',
-			'science & technology': '💻',
-			'technology': '💻',
-			'history': '📖',
-			'math': '➗',
-			'sports': '⚽',
-			'programming': '👨‍💻',
-		}
-		for idx, cat in enumerate(selected):
-			category_stats.append({
-				'id': cat.id,
-				'name': cat.name,
-				'slug': cat.slug,
-				'percent': 0,
-				'best_score': 0,
-				'gradient': gradients[idx % len(gradients)],
-				'emoji': emoji_map.get(cat.slug.lower(), '📘'),
-				'count': 0,
-				'time_spent': '0s',
-				'recent_scores': [],
-			})
+	for idx, cat in enumerate(selected):
+		row = stats.get(cat.id)
+		count = row['count'] if row else 0
+		avg_score = round(row['total_score'] / count, 1) if count else 0
+		avg_total = round(row['total_possible'] / count, 1) if count else 0
+		category_stats.append({
+			'id': cat.id,
+			'name': cat.name,
+			'slug': cat.slug,
+			'avg_score': avg_score,
+			'avg_total': avg_total,
+			'percent': int(round((avg_score / avg_total) * 100)) if avg_total else 0,
+			'best_score': row['best_score'] if row else 0,
+			'gradient': CATEGORY_GRADIENTS[idx % len(CATEGORY_GRADIENTS)],
+			'emoji': CATEGORY_EMOJI.get(cat.slug.lower(), DEFAULT_CATEGORY_EMOJI),
+			'count': count,
+			'time_spent': _format_time_spent(row['total_time'] if row else 0),
+			'recent_scores': recent.get(cat.id, []),
+		})
 
 	context = {
 		'quizzes': quizzes,
 		'categories': categories,
 		'category_stats': category_stats,
+		'user_stats': user_stats,
 	}
 	return render(request, 'dashboard/home.html', context)
 
 # Create your views here.
 
 
+HISTORY_PAGE_SIZE = 24
+
+
+def _history_page(attempts, filters, cursor_token):
+	"""One keyset page of completed attempts after ``cursor_token``; returns ``(rows, next_cursor)``."""
+	column, descending = HISTORY_SORTS[filters['sort']]
+	page = attempts.filter(is_completed=True)
+	cursor = decode_cursor(cursor_token, datetime if column == 'started_at' else int, int)
+	if cursor:
+		value, pk = cursor
+		op = 'lt' if descending else 'gt'
+		page = page.filter(Q(**{f'{column}__{op}': value}) | Q(**{column: value, f'id__{op}': pk}))
+	rows = list(page[:HISTORY_PAGE_SIZE + 1])
+	if len(rows) <= HISTORY_PAGE_SIZE:
+		return rows, None
+	rows = rows[:HISTORY_PAGE_SIZE]
+	last = rows[-1]
+	return rows, encode_cursor(getattr(last, column), last.pk)
+
+
+def _history_row(a: Attempt, peers_ongoing: dict, peers_completed: dict) -> dict:
+	# Human time for the attempt (fallback to the started/completed difference)
+	secs = a.time_taken
+	if secs is None and a.started_at and a.completed_at:
+		secs = int((a.completed_at - a.started_at).total_seconds())
+	if secs:
+		m, s = divmod(int(secs), 60)
+		tdisp = f"{m:02d}:{s:02d}"
+	else:
+		secs, tdisp = 0, '—'
+	return {
+		'obj': a,
+		'category': getattr(a.quiz.category, 'name', '—'),
+		'title': a.quiz.title,
+		'date': a.started_at,
+		'score': a.correct_count,
+		'total': a.total,
+		'percent': a.percent,
+		'time': tdisp,
+		'time_secs': int(secs),
+		'peers_ongoing': peers_ongoing.get(a.quiz_id, 0),
+		'peers_completed': peers_completed.get(a.quiz_id, 0),
+	}
+
+
 @login_required
 def quiz_history(request):
-	"""User dashboard: show completed and ongoing quiz attempts with filters/sorting/search."""
+	"""User dashboard: show completed and ongoing quiz attempts with filters/sorting/search.
+
+	Completed attempts are keyset-paginated (``?after=<cursor>``) and only the visible page
+	is enriched with timing and peer counts. ``quiz_history_items`` serves further pages as JSON.
+	"""
 	user = request.user
-	q = (request.GET.get('q') or '').strip()
-	category_id = request.GET.get('category') or ''
-	status = request.GET.get('status') or ''  # 'completed' | 'ongoing' | ''(both)
-	sort = request.GET.get('sort') or '-date'  # '-date' | 'date' | '-score' | 'score' | '-time' | 'time'
-
-	attempts = Attempt.objects.select_related('quiz__category').filter(user=user)
-
-	# Search by quiz title
-	if q:
-		attempts = attempts.filter(Q(quiz__title__icontains=q) | Q(quiz__subcategory__name__icontains=q) | Q(quiz__category__name__icontains=q))
-
-	# Filter by category
-	if category_id:
-		try:
-			attempts = attempts.filter(quiz__category_id=int(category_id))
-		except Exception:
-			pass
-
-	# Filter by completion status
-	if status == 'completed':
-		attempts = attempts.filter(is_completed=True)
-	elif status == 'ongoing':
-		attempts = attempts.filter(is_completed=False)
-
-	# Sorting
-	sort_map = {
-		'date': 'started_at',
-		'-date': '-started_at',
-		'score': 'score',
-		'-score': '-score',
-		'time': 'time_taken',
-		'-time': '-time_taken',
-	}
-	attempts = attempts.order_by(sort_map.get(sort, '-started_at'))
+	filters = history_filters(request)
+	attempts = history_attempts(user, filters)
+	status = filters['status']
 
-	# Split for UI blocks
-	ongoing = attempts.filter(is_completed=False)
-	completed = attempts.filter(is_completed=True)
+	ongoing = list(attempts.filter(is_completed=False)) if status != 'completed' else []
+	if status != 'ongoing':
+		page, next_cursor = _history_page(attempts, filters, request.GET.get('after'))
+	else:
+		page, next_cursor = [], None
 
-	# Categories for filter dropdown
-	categories = Category.objects.all().order_by('name')
-
-	# Peer counts: how many other users (excluding current user) are ongoing/completed per quiz
-	quiz_ids = list(attempts.values_list('quiz_id', flat=True).distinct())
-	base_peers = Attempt.objects.filter(quiz_id__in=quiz_ids, user__isnull=False).exclude(user=user)
-	peers_ongoing = {r['quiz_id']: r['cnt'] for r in base_peers.filter(is_completed=False).values('quiz_id').annotate(cnt=Count('user', distinct=True))}
-	peers_completed = {r['quiz_id']: r['cnt'] for r in base_peers.filter(is_completed=True).values('quiz_id').annotate(cnt=Count('user', distinct=True))}
-
-	# Helper: compute human time for each attempt (fallback to diff)
-	def time_info(a: Attempt):
-		secs = a.time_taken
-		if secs is None and a.started_at and a.completed_at:
-			secs = int((a.completed_at - a.started_at).total_seconds())
-		if not secs:
-			return 0, '—'
-		m, s = divmod(int(secs), 60)
-		return int(secs), f"{m:02d}:{s:02d}"
-
-	enriched = []
-	for a in attempts:
-		secs, tdisp = time_info(a)
-		enriched.append({
-			'obj': a,
-			'category': getattr(a.quiz.category, 'name', '—'),
-			'title': a.quiz.title,
-			'date': a.started_at,
-			'score': a.score,
-			'total': a.total,
-			'percent': a.score,  # score is already stored as percent in session flow
-			'time': tdisp,
-			'time_secs': secs,
-			'peers_ongoing': peers_ongoing.get(a.quiz_id, 0),
-			'peers_completed': peers_completed.get(a.quiz_id, 0),
-		})
+	# Peer counts only for quizzes that are actually on screen
+	peers_ongoing, peers_completed = QuizPeerCounts.peers_for(user, {a.quiz_id for a in ongoing} | {a.quiz_id for a in page})
+	enriched = [_history_row(a, peers_ongoing, peers_completed) for a in page]
 
 	# Enriched ongoing items with peer counts for template ease
 	ongoing_items = [
@@ -247,24 +228,53 @@ def quiz_history(request):
 		for a in ongoing
 	]
 
+	# Categories for filter dropdown
+	categories = sorted(taxonomy.category_tree(), key=lambda c: c.name)
+
 	context = {
 		'attempts_all': enriched,
 		'ongoing': ongoing,
 		'ongoing_items': ongoing_items,
-		'completed': completed,
+		'completed': enriched,
+		'next_cursor': next_cursor,
 		'categories': categories,
-		'filters': {
-			'q': q,
-			'category': category_id,
-			'status': status,
-			'sort': sort,
-		},
+		'filters': filters,
 		'peer_ongoing_by_quiz': peers_ongoing,
 		'peer_completed_by_quiz': peers_completed,
 	}
 	return render(request, 'dashboard/quiz_history.html', context)
 
 
+@login_required
+def quiz_history_items(request):
+	"""JSON page of completed attempts for infinite scroll on the history page."""
+	filters = history_filters(request)
+	page, next_cursor = _history_page(history_attempts(request.user, filters), filters, request.GET.get('after'))
+	peers_ongoing, peers_completed = QuizPeerCounts.peers_for(request.user, {a.quiz_id for a in page})
+	rows = [_history_row(a, peers_ongoing, peers_completed) for a in page]
+	return JsonResponse({
+		'items': [
+			{
+				'id': row['obj'].id,
+				'quiz_id': row['obj'].quiz_id,
+				'title': row['title'],
+				'category': row['category'],
+				'date': row['date'].isoformat() if row['date'] else None,
+				'score': row['score'],
+				'total': row['total'],
+				'percent': row['percent'],
+				'time': row['time'],
+				'time_secs': row['time_secs'],
+				'peers_ongoing': row['peers_ongoing'],
+				'peers_completed': row['peers_completed'],
+				'html': render_to_string('dashboard/history_card.html', {'row': row}, request=request),
+			}
+			for row in rows
+		],
+		'next_cursor': next_cursor,
+	})
+
+
 @login_required
 def dashboard_stats(request):
 	"""Statistics and analytics for the current user."""
@@ -272,18 +282,11 @@ def dashboard_stats(request):
 	all_attempts = Attempt.objects.select_related('quiz__category').filter(user=user)
 	completed_qs = all_attempts.filter(is_completed=True).order_by('-started_at')
 
-	# Totals
-	total_attempts = completed_qs.count()
-	avg_score = int(round(completed_qs.aggregate(v=Avg('score'))['v'] or 0))
-
-	# Time spent (sum of time_taken, fallback to duration)
-	total_secs = 0
-	for a in completed_qs:
-		secs = a.time_taken
-		if secs is None and a.started_at and a.completed_at:
-			secs = int((a.completed_at - a.started_at).total_seconds())
-		if secs:
-			total_secs += int(secs)
+	# Totals, time spent and achievement inputs come from the precomputed snapshot
+	user_stats = UserStats.for_user(user)
+	total_attempts = user_stats.total_attempts
+	avg_score = int(round(user_stats.avg_score))
+	total_secs = user_stats.time_spent
 
 	def fmt_hms(secs:int) -> str:
 		h = secs // 3600
@@ -300,7 +303,7 @@ def dashboard_stats(request):
 		completed_qs
 		.exclude(quiz__category__isnull=True)
 		.values('quiz__category__name')
-		.annotate(count=Count('id'), avg=Avg('score'))
+		.annotate(count=Count('id'), avg=Avg('percent'))
 		.order_by('-count')
 	)
 	categories_data = [
@@ -315,25 +318,29 @@ def dashboard_stats(request):
 	# Progress over time (last 12 attempts)
 	last_attempts = list(completed_qs.order_by('started_at')[:12])
 	line_labels = [a.started_at.strftime('%b %d') if a.started_at else '' for a in last_attempts]
-	line_scores = [int(a.score or 0) for a in last_attempts]
-
-	# Achievements
-	achievements = []
-	if total_attempts >= 1:
-		achievements.append({'title': 'First Quiz Completed', 'desc': 'You completed your first quiz', 'type': 'milestone'})
-	if total_attempts >= 10:
-		achievements.append({'title': '10 Quizzes Completed', 'desc': 'Great consistency over time', 'type': 'milestone'})
-	if any((a.score or 0) >= 100 for a in completed_qs[:50]):
-		achievements.append({'title': 'Perfect Score', 'desc': 'Scored 100% on a quiz', 'type': 'skill'})
-	if len({getattr(a.quiz.category, 'name', None) for a in completed_qs if getattr(a.quiz, 'category', None)}) >= 3:
-		achievements.append({'title': 'Quiz Explorer', 'desc': 'Tried 3+ categories', 'type': 'explore'})
+	line_scores = [a.percent for a in last_attempts]
+
+	# Achievements are awarded on completion; here we only read which rules were earned
+	earned = dict(user.achievements.values_list('achievement_id', 'earned_at'))
+	achievements = [
+		{
+			'title': rule.title,
+			'desc': rule.description,
+			'type': rule.kind,
+			'icon': rule.icon,
+			'color': rule.color,
+			'earned': rule.id in earned,
+			'earned_at': earned.get(rule.id),
+		}
+		for rule in Achievement.objects.filter(Q(is_active=True) | Q(id__in=earned))
+	]
 
 	# Recent activity (attempts both ongoing and completed, last 6)
 	recent = all_attempts.order_by('-started_at')[:6]
 
 	# Best/Needs Improvement (completed only)
-	best = list(completed_qs.order_by('-score', '-started_at')[:3])
-	needs = list(completed_qs.order_by('score', '-started_at')[:3])
+	best = list(completed_qs.order_by('-percent', '-started_at')[:3])
+	needs = list(completed_qs.order_by('percent', '-started_at')[:3])
 
 	context = {
 		'stats': {
@@ -341,6 +348,8 @@ def dashboard_stats(request):
 			'avg_score': avg_score,
 			'time_spent': time_spent_display,
 			'time_spent_secs': total_secs,
+			'streak': user_stats.active_streak,
+			'best_streak': user_stats.best_streak,
 		},
 		'categories_data': categories_data,
 		'line_labels': line_labels,
@@ -353,123 +362,117 @@ def dashboard_stats(request):
 	return render(request, 'dashboard/stats.html', context)
 
 
+LEADERBOARD_SIZE = 50
+MEDALS = {
+	1: ('🥇', 'gold'),
+	2: ('🥈', 'silver'),
+	3: ('🥉', 'bronze'),
+}
+
+
+def _leaderboard_row(row: dict, user, rank: int) -> dict:
+	total_score = row['total_score']
+	total_quizzes = row['total_quizzes']
+	total_possible = row['total_possible']
+	total_time = row['total_time']
+
+	# Format time
+	if total_time >= 3600:
+		hours = total_time // 3600
+		mins = (total_time % 3600) // 60
+		time_display = f"{hours}h {mins}m"
+	elif total_time >= 60:
+		mins = total_time // 60
+		time_display = f"{mins}m"
+	else:
+		time_display = f"{total_time}s"
+
+	medal, medal_class = MEDALS.get(rank, (None, ''))
+	return {
+		'user': user,
+		'total_score': total_score,
+		'total_quizzes': total_quizzes,
+		'avg_score': round(total_score / total_quizzes, 1) if total_quizzes > 0 else 0,
+		'accuracy': round((total_score / total_possible) * 100, 1) if total_possible > 0 else 0,
+		'time_spent': time_display,
+		'time_secs': total_time,
+		'perfect_scores': row['perfect_scores'],
+		'rank': rank,
+		'medal': medal,
+		'medal_class': medal_class,
+	}
+
+
 def leaderboard(request):
-	"""Leaderboard view with time-based filtering"""
-	filter_type = request.GET.get('filter', 'all_time')
-	now = timezone.now()
-	
-	# Determine date filter
-	if filter_type == 'this_week':
-		start_date = now - timedelta(days=now.weekday())
-		start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-		period_label = 'This Week'
-	elif filter_type == 'this_month':
-		start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-		period_label = 'This Month'
-	else:  # all_time
-		start_date = None
-		period_label = 'All Time'
-	
-	# Get all users with completed attempts
-	users_data = []
-	users = User.objects.filter(
-		quiz_attempts__is_completed=True,
-		quiz_attempts__user__isnull=False
-	).distinct()
-	
-	print(f"DEBUG: Found {users.count()} users with completed attempts")
-	
-	for user in users:
-		# Get user's completed attempts in the period
-		attempts = Attempt.objects.filter(
-			user=user,
-			is_completed=True
-		)
-		
-		if start_date:
-			attempts = attempts.filter(completed_at__gte=start_date)
-		
-		print(f"DEBUG: User {user.username} has {attempts.count()} attempts")
-		
-		if attempts.exists():
-			total_score = 0
-			total_possible = 0
-			total_quizzes = attempts.count()
-			total_time = 0
-			perfect_scores = 0
-			
-			for attempt in attempts:
-				total_score += attempt.score
-				total_possible += attempt.total
-				if attempt.time_taken:
-					total_time += attempt.time_taken
-				if attempt.total > 0 and attempt.score == attempt.total:
-					perfect_scores += 1
-			
-			# Calculate metrics
-			avg_score = round(total_score / total_quizzes, 1) if total_quizzes > 0 else 0
-			accuracy = round((total_score / total_possible) * 100, 1) if total_possible > 0 else 0
-			
-			# Format time
-			if total_time >= 3600:
-				hours = total_time // 3600
-				mins = (total_time % 3600) // 60
-				time_display = f"{hours}h {mins}m"
-			elif total_time >= 60:
-				mins = total_time // 60
-				time_display = f"{mins}m"
-			else:
-				time_display = f"{total_time}s"
-			
-			users_data.append({
-				'user': user,
-				'total_score': total_score,
-				'total_quizzes': total_quizzes,
-				'avg_score': avg_score,
-				'accuracy': accuracy,
-				'time_spent': time_display,
-				'time_secs': total_time,
-				'perfect_scores': perfect_scores,
-			})
-	
-	# Sort by total score , then by accuracy
-	users_data.sort(key=lambda x: (x['total_score'], x['accuracy']), reverse=True)
-	
-	print(f"DEBUG: Total users_data entries: {len(users_data)}")
-	for ud in users_data:
-		print(f"  - {ud['user'].username}: {ud['total_score']} pts, {ud['accuracy']}%")
-	
-	# Add rank
-	for idx, user_data in enumerate(users_data, 1):
-		user_data['rank'] = idx
-		# Assign medal
-		if idx == 1:
-			user_data['medal'] = '🥇'
-			user_data['medal_class'] = 'gold'
-		elif idx == 2:
-			user_data['medal'] = '🥈'
-			user_data['medal_class'] = 'silver'
-		elif idx == 3:
-			user_data['medal'] = '🥉'
-			user_data['medal_class'] = 'bronze'
-		else:
-			user_data['medal'] = None
-			user_data['medal_class'] = ''
-	
-	# Get current user's rank if authenticated
+	"""Leaderboard view with time-based filtering.
+
+	All-time standings are read from the materialized ``LeaderboardEntry`` table; weekly and
+	monthly standings read only the current ``LeaderboardPeriodEntry`` bucket. Pages are
+	served from the versioned cache in ``dashboard.cache``.
+
+	Ranks have RANK() semantics over ``(total_score, accuracy)``, but no window function is
+	run: a RANK() over the whole standings would scan every row on every page, while a
+	keyset page reads only its own rows. A page's first rank is instead one count of
+	strictly better standings (``better_than``), taken from the table rather than carried
+	in the cursor, so a tie that straddles a page break keeps its rank on the next page; the
+	other rows are numbered in Python by ``with_ranks``. ``LeaderboardPagingTests`` checks
+	the result against a real RANK() query.
+	"""
+	filter_type, period_label, period_start, standings = leaderboard_standings(request.GET.get('filter', 'all_time'))
+
+	# Cursor: (total_score, accuracy, user_id) of the last row on the previous page
+	cursor = decode_cursor(request.GET.get('after'), int, float, int)
+
+	def build_page():
+		page_rows = standings.order_by(*LEADERBOARD_ORDER)
+		if cursor:
+			page_rows = page_rows.filter(after_cursor(cursor))
+		page_rows = list(page_rows[:LEADERBOARD_SIZE + 1])
+		has_more = len(page_rows) > LEADERBOARD_SIZE
+		page_rows = page_rows[:LEADERBOARD_SIZE]
+		rank = position = 1
+		if cursor and page_rows:
+			# The first row's rank and position in one aggregate; the rest are numbered in Python
+			counts = standings.aggregate(
+				better=Count('user_id', filter=better_than(page_rows[0])),
+				before=Count('user_id', filter=~after_cursor(cursor)),
+			)
+			rank, position = counts['better'] + 1, counts['before'] + 1
+		users = User.objects.in_bulk([r['user_id'] for r in page_rows])
+		return {
+			'users_data': [
+				_leaderboard_row(r, users[r['user_id']], r_rank)
+				for r, r_rank in with_ranks(page_rows, rank, position)
+			],
+			'total_participants': standings.count(),
+			'next_cursor': encode_cursor(page_rows[-1]['total_score'], page_rows[-1]['accuracy'], page_rows[-1]['user_id']) if has_more else None,
+			'page_start': position,
+			'page_end': position + len(page_rows) - 1,
+		}
+
+	# The period start is part of the key, so a new week/month never reads the previous page
+	cursor_key = ':'.join(map(str, cursor)) if cursor else '-'
+	page = leaderboard_cache.get_page(f'{filter_type}:{period_start or "-"}:{cursor_key}', build_page)
+	users_data = page['users_data']
+
+	# Get current user's rank if authenticated: off-page it is one count of better scores
 	current_user_data = None
 	if request.user.is_authenticated:
-		for user_data in users_data:
-			if user_data['user'].id == request.user.id:
-				current_user_data = user_data
-				break
-	
+		current_user_data = next((d for d in users_data if d['user'].id == request.user.id), None)
+		if current_user_data is None:
+			mine = next(iter(standings.filter(user_id=request.user.id)[:1]), None)
+			if mine:
+				current_user_data = _leaderboard_row(mine, request.user, rank_of(standings, mine))
+
 	context = {
-		'users_data': users_data[:50],  # Top 50
+		'users_data': users_data,  # Top 50 (or the page after the cursor)
 		'filter_type': filter_type,
 		'period_label': period_label,
 		'current_user_data': current_user_data,
-		'total_participants': len(users_data),
+		'total_participants': page['total_participants'],
+		'next_cursor': page['next_cursor'],
+		'page_start': page['page_start'],
+		'page_end': page['page_end'],
 	}
-	
+
 	return render(request, 'dashboard/leaderboard.html', context)
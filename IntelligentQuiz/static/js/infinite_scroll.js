@@ -0,0 +1,39 @@
+// Infinite scroll for keyset-paginated grids (quiz catalog, quiz history).
+//
+// Markup: a "Load more" link with data-infinite-scroll="<JSON items URL>",
+// data-target="<grid element id>" and data-cursor="<next cursor>". When the link
+// comes into view (or is clicked) the next page is fetched with the current query
+// string plus after=<cursor>, each item's html is appended to the grid, and the
+// grid receives an "infinite-scroll:page" event.
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('[data-infinite-scroll]').forEach(moreBtn => {
+        const grid = document.getElementById(moreBtn.dataset.target);
+        if (!grid) return;
+        let loading = false;
+        const loadMore = () => {
+            if (loading || !moreBtn.dataset.cursor) return;
+            loading = true;
+            const params = new URLSearchParams(window.location.search);
+            params.set('after', moreBtn.dataset.cursor);
+            fetch(moreBtn.dataset.infiniteScroll + '?' + params.toString(), {headers: {'Accept': 'application/json'}})
+                .then(r => r.json())
+                .then(data => {
+                    data.items.forEach(item => grid.insertAdjacentHTML('beforeend', item.html));
+                    if (data.next_cursor) {
+                        moreBtn.dataset.cursor = data.next_cursor;
+                    } else {
+                        delete moreBtn.dataset.cursor;
+                        moreBtn.parentElement.remove();
+                    }
+                    grid.dispatchEvent(new CustomEvent('infinite-scroll:page'));
+                })
+                .finally(() => { loading = false; });
+        };
+        moreBtn.addEventListener('click', e => { e.preventDefault(); loadMore(); });
+        if ('IntersectionObserver' in window) {
+            new IntersectionObserver(entries => {
+                if (entries.some(en => en.isIntersecting)) loadMore();
+            }).observe(moreBtn);
+        }
+    });
+});
@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Achievement, UserAchievement
+
+
+@admin.register(Achievement)
+class AchievementAdmin(admin.ModelAdmin):
+    list_display = ("title", "code", "metric", "threshold", "kind", "sort_order", "is_active")
+    list_editable = ("threshold", "sort_order", "is_active")
+    list_filter = ("kind", "metric", "is_active")
+    prepopulated_fields = {"code": ("title",)}
+
+
+@admin.register(UserAchievement)
+class UserAchievementAdmin(admin.ModelAdmin):
+    list_display = ("user", "achievement", "earned_at")
+    list_filter = ("achievement",)
+    search_fields = ("user__username",)
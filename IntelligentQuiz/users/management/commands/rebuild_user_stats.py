@@ -0,0 +1,54 @@
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import TruncDate
+
+from Quizez.models import Attempt
+from users.models import Achievement, UserStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute every UserStats snapshot from completed attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        completed = Attempt.objects.filter(is_completed=True, user__isnull=False)
+
+        # Streaks from each user's distinct active days, in one ordered pass
+        days_by_user = defaultdict(list)
+        active_days = (
+            completed
+            .annotate(day=TruncDate('completed_at'))
+            .values_list('user_id', 'day')
+            .distinct()
+            .order_by('user_id', 'day')
+        )
+        for user_id, day in active_days.iterator():
+            days_by_user[user_id].append(day)
+
+        snapshots = []
+        for row in UserStats.aggregate_attempts(completed):
+            stats = UserStats(**row)
+            for day in days_by_user.get(row['user_id'], []):
+                stats.record_activity(day)
+            snapshots.append(stats)
+
+        UserStats.objects.all().delete()
+        UserStats.objects.bulk_create(snapshots, batch_size=options['batch_size'])
+
+        # Earned achievements are kept; only rules newly met by the rebuilt totals are added
+        batch_size = options['batch_size']
+        awarded = 0
+        for i in range(0, len(snapshots), batch_size):
+            awarded += len(Achievement.award(snapshots[i:i + batch_size]))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt stats for {len(snapshots)} of {User.objects.count()} users, '
+                f'awarded {awarded} achievements'
+            )
+        )
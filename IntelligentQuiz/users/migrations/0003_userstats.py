@@ -0,0 +1,86 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:09
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_user_stats(apps, schema_editor):
+    # UserStats.aggregate_attempts and the streak pass of rebuild_user_stats at the time
+    # of this migration, so 0005 awards achievements from real snapshots
+    Attempt = apps.get_model('Quizez', 'Attempt')
+    UserStats = apps.get_model('users', 'UserStats')
+
+    completed = Attempt.objects.filter(is_completed=True, user__isnull=False)
+    days_by_user = defaultdict(list)
+    active_days = (
+        completed
+        .annotate(day=TruncDate('completed_at'))
+        .values_list('user_id', 'day')
+        .distinct()
+        .order_by('user_id', 'day')
+    )
+    for user_id, day in active_days.iterator():
+        days_by_user[user_id].append(day)
+
+    rows = completed.values('user_id').annotate(
+        total_attempts=Count('id'),
+        total_score=Coalesce(Sum('score'), 0),
+        best_score=Coalesce(Max('score'), 0),
+        recorded_time=Coalesce(Sum('time_taken'), 0),
+        fallback_time=Sum(
+            ExpressionWrapper(F('completed_at') - F('started_at'), output_field=DurationField()),
+            filter=Q(time_taken__isnull=True),
+        ),
+        categories_count=Count('quiz__category', distinct=True),
+    ).order_by()
+    snapshots = []
+    for row in rows.iterator():
+        fallback = row.pop('fallback_time')
+        row['time_spent'] = row.pop('recorded_time') + (max(0, int(fallback.total_seconds())) if fallback else 0)
+        stats = UserStats(**row)
+        # UserStats.record_activity over days in order
+        for day in days_by_user.get(row['user_id'], []):
+            if stats.last_active_date and (day - stats.last_active_date).days == 1:
+                stats.current_streak += 1
+            else:
+                stats.current_streak = 1
+            stats.last_active_date = day
+            stats.best_streak = max(stats.best_streak, stats.current_streak)
+        snapshots.append(stats)
+    UserStats.objects.bulk_create(snapshots, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quizez', '0010_explanation_answer_explanation'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_alter_profile_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='quiz_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_attempts', models.PositiveIntegerField(default=0, help_text='Completed attempts')),
+                ('total_score', models.PositiveIntegerField(default=0)),
+                ('best_score', models.PositiveIntegerField(default=0)),
+                ('time_spent', models.PositiveIntegerField(default=0, help_text='Total time spent in seconds')),
+                ('categories_count', models.PositiveIntegerField(default=0, help_text='Distinct categories with a completed attempt')),
+                ('current_streak', models.PositiveIntegerField(default=0, help_text='Consecutive active days ending on last_active_date')),
+                ('best_streak', models.PositiveIntegerField(default=0)),
+                ('last_active_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'User stats',
+            },
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
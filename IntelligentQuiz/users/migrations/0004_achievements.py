@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_userstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Achievement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.SlugField(unique=True)),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.CharField(blank=True, max_length=200)),
+                ('kind', models.CharField(choices=[('milestone', 'Milestone'), ('skill', 'Skill'), ('explore', 'Explore')], default='milestone', max_length=20)),
+                ('icon', models.CharField(default='🏅', max_length=10)),
+                ('color', models.CharField(default='gold', help_text='Badge colour class (gold, blue, green)', max_length=20)),
+                ('metric', models.CharField(choices=[('total_attempts', 'Completed attempts'), ('best_score', 'Best score'), ('categories_count', 'Categories tried'), ('best_streak', 'Best streak (days)')], max_length=30)),
+                ('threshold', models.PositiveIntegerField(default=1)),
+                ('sort_order', models.PositiveIntegerField(default=0)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['sort_order', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserAchievement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('earned_at', models.DateTimeField(auto_now_add=True)),
+                ('achievement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='awards', to='users.achievement')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='achievements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'achievement'), name='unique_user_achievement')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations
+
+ACHIEVEMENTS = [
+    # code, title, description, kind, icon, color, metric, threshold
+    ('first-quiz', 'First Quiz', 'Complete one quiz', 'milestone', '🏅', 'gold', 'total_attempts', 1),
+    ('ten-quizzes', '10 Quizzes', 'Reach ten attempts', 'milestone', '📘', 'blue', 'total_attempts', 10),
+    ('perfect-score', 'Perfect Score', 'Get 100% once', 'skill', '⭐', 'green', 'best_score', 100),
+    ('quiz-explorer', 'Quiz Explorer', 'Try 3+ categories', 'explore', '🎯', 'blue', 'categories_count', 3),
+]
+
+
+def seed_achievements(apps, schema_editor):
+    Achievement = apps.get_model('users', 'Achievement')
+    UserAchievement = apps.get_model('users', 'UserAchievement')
+    UserStats = apps.get_model('users', 'UserStats')
+
+    rules = []
+    for order, (code, title, description, kind, icon, color, metric, threshold) in enumerate(ACHIEVEMENTS):
+        rule, _ = Achievement.objects.get_or_create(code=code, defaults={
+            'title': title,
+            'description': description,
+            'kind': kind,
+            'icon': icon,
+            'color': color,
+            'metric': metric,
+            'threshold': threshold,
+            'sort_order': order,
+        })
+        rules.append(rule)
+
+    # Award what existing snapshots already qualify for
+    for rule in rules:
+        qualified = UserStats.objects.filter(**{f'{rule.metric}__gte': rule.threshold}).values_list('user_id', flat=True)
+        UserAchievement.objects.bulk_create(
+            [UserAchievement(user_id=user_id, achievement=rule) for user_id in qualified.iterator()],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+
+def remove_achievements(apps, schema_editor):
+    Achievement = apps.get_model('users', 'Achievement')
+    Achievement.objects.filter(code__in=[row[0] for row in ACHIEVEMENTS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_achievements'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_achievements, remove_achievements),
+    ]
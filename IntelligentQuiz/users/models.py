@@ -6,6 +6,9 @@ except Exception:
     Image = None
 import os
 from django.conf import settings
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 
 class Profile(models.Model):
@@ -47,3 +50,166 @@ class Profile(models.Model):
             return self.image.url
         # Return a static fallback image
         return os.path.join(settings.STATIC_URL, 'img/default-profile.png')
+
+
+class UserStats(models.Model):
+    """Per-user quiz statistics snapshot read by profile, stats and home.
+
+    Kept current by the ``attempt_completed`` receiver in ``users.signals``;
+    ``manage.py rebuild_user_stats`` recomputes it from attempts to repair drift.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='quiz_stats')
+    total_attempts = models.PositiveIntegerField(default=0, help_text="Completed attempts")
+    total_score = models.PositiveIntegerField(default=0)
+    best_score = models.PositiveIntegerField(default=0)
+    time_spent = models.PositiveIntegerField(default=0, help_text="Total time spent in seconds")
+    categories_count = models.PositiveIntegerField(default=0, help_text="Distinct categories with a completed attempt")
+    current_streak = models.PositiveIntegerField(default=0, help_text="Consecutive active days ending on last_active_date")
+    best_streak = models.PositiveIntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'User stats'
+
+    def __str__(self):
+        return f'{self.user.username} Stats'
+
+    @classmethod
+    def for_user(cls, user):
+        """Return the user's snapshot, or an unsaved empty one if they have none yet."""
+        return cls.objects.filter(user=user).first() or cls(user=user)
+
+    @property
+    def avg_score(self):
+        return round(self.total_score / self.total_attempts, 1) if self.total_attempts else 0
+
+    @property
+    def active_streak(self):
+        """Current streak, or 0 if the user has not completed a quiz today or yesterday."""
+        if not self.last_active_date or (timezone.localdate() - self.last_active_date).days > 1:
+            return 0
+        return self.current_streak
+
+    def add_attempt(self, attempt, new_category=False):
+        """Fold a newly completed attempt into the snapshot."""
+        self.total_attempts += 1
+        self.total_score += attempt.percent
+        self.best_score = max(self.best_score, attempt.percent)
+        secs = attempt.time_taken
+        if secs is None and attempt.started_at and attempt.completed_at:
+            secs = int((attempt.completed_at - attempt.started_at).total_seconds())
+        self.time_spent += max(0, secs or 0)
+        if new_category:
+            self.categories_count += 1
+        self.record_activity(timezone.localtime(attempt.completed_at).date())
+
+    def record_activity(self, day):
+        if self.last_active_date == day:
+            return
+        if self.last_active_date and (day - self.last_active_date).days == 1:
+            self.current_streak += 1
+        elif self.last_active_date and day < self.last_active_date:
+            # Out-of-order activity cannot extend the streak
+            return
+        else:
+            self.current_streak = 1
+        self.last_active_date = day
+        self.best_streak = max(self.best_streak, self.current_streak)
+
+    @staticmethod
+    def aggregate_attempts(attempts):
+        """Group completed attempts per user into dicts keyed like the snapshot fields.
+
+        ``time_spent`` is ``time_taken``, falling back to the attempt's wall-clock
+        duration where it was not recorded; the two parts are summed separately
+        because not every backend can multiply an integer into a duration.
+        """
+        rows = attempts.values('user_id').annotate(
+            total_attempts=Count('id'),
+            total_score=Coalesce(Sum('percent'), 0),
+            best_score=Coalesce(Max('percent'), 0),
+            recorded_time=Coalesce(Sum('time_taken'), 0),
+            fallback_time=Sum(
+                ExpressionWrapper(F('completed_at') - F('started_at'), output_field=DurationField()),
+                filter=Q(time_taken__isnull=True),
+            ),
+            categories_count=Count('quiz__category', distinct=True),
+        ).order_by()
+        for row in rows.iterator():
+            fallback = row.pop('fallback_time')
+            row['time_spent'] = row.pop('recorded_time') + (max(0, int(fallback.total_seconds())) if fallback else 0)
+            yield row
+
+
+class Achievement(models.Model):
+    """An achievement rule: earned once a ``UserStats`` metric reaches ``threshold``.
+
+    Rules are evaluated when an attempt completes (``users.signals``) and the
+    result is persisted as ``UserAchievement`` rows, so pages only read them.
+    """
+    KIND_CHOICES = [
+        ('milestone', 'Milestone'),
+        ('skill', 'Skill'),
+        ('explore', 'Explore'),
+    ]
+    METRIC_CHOICES = [
+        ('total_attempts', 'Completed attempts'),
+        ('best_score', 'Best score'),
+        ('categories_count', 'Categories tried'),
+        ('best_streak', 'Best streak (days)'),
+    ]
+
+    code = models.SlugField(max_length=50, unique=True)
+    title = models.CharField(max_length=100)
+    description = models.CharField(max_length=200, blank=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='milestone')
+    icon = models.CharField(max_length=10, default='🏅')
+    color = models.CharField(max_length=20, default='gold', help_text="Badge colour class (gold, blue, green)")
+    metric = models.CharField(max_length=30, choices=METRIC_CHOICES)
+    threshold = models.PositiveIntegerField(default=1)
+    sort_order = models.PositiveIntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['sort_order', 'id']
+
+    def __str__(self):
+        return self.title
+
+    def is_met(self, stats):
+        return getattr(stats, self.metric) >= self.threshold
+
+    @classmethod
+    def award(cls, stats_list):
+        """Persist every active rule newly met by the given snapshots; returns the new rows."""
+        stats_list = [s for s in stats_list if s.total_attempts]
+        if not stats_list:
+            return []
+        rules = list(cls.objects.filter(is_active=True))
+        earned = set(
+            UserAchievement.objects
+            .filter(user_id__in=[s.user_id for s in stats_list])
+            .values_list('user_id', 'achievement_id')
+        )
+        new = [
+            UserAchievement(user_id=stats.user_id, achievement=rule)
+            for stats in stats_list
+            for rule in rules
+            if (stats.user_id, rule.id) not in earned and rule.is_met(stats)
+        ]
+        return UserAchievement.objects.bulk_create(new, ignore_conflicts=True)
+
+
+class UserAchievement(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='achievements')
+    achievement = models.ForeignKey(Achievement, on_delete=models.CASCADE, related_name='awards')
+    earned_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'achievement'], name='unique_user_achievement'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} - {self.achievement}'
@@ -3,6 +3,9 @@ from django.contrib.auth.models import User
 from django.dispatch import receiver
 from django.apps import apps
 
+from Quizez.models import Attempt
+from Quizez.signals import attempt_completed
+
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
     if created:
@@ -12,4 +15,23 @@ def create_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_profile(sender, instance, **kwargs):
     if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+        instance.profile.save()
+
+
+@receiver(attempt_completed, sender=Attempt)
+def update_user_stats(sender, attempt, **kwargs):
+    """Fold a finished attempt into the user's stats snapshot (inside the completing transaction)."""
+    if attempt.user_id is None:
+        return
+    UserStats = apps.get_model('users', 'UserStats')
+    stats, _ = UserStats.objects.select_for_update().get_or_create(user_id=attempt.user_id)
+    category_id = attempt.quiz.category_id
+    new_category = bool(category_id) and not (
+        Attempt.objects
+        .filter(user_id=attempt.user_id, is_completed=True, quiz__category_id=category_id)
+        .exclude(pk=attempt.pk)
+        .exists()
+    )
+    stats.add_attempt(attempt, new_category=new_category)
+    stats.save()
+    apps.get_model('users', 'Achievement').award([stats])
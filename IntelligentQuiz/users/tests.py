@@ -1,3 +1,118 @@
+from datetime import date, timedelta
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from Quizez.models import Attempt, Category
+from Quizez.tests import complete_attempt, make_quiz
+
+from .models import Achievement, UserAchievement, UserStats
+
+SNAPSHOT_FIELDS = (
+    'user_id', 'total_attempts', 'total_score', 'best_score', 'time_spent',
+    'categories_count', 'current_streak', 'best_streak', 'last_active_date',
+)
+
+
+class UserStatsTests(TestCase):
+    """The UserStats snapshot follows completed attempts and can be rebuilt from them."""
+
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.bob = User.objects.create_user('bob', password='pw')
+        science = Category.objects.create(name='Science')
+        history = Category.objects.create(name='History')
+        self.forces = make_quiz('Forces', points=(1, 1, 2), category=science)
+        self.optics = make_quiz('Optics', category=science)
+        self.rome = make_quiz('Rome', category=history)
+
+    def test_completion_updates_the_snapshot(self):
+        complete_attempt(self.alice, self.forces, (True, True, False), time_taken=40)
+        complete_attempt(self.alice, self.optics, (True, True, True), time_taken=20)
+        complete_attempt(self.alice, self.rome, (False, False, False), time_taken=30)
+        Attempt.objects.create(user=self.alice, quiz=self.rome)
+        stats = UserStats.objects.get(user=self.alice)
+        self.assertEqual(
+            (stats.total_attempts, stats.total_score, stats.best_score, stats.time_spent, stats.categories_count),
+            (3, 150, 100, 90, 2),
+        )
+        self.assertEqual(stats.avg_score, 50.0)
+        self.assertEqual((stats.current_streak, stats.last_active_date), (1, timezone.localdate()))
+        self.assertFalse(UserStats.objects.filter(user=self.bob).exists())
+
+    def test_streak_counts_consecutive_days(self):
+        stats = UserStats(user=self.alice)
+        for day in (1, 2, 3, 3, 5, 6):
+            stats.record_activity(date(2026, 3, day))
+        self.assertEqual((stats.current_streak, stats.best_streak), (2, 3))
+        # An older day arriving late changes nothing
+        stats.record_activity(date(2026, 3, 4))
+        self.assertEqual((stats.current_streak, stats.best_streak, stats.last_active_date), (2, 3, date(2026, 3, 6)))
+
+    def test_active_streak_lapses_after_a_missed_day(self):
+        stats = UserStats(user=self.alice, current_streak=4, last_active_date=timezone.localdate() - timedelta(days=1))
+        self.assertEqual(stats.active_streak, 4)
+        stats.last_active_date -= timedelta(days=1)
+        self.assertEqual(stats.active_streak, 0)
+
+    def test_rebuild_matches_the_incremental_snapshots(self):
+        complete_attempt(self.alice, self.forces, (True, True, False), time_taken=40)
+        complete_attempt(self.alice, self.rome, (True, False, None), time_taken=None)
+        complete_attempt(self.bob, self.optics, (True, True, True))
+        incremental = list(UserStats.objects.order_by('user_id').values(*SNAPSHOT_FIELDS))
+        UserStats.objects.all().delete()
+        call_command('rebuild_user_stats', stdout=StringIO())
+        self.assertEqual(list(UserStats.objects.order_by('user_id').values(*SNAPSHOT_FIELDS)), incremental)
+
+    def test_migration_backfills_attempts_finished_before_it(self):
+        # Rows from before the table existed: legacy score, no signal sent
+        Attempt.objects.create(user=self.alice, quiz=self.forces, score=3, total=3, time_taken=30, is_completed=True)
+        yesterday = Attempt.objects.create(user=self.alice, quiz=self.rome, score=1, total=3, time_taken=10, is_completed=True)
+        Attempt.objects.filter(pk=yesterday.pk).update(completed_at=timezone.now() - timedelta(days=1))
+        Attempt.objects.create(user=self.bob, quiz=self.rome, score=2, total=3)
+        import_module('users.migrations.0003_userstats').backfill_user_stats(apps, None)
+        stats = UserStats.objects.get(user=self.alice)
+        self.assertEqual(
+            (stats.total_attempts, stats.total_score, stats.best_score, stats.time_spent, stats.categories_count),
+            (2, 4, 3, 40, 2),
+        )
+        self.assertEqual((stats.current_streak, stats.best_streak), (2, 2))
+        self.assertFalse(UserStats.objects.filter(user=self.bob).exists())
+
+
+class AchievementTests(TestCase):
+    """Achievements are persisted once, when a completion first meets their rule."""
+
+    def setUp(self):
+        Achievement.objects.update(is_active=False)
+        self.first = Achievement.objects.create(code='test-first', title='First', metric='total_attempts', threshold=1)
+        self.perfect = Achievement.objects.create(code='test-perfect', title='Perfect', metric='best_score', threshold=100)
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.quiz = make_quiz('Forces')
+
+    def earned(self):
+        return set(UserAchievement.objects.filter(user=self.alice).values_list('achievement__code', flat=True))
+
+    def test_completion_awards_met_rules_once(self):
+        complete_attempt(self.alice, self.quiz, (True, False, True))
+        self.assertEqual(self.earned(), {'test-first'})
+        complete_attempt(self.alice, self.quiz, (True, True, True))
+        complete_attempt(self.alice, self.quiz, (True, True, True))
+        self.assertEqual(self.earned(), {'test-first', 'test-perfect'})
+        self.assertEqual(UserAchievement.objects.filter(user=self.alice).count(), 2)
+
+    def test_inactive_rules_are_not_awarded(self):
+        Achievement.objects.filter(pk=self.perfect.pk).update(is_active=False)
+        complete_attempt(self.alice, self.quiz, (True, True, True))
+        self.assertEqual(self.earned(), {'test-first'})
 
-# Create your tests here.
+    def test_rebuild_awards_rules_met_by_the_rebuilt_totals(self):
+        complete_attempt(self.alice, self.quiz, (True, True, True))
+        UserAchievement.objects.all().delete()
+        call_command('rebuild_user_stats', stdout=StringIO())
+        self.assertEqual(self.earned(), {'test-first', 'test-perfect'})
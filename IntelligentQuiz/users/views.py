@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.shortcuts import redirect, render
 from .forms import UserUpdateForm, ProfileUpdateForm
+from .models import UserStats
 from django.views.decorators.csrf import csrf_protect
 from django.contrib import messages
 
@@ -70,23 +71,16 @@ def profile(request):
         u_form = UserUpdateForm(instance=request.user)
         p_form = ProfileUpdateForm(instance=request.user.profile)
 
-    # Get quiz statistics
-    quiz_attempts = request.user.quiz_attempts.all()
-    total_quizzes = quiz_attempts.count()
-    if total_quizzes > 0:
-        avg_score = sum(attempt.score for attempt in quiz_attempts) / total_quizzes
-        best_score = max(attempt.score for attempt in quiz_attempts)
-    else:
-        avg_score = 0
-        best_score = 0
+    # Quiz statistics come from the precomputed snapshot
+    stats = UserStats.for_user(request.user)
 
     context = {
         'u_form': u_form,
         'p_form': p_form,
-        'quiz_count': total_quizzes,
-        'avg_score': round(avg_score, 1),
-        'best_score': best_score,
-        'recent_attempts': quiz_attempts.order_by('-completed_at')[:5]
+        'quiz_count': stats.total_attempts,
+        'avg_score': stats.avg_score,
+        'best_score': stats.best_score,
+        'recent_attempts': request.user.quiz_attempts.select_related('quiz').order_by('-completed_at')[:5]
     }
     
     return render(request, 'users/profile.html', context)